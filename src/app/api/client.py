@@ -0,0 +1,199 @@
+import http.client
+import json
+import threading
+from functools import partial
+from urllib.parse import urlsplit
+from app.api.codec import dumps, loads
+from app.core.config import AppConfig
+
+# Методы DataService, доступные через API. iter_transactions не входит:
+# серверный курсор не передаётся по HTTP, выгрузка идёт постранично
+DATA_METHODS = frozenset(
+    {
+        "client_exists",
+        "get_all_clients",
+        "get_clients_page",
+        "get_client_by_id",
+        "get_client_by_email",
+        "add_client",
+        "update_client",
+        "delete_client",
+        "get_clients_by_ids",
+        "search_clients_by_name",
+        "search_clients",
+        "account_exists",
+        "get_all_accounts",
+        "get_client_accounts",
+        "get_accounts_page",
+        "get_account_transactions",
+        "get_account_by_id",
+        "get_accounts_by_ids",
+        "get_account_by_number",
+        "add_account",
+        "update_account",
+        "delete_account",
+        "create_account",
+        "deposit_to_account",
+        "make_transfer",
+        "make_transfers_batch",
+        "make_manual_transaction",
+        "get_all_transactions",
+        "get_client_transactions",
+        "get_transactions_page",
+        "get_transactions_by_ids",
+        "get_monthly_summary",
+        "get_transaction_type_summary",
+        "get_totals_summary",
+        "get_balance_at",
+        "get_balance_series",
+        "delete_transaction",
+        "cache_stats",
+    }
+)
+
+AUTH_METHODS = frozenset(
+    {
+        "authenticate",
+        "register_user",
+        "register_client",
+        "link_client_to_auth",
+        "create_client_for_user",
+    }
+)
+
+
+def _http_connection(https: bool, host: str, port: int, timeout: float):
+    cls = http.client.HTTPSConnection if https else http.client.HTTPConnection
+    return cls(host, port, timeout=timeout)
+
+
+class RemoteError(Exception):
+    """Ошибка на стороне API-сервера (или сервер недоступен)."""
+
+
+class ApiClient:
+    """Вызов методов сервисов на API-сервере (app/api/server.py).
+
+    `client.get_client_by_id(5)` отправляет POST /rpc/get_client_by_id.
+    Соединение keep-alive своё у каждого потока (фоновые загрузчики
+    работают параллельно). ValueError сервиса приходит как ValueError —
+    контроллеры показывают его текст пользователю, как и в локальном режиме.
+    """
+
+    METHODS = frozenset()
+
+    def __init__(self, url: str = None, token: str = None, timeout: float = None):
+        parts = urlsplit(url or AppConfig.API_URL or "")
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Некорректный адрес API: {url or AppConfig.API_URL}")
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+        self._token = token if token is not None else AppConfig.API_TOKEN
+        self._timeout = timeout or AppConfig.API_TIMEOUT
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        if name in self.METHODS:
+            return partial(self.call, name)
+        raise AttributeError(name)
+
+    def _connection(self):
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = self._local.connection = _http_connection(
+                self._https, self._host, self._port, self._timeout
+            )
+        return conn
+
+    def close(self):
+        """Закрывает соединение текущего потока."""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            self._local.connection = None
+            conn.close()
+
+    def call(self, method: str, *args, **kwargs):
+        body = dumps({"args": list(args), "kwargs": kwargs})
+        headers = {"Content-Type": "application/json"}
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
+
+        for attempt in range(2):
+            conn = self._connection()
+            reused = conn.sock is not None
+            try:
+                conn.request("POST", f"{self._prefix}/rpc/{method}", body, headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ) as e:
+                self.close()
+                # Сервер закрыл простаивавшее соединение, не приняв запрос, —
+                # повтор на новом соединении безопасен
+                if not reused or attempt:
+                    raise RemoteError(f"API недоступен: {e}") from e
+            except OSError as e:
+                self.close()
+                raise RemoteError(f"API недоступен: {e}") from e
+
+        try:
+            payload = loads(data) or {}
+        except (ValueError, TypeError):
+            raise RemoteError(f"Некорректный ответ API ({response.status})")
+        if response.status == 200:
+            return payload.get("result")
+
+        error = payload.get("error") or {}
+        message = error.get("message") or f"HTTP {response.status}"
+        if error.get("type") == "ValueError":
+            raise ValueError(message)
+        raise RemoteError(message)
+
+
+class RemoteDataService(ApiClient):
+    """DataService удалённого режима: те же методы, выполняются на сервере."""
+
+    METHODS = DATA_METHODS
+
+
+class RemoteAuthService(ApiClient):
+    """Вход и регистрация через API; хэш пароля сервер не возвращает."""
+
+    METHODS = AUTH_METHODS
+
+
+def remote_mode() -> bool:
+    return bool(AppConfig.API_URL)
+
+
+def create_data_service():
+    """DataService или, при заданном API_URL, RemoteDataService."""
+    if remote_mode():
+        return RemoteDataService()
+    from app.core.services.data_service import DataService
+
+    return DataService()
+
+
+def check_connection(url: str = None, timeout: float = 5.0) -> dict:
+    """GET /health — для проверки адреса API при запуске."""
+    parts = urlsplit(url or AppConfig.API_URL)
+    conn = _http_connection(
+        parts.scheme == "https", parts.hostname, parts.port, timeout
+    )
+    try:
+        conn.request("GET", f"{parts.path.rstrip('/')}/health")
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RemoteError(f"API ответил {response.status}")
+        return json.loads(response.read())
+    except OSError as e:
+        raise RemoteError(f"API недоступен: {e}") from e
+    finally:
+        conn.close()
@@ -0,0 +1,96 @@
+import json
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from app.core.database.models import (
+    Account,
+    AccountPage,
+    AuthUser,
+    Client,
+    ClientPage,
+    Transaction,
+    TransactionPage,
+    TransferResult,
+)
+
+_MODELS = {
+    cls.__name__: cls
+    for cls in (
+        AuthUser,
+        Client,
+        Account,
+        Transaction,
+        TransferResult,
+        TransactionPage,
+        ClientPage,
+        AccountPage,
+    )
+}
+
+
+def encode(value):
+    """Значение сервиса -> структура для JSON.
+
+    Типы, которых нет в JSON, помечаются ключом "$type": модели, даты,
+    Decimal, кортежи (ключи постраничной выборки передаются обратно как
+    `after`) и словари с нестроковыми ключами (get_accounts_by_ids и т.п.).
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if is_dataclass(value) and type(value).__name__ in _MODELS:
+        return {
+            "$type": type(value).__name__,
+            "fields": {f.name: encode(getattr(value, f.name)) for f in fields(value)},
+        }
+    if isinstance(value, datetime):
+        return {"$type": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"$type": "date", "value": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$type": "decimal", "value": str(value)}
+    if isinstance(value, tuple):
+        return {"$type": "tuple", "items": [encode(item) for item in value]}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and key != "$type" for key in value):
+            return {key: encode(item) for key, item in value.items()}
+        return {
+            "$type": "dict",
+            "items": [[encode(key), encode(item)] for key, item in value.items()],
+        }
+    if isinstance(value, (list, set, frozenset)):
+        return [encode(item) for item in value]
+    raise TypeError(f"Тип {type(value).__name__} не передаётся через API")
+
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    kind = value.get("$type")
+    if kind is None:
+        return {key: decode(item) for key, item in value.items()}
+    if kind in _MODELS:
+        return _MODELS[kind](
+            **{key: decode(item) for key, item in value["fields"].items()}
+        )
+    if kind == "datetime":
+        return datetime.fromisoformat(value["value"])
+    if kind == "date":
+        return date.fromisoformat(value["value"])
+    if kind == "decimal":
+        return Decimal(value["value"])
+    if kind == "tuple":
+        return tuple(decode(item) for item in value["items"])
+    if kind == "dict":
+        return {decode(key): decode(item) for key, item in value["items"]}
+    raise ValueError(f"Неизвестный тип в ответе API: {kind}")
+
+
+def dumps(value) -> bytes:
+    return json.dumps(encode(value), ensure_ascii=False).encode()
+
+
+def loads(data: bytes):
+    return decode(json.loads(data)) if data else None
@@ -0,0 +1,310 @@
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from http import HTTPStatus
+from app.api.client import AUTH_METHODS, DATA_METHODS
+from app.api.codec import dumps, loads
+from app.core.config import AppConfig
+from app.core.database.connection import DatabaseConnection
+from app.core.database.instrumentation import action, query_stats
+from app.core.database.listener import ChangeListener
+from app.core.services.auth_service import AuthService
+from app.core.services.data_service import DataService
+from app.core.services.login_throttle import LoginThrottledError
+from app.core.services.passwords import password_hasher
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_HEADERS = 100
+# Простаивающее keep-alive соединение закрывается через столько секунд
+IDLE_TIMEOUT = 30.0
+
+JSON_TYPE = "application/json; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _BadRequest(Exception):
+    pass
+
+
+class ApiServer:
+    """HTTP/JSON API поверх DataService для удалённых рабочих мест.
+
+    Сетевой ввод-вывод — asyncio (сколько угодно keep-alive клиентов на
+    одном потоке), вызовы сервисов — в пуле потоков размером с пул
+    соединений. Сколько бы рабочих мест ни подключилось, к БД открыто не
+    больше DB_POOL_MAX_SIZE соединений, а лишние запросы ждут в очереди
+    пула потоков, а не в max_connections сервера БД.
+
+    POST /rpc/<метод> с телом {"args": [...], "kwargs": {...}} вызывает
+    метод DataService (или вход/регистрацию) и возвращает {"result": ...};
+    кодирование моделей и дат — codec.py. GET /health доступен без токена и
+    отвечает {"status": "ok"}, состояние пула добавляется только с токеном;
+    GET /metrics — статистика запросов в формате Prometheus.
+    """
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        token: str = None,
+        workers: int = None,
+    ):
+        self.host = host or AppConfig.API_HOST
+        self.port = port or AppConfig.API_PORT
+        self.token = token if token is not None else AppConfig.API_TOKEN
+        if not self.token and not _is_loopback(self.host):
+            # Без токена любой, кто достучится до порта, может вызывать и
+            # delete_* — так можно только на localhost
+            raise ValueError(
+                f"API_TOKEN обязателен, если сервер слушает не localhost "
+                f"({self.host})"
+            )
+        # Вызов держит не больше одного соединения пула (закреплённое за
+        # потоком, в нём же transaction()), поэтому потоков столько же,
+        # сколько соединений; больше — только ждали бы соединение
+        self.workers = min(
+            workers or AppConfig.API_WORKERS or AppConfig.DB_POOL_MAX_SIZE,
+            AppConfig.DB_POOL_MAX_SIZE,
+        )
+
+        self.db = DatabaseConnection()
+        self.data_service = DataService()
+        self.auth_service = AuthService()
+        self._methods = {
+            name: getattr(self.data_service, name) for name in DATA_METHODS
+        }
+        self._methods["authenticate"] = self._authenticate
+        for name in AUTH_METHODS - {"authenticate"}:
+            self._methods[name] = getattr(self.auth_service, name)
+
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="api")
+        self._listener = None
+
+    def _authenticate(self, login: str, password: str, source: str = None):
+        user = self.auth_service.authenticate(login, password, source)
+        # Хэш пароля клиенту не нужен
+        return replace(user, password_hash="") if user else None
+
+    def _call(self, name: str, args: list, kwargs: dict):
+        try:
+            with action(f"api.{name}"):
+                return self._methods[name](*args, **kwargs)
+        finally:
+            # Соединение не держим за потоком между запросами
+            self.db.release()
+
+    # --- HTTP ---
+
+    def _authorized(self, headers: dict) -> bool:
+        if not self.token:
+            return True
+        expected = f"Bearer {self.token}".encode()
+        return hmac.compare_digest(headers.get("authorization", "").encode(), expected)
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """(метод, путь, версия, заголовки, тело) или None, если клиент ушёл."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            return None
+
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+            raise _BadRequest("Некорректная строка запроса")
+        method, target, version = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise _BadRequest("Слишком много заголовков")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise _BadRequest("Некорректный Content-Length")
+        if length < 0 or length > MAX_BODY_SIZE:
+            raise _BadRequest("Слишком большое тело запроса")
+        body = await reader.readexactly(length) if length else b""
+        return method, target.split("?", 1)[0], version, headers, body
+
+    @staticmethod
+    def _write_response(writer, status: int, content_type: str, body: bytes, close):
+        head = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'close' if close else 'keep-alive'}",
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        source = peer[0] if peer else None
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _BadRequest as e:
+                    self._write_response(
+                        writer, 400, JSON_TYPE, _error_body("BadRequest", e), True
+                    )
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                method, path, version, headers, body = request
+                status, content_type, payload = await self._dispatch(
+                    method, path, headers, body, source
+                )
+                close = (
+                    version == "HTTP/1.0"
+                    or headers.get("connection", "").lower() == "close"
+                )
+                self._write_response(writer, status, content_type, payload, close)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(
+        self, method: str, path: str, headers: dict, body: bytes, source: str
+    ):
+        if path == "/health":
+            # Без токена — только признак жизни, состояние пула — с токеном
+            stats = {"status": "ok"}
+            if self._authorized(headers):
+                stats.update(workers=self.workers, **self.db.pool_stats())
+            return 200, JSON_TYPE, json.dumps(stats).encode()
+
+        if not self._authorized(headers):
+            return 401, JSON_TYPE, _error_body("Unauthorized", "Неверный токен API")
+
+        if path == "/metrics":
+            return 200, PROMETHEUS_TYPE, query_stats.to_prometheus().encode()
+
+        name = path[len("/rpc/") :] if path.startswith("/rpc/") else None
+        if name not in self._methods:
+            return 404, JSON_TYPE, _error_body("NotFound", f"Нет метода {path}")
+        if method != "POST":
+            return 405, JSON_TYPE, _error_body("MethodNotAllowed", "Нужен POST")
+
+        try:
+            request = loads(body) or {}
+            args = list(request.get("args", []))
+            kwargs = dict(request.get("kwargs", {}))
+        except (ValueError, TypeError, AttributeError) as e:
+            return 400, JSON_TYPE, _error_body("BadRequest", e)
+        if name == "authenticate":
+            # Источник для ограничения попыток задаёт сервер, не клиент
+            kwargs["source"] = source
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self._executor, self._call, name, args, kwargs
+            )
+            return 200, JSON_TYPE, dumps({"result": result})
+        except LoginThrottledError as e:
+            return 429, JSON_TYPE, _error_body("ValueError", e)
+        except ValueError as e:
+            return 400, JSON_TYPE, _error_body("ValueError", e)
+        except TypeError as e:
+            # Неверные аргументы метода
+            return 400, JSON_TYPE, _error_body("TypeError", e)
+        except Exception as e:
+            print(f"[ERROR] API {name}: {e}")
+            return 500, JSON_TYPE, _error_body(type(e).__name__, e)
+
+    # --- запуск ---
+
+    async def serve(self):
+        server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        if AppConfig.LIVE_UPDATES:
+            # Сбрасывает кэш сущностей при изменениях от других серверов и
+            # прямых подключений (см. listener.py)
+            self._listener = ChangeListener(lambda table, op, row_id: None)
+            self._listener.start()
+        print(
+            f"[INFO] API: http://{self.host}:{self.port} "
+            f"(потоков БД: {self.workers})"
+        )
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+        self._executor.shutdown(wait=True)
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # Имя хоста (или пустая строка — все интерфейсы)
+        return False
+
+
+def _error_body(kind: str, message) -> bytes:
+    return json.dumps(
+        {"error": {"type": kind, "message": str(message)}}, ensure_ascii=False
+    ).encode()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP/JSON API сервисного слоя")
+    parser.add_argument("--host", help=f"по умолчанию API_HOST ({AppConfig.API_HOST})")
+    parser.add_argument(
+        "--port", type=int, help=f"по умолчанию API_PORT ({AppConfig.API_PORT})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="потоков для запросов к БД (не больше DB_POOL_MAX_SIZE)",
+    )
+    args = parser.parse_args(argv)
+
+    server = None
+    try:
+        server = ApiServer(args.host, args.port, workers=args.workers)
+        asyncio.run(server.serve())
+        return 0
+    except KeyboardInterrupt:
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if server is not None:
+            server.close()
+        password_hasher.shutdown()
+        if DatabaseConnection._instance is not None:
+            DatabaseConnection().close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,12 +15,81 @@ class AppConfig:
     UI_FILE = get("UI_FILE", "main_window.ui")
 
     DB_HOST = get("DB_HOST", "localhost")
-    DB_PORT = get("DB_HOST", "5432")
+    DB_PORT = get("DB_PORT", "5432")
     DB_NAME = get("DB_NAME", "bank_db")
     DB_USER = get("DB_USER", "postgres")
     DB_PASSWORD = get("DB_PASSWORD")
 
+    DB_POOL_MIN_SIZE = int(get("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(get("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT = float(get("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_HEALTH_CHECK_INTERVAL = float(get("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+
+    # 0 в любом из параметров отключает кэш счетов и клиентов
+    ENTITY_CACHE_TTL = float(get("ENTITY_CACHE_TTL", "30"))
+    ENTITY_CACHE_MAX_SIZE = int(get("ENTITY_CACHE_MAX_SIZE", "5000"))
+
+    LIVE_UPDATES = get("LIVE_UPDATES", "1") == "1"
+
+    # Окно графика по месяцам в статистике: последние N месяцев (включая
+    # текущий); 0 — вся история. Ограничение читает меньше секций transactions
+    STATS_MONTHS = int(get("STATS_MONTHS", "0"))
+
+    # Статистика запросов (app/core/database/instrumentation.py)
+    QUERY_INSTRUMENTATION = get("QUERY_INSTRUMENTATION", "1") == "1"
+    SLOW_QUERY_MS = float(get("SLOW_QUERY_MS", "200"))
+    # Предупреждение, если одно действие UI выполнило столько запросов
+    ACTION_QUERY_WARN = int(get("ACTION_QUERY_WARN", "100"))
+    # Файл для выгрузки статистики при выходе: *.prom — Prometheus, иначе JSON
+    QUERY_STATS_DUMP = get("QUERY_STATS_DUMP")
+
+    # PREPARE/EXECUTE для запросов сервисов (statements.py); 0 — для
+    # пулеров в режиме транзакций, где сеанс не закреплён за клиентом
+    PREPARED_STATEMENTS = get("PREPARED_STATEMENTS", "1") == "1"
+    # Подготовленных операторов на соединение, лишние вытесняются
+    PREPARED_STATEMENTS_MAX = int(get("PREPARED_STATEMENTS_MAX", "200"))
+
+    # Сколько DDL миграции ждёт блокировку, прежде чем отступить и повторить
+    MIGRATION_LOCK_TIMEOUT = get("MIGRATION_LOCK_TIMEOUT", "5s")
+    MIGRATION_BATCH_SIZE = int(get("MIGRATION_BATCH_SIZE", "5000"))
+
+    # Стоимость bcrypt для новых хэшей; хэши с другой стоимостью
+    # пересчитываются при входе пользователя
+    BCRYPT_ROUNDS = int(get("BCRYPT_ROUNDS", "12"))
+    # Потоков для bcrypt; 0 — по числу ядер
+    AUTH_WORKERS = int(get("AUTH_WORKERS", "0"))
+
+    # Ограничение неудачных входов (app/core/services/login_throttle.py):
+    # после LOGIN_FREE_ATTEMPTS неудач подряд по логину (по адресу клиента
+    # API — LOGIN_SOURCE_FREE_ATTEMPTS) каждая следующая удваивает задержку
+    # от LOGIN_BACKOFF_BASE до LOGIN_BACKOFF_MAX секунд
+    LOGIN_FREE_ATTEMPTS = int(get("LOGIN_FREE_ATTEMPTS", "5"))
+    LOGIN_SOURCE_FREE_ATTEMPTS = int(get("LOGIN_SOURCE_FREE_ATTEMPTS", "20"))
+    LOGIN_BACKOFF_BASE = float(get("LOGIN_BACKOFF_BASE", "1"))
+    LOGIN_BACKOFF_MAX = float(get("LOGIN_BACKOFF_MAX", "300"))
+    # Счётчик забывается через столько секунд без неудач
+    LOGIN_FAILURE_WINDOW = float(get("LOGIN_FAILURE_WINDOW", "900"))
+    LOGIN_TRACKER_MAX_SIZE = int(get("LOGIN_TRACKER_MAX_SIZE", "10000"))
+    # Сколько секунд помнить, что логина нет в auth
+    UNKNOWN_LOGIN_CACHE_TTL = float(get("UNKNOWN_LOGIN_CACHE_TTL", "60"))
+
+    # HTTP API (app/api/server.py)
+    API_HOST = get("API_HOST", "127.0.0.1")
+    API_PORT = int(get("API_PORT", "8080"))
+    # Если задан, запросы без заголовка "Authorization: Bearer <токен>" отклоняются
+    API_TOKEN = get("API_TOKEN")
+    # Потоков для запросов к БД; 0 — по DB_POOL_MAX_SIZE
+    API_WORKERS = int(get("API_WORKERS", "0"))
+    # Адрес API у клиента включает удалённый режим: приложение не подключается
+    # к БД напрямую, а вызывает сервисы через API
+    API_URL = get("API_URL")
+    API_TIMEOUT = float(get("API_TIMEOUT", "30"))
+
     @classmethod
     def validate(cls):
-        if not all([cls.APP_NAME, cls.APP_VERSION, cls.UI_FILE, cls.DB_PASSWORD]):
+        # В удалённом режиме параметры БД нужны только серверу API
+        required = [cls.APP_NAME, cls.APP_VERSION, cls.UI_FILE]
+        if not cls.API_URL:
+            required.append(cls.DB_PASSWORD)
+        if not all(required):
             raise EnvironmentError("Missing required environment variables")
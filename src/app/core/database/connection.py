@@ -1,23 +1,52 @@
-import psycopg2
+import threading
+from contextlib import contextmanager
 from psycopg2 import OperationalError, InterfaceError
 from app.core.config import AppConfig
+from app.core.database.cursor import InstrumentedCursor
+from app.core.database.pool import ConnectionPool
+from app.core.database.statements import PreparingConnection
 from typing import Optional
 
 
+class TransactionRolledBack(Exception):
+    """Шаг единицы работы завершился ошибкой — транзакция откачена целиком."""
+
+    def __init__(self):
+        super().__init__("Транзакция откачена: один из шагов завершился ошибкой")
+
+
+class _Frame:
+    def __init__(self, conn, after_commit: list = None):
+        self.conn = conn
+        self.rollback_only = False
+        # Общий для всех уровней одной транзакции
+        self.after_commit = after_commit if after_commit is not None else []
+
+
 class DatabaseConnection:
+    """Точка доступа к пулу соединений.
+
+    Объект общий для всех сервисов, но соединение у каждого потока своё:
+    `connection` и `get_cursor()` работают с соединением, закреплённым за
+    текущим потоком. Вне `transaction()` оно в autocommit: чтения не
+    оставляют соединение «idle in transaction» с блокировками, мешающими
+    DDL (секции, миграции). `transaction()` открывает транзакцию на том же
+    соединении, так что поток занимает не больше одного слота пула.
+    """
+
     _instance: Optional["DatabaseConnection"] = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            try:
-                cls._instance._connect()
-            except Exception as e:
-                cls._instance = None
-                raise
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_pool()
+                    cls._instance = instance
         return cls._instance
 
-    def _connect(self):
+    def _init_pool(self):
         conn_params = {
             "host": AppConfig.get("DB_HOST"),
             "port": AppConfig.get("DB_PORT"),
@@ -28,39 +57,189 @@ class DatabaseConnection:
         }
 
         conn_params = {k: v for k, v in conn_params.items() if v is not None}
+        conn_params["cursor_factory"] = InstrumentedCursor
+        conn_params["connection_factory"] = PreparingConnection
+        # Нужны и вне пула: долгоживущее соединение LISTEN (см. listener.py)
+        self.conn_params = conn_params
 
+        self._local = threading.local()
         try:
-            self.connection = psycopg2.connect(**conn_params)
-            self.connection.autocommit = False
+            self._pool = ConnectionPool(
+                conn_params,
+                min_size=AppConfig.DB_POOL_MIN_SIZE,
+                max_size=AppConfig.DB_POOL_MAX_SIZE,
+                timeout=AppConfig.DB_POOL_TIMEOUT,
+                health_check_interval=AppConfig.DB_POOL_HEALTH_CHECK_INTERVAL,
+            )
             print("✅ Connection to DB sucess")
         except OperationalError as e:
             print(f"❌ Error of connection to DB: {e}")
             raise
 
+    def _transaction_stack(self) -> list:
+        stack = getattr(self._local, "transactions", None)
+        if stack is None:
+            stack = self._local.transactions = []
+        return stack
+
+    @property
+    def connection(self):
+        stack = self._transaction_stack()
+        if stack:
+            return stack[-1].conn
+
+        conn = getattr(self._local, "connection", None)
+        if conn is None or conn.closed:
+            if conn is not None:
+                self._pool.putconn(conn, close=True)
+            conn = self._local.connection = self._pool.getconn()
+            conn.autocommit = True
+        return conn
+
     def get_cursor(self):
         try:
-            if not hasattr(self, "connection") or self.connection.closed:
-                self._connect()
             return self.connection.cursor()
         except InterfaceError:
-            self._connect()
+            if self._transaction_stack():
+                raise
+            self.release(discard=True)
             return self.connection.cursor()
 
-    def close(self):
-        if hasattr(self, "connection") and not self.connection.closed:
-            self.connection.close()
-            print("🔌 Connection to DB closed")
+    def release(self, discard: bool = False):
+        """Возвращает закреплённое за текущим потоком соединение в пул."""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            self._local.connection = None
+            if not (discard or conn.closed):
+                try:
+                    # В пуле соединения без autocommit (см. checkout())
+                    conn.autocommit = False
+                except Exception:
+                    discard = True
+            self._pool.putconn(conn, close=discard)
+
+    @contextmanager
+    def transaction(self, savepoint: bool = True):
+        """Единица работы: изменения всех шагов фиксируются одним COMMIT.
 
-    def __del__(self):
-        self.close()
+        Внешний вызов открывает транзакцию на закреплённом за потоком
+        соединении и фиксирует её на выходе. Вложенный работает в той же транзакции:
+        по умолчанию через SAVEPOINT — его ошибка откатывает только его
+        изменения. С savepoint=False шаг просто участвует в охватывающей
+        области (без лишних обращений к серверу); его ошибка помечает эту
+        область к откату, и на выходе она откатывается с
+        TransactionRolledBack, даже если вызывающий код ошибку поглотил.
+        Так работают пишущие методы сервисов.
+        """
+        stack = self._transaction_stack()
+        if not stack:
+            scope = self._outer_transaction(stack)
+        elif savepoint:
+            scope = self._savepoint(stack)
+        else:
+            scope = self._joined(stack[-1])
+        with scope as conn:
+            yield conn
+
+    @contextmanager
+    def _outer_transaction(self, stack: list):
+        conn = self.connection
+        conn.autocommit = False
+        frame = _Frame(conn)
+        stack.append(frame)
+        try:
+            yield conn
+            if frame.rollback_only:
+                raise TransactionRolledBack()
+            conn.commit()
+        except BaseException:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            stack.pop()
+            if not conn.closed:
+                try:
+                    conn.autocommit = True
+                except Exception:
+                    # Соединение в неизвестном состоянии — следующий вызов
+                    # возьмёт из пула новое
+                    self.release(discard=True)
+
+        for callback in frame.after_commit:
+            callback()
+
+    @contextmanager
+    def _savepoint(self, stack: list):
+        parent = stack[-1]
+        name = f"uow_{len(stack)}"
+        frame = _Frame(parent.conn, parent.after_commit)
+        with parent.conn.cursor() as cursor:
+            cursor.execute(f"SAVEPOINT {name}")
+        stack.append(frame)
+        try:
+            yield frame.conn
+            if frame.rollback_only:
+                raise TransactionRolledBack()
+        except BaseException:
+            if not frame.conn.closed:
+                with frame.conn.cursor() as cursor:
+                    cursor.execute(
+                        f"ROLLBACK TO SAVEPOINT {name}; RELEASE SAVEPOINT {name}"
+                    )
+            raise
+        else:
+            with frame.conn.cursor() as cursor:
+                cursor.execute(f"RELEASE SAVEPOINT {name}")
+        finally:
+            stack.pop()
+
+    @contextmanager
+    def _joined(self, frame: "_Frame"):
+        try:
+            yield frame.conn
+        except BaseException:
+            frame.rollback_only = True
+            raise
+
+    def after_commit(self, callback):
+        """callback() после фиксации текущей единицы работы (сразу, если
+        её нет). Сброс кэша раньше COMMIT позволил бы параллельному чтению
+        снова закэшировать старые значения."""
+        stack = self._transaction_stack()
+        if stack:
+            stack[0].after_commit.append(callback)
+        else:
+            callback()
+
+    @contextmanager
+    def checkout(self):
+        """Соединение из пула, не привязанное к потоку (для серверных курсоров).
+
+        Изменения не фиксируются: при возврате в пул выполняется откат.
+        """
+        conn = self._pool.getconn()
+        try:
+            yield conn
+        finally:
+            self._pool.putconn(conn)
+
+    def pool_stats(self) -> dict:
+        return self._pool.stats()
+
+    def close(self):
+        self.release()
+        self._pool.closeall()
+        print("🔌 Connection to DB closed")
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
-        if exc_type is not None:
-            self.connection.rollback()
-        else:
-            self.connection.commit()
-        self.close()
+        conn = getattr(self._local, "connection", None)
+        if conn is not None and not conn.closed:
+            if exc_type is not None:
+                conn.rollback()
+            else:
+                conn.commit()
+        self.release()
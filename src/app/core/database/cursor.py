@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+
+from psycopg2 import ProgrammingError, extensions, sql
+from app.core.config import AppConfig
+from app.core.database.instrumentation import query_stats
+from app.core.database.statements import statement_registry
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def round_trips() -> int:
+    """Число запросов к серверу, отправленных из текущего потока."""
+    return getattr(_local, "count", 0)
+
+
+def _count(n: int = 1):
+    _local.count = getattr(_local, "count", 0) + n
+
+
+class InstrumentedCursor(extensions.cursor):
+    """Курсор, считающий обращения к серверу и время запросов.
+
+    Учитываются execute, executemany (по одному обращению на набор
+    параметров), callproc и COPY; догрузка строк серверного курсора при
+    итерации не учитывается. Статистика по отпечаткам запросов, медленные
+    запросы и действия UI — см. instrumentation.py; при
+    QUERY_INSTRUMENTATION=0 остаётся только счётчик обращений.
+    """
+
+    def _timed(self, query, calls, run, prepared: bool = False):
+        _count(calls)
+        if not AppConfig.QUERY_INSTRUMENTATION:
+            return run()
+
+        started = time.perf_counter()
+        error = False
+        try:
+            return run()
+        except Exception:
+            error = True
+            raise
+        finally:
+            if isinstance(query, sql.Composable):
+                query = query.as_string(self.connection)
+            elif isinstance(query, bytes):
+                query = query.decode(errors="replace")
+            query_stats.record(
+                query,
+                time.perf_counter() - started,
+                self.rowcount,
+                error=error,
+                calls=calls,
+                prepared=prepared,
+            )
+
+    def execute(self, query, vars=None):
+        return self._timed(
+            query, 1, lambda: super(InstrumentedCursor, self).execute(query, vars)
+        )
+
+    def execute_prepared(self, query, vars=None):
+        """execute() через PREPARE/EXECUTE: на каждом соединении запрос
+        разбирается один раз, дальше сервер повторно использует разбор (и
+        план, если выберет общий). В статистике вызовы учитываются под
+        исходным текстом запроса. Без PreparingConnection или при
+        PREPARED_STATEMENTS=0 — обычный execute().
+        """
+        statement = self._prepared_statement(query)
+        if statement is None:
+            return self.execute(query, vars)
+        return self._timed(
+            query,
+            1,
+            lambda: super(InstrumentedCursor, self).execute(
+                statement.execute_sql, vars
+            ),
+            prepared=True,
+        )
+
+    def _prepared_statement(self, query):
+        prepared = getattr(self.connection, "prepared", None)
+        if prepared is None or not AppConfig.PREPARED_STATEMENTS:
+            return None
+        statement = statement_registry.get(query)
+        if statement is None or not statement.preparable:
+            return None
+        if statement.name in prepared:
+            prepared.move_to_end(statement.name)
+            return statement
+        return statement if self._prepare(statement, prepared) else None
+
+    def _prepare(self, statement, prepared) -> bool:
+        conn = self.connection
+        idle = conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+        _count()
+        started = time.perf_counter()
+        try:
+            super().execute(statement.prepare_sql)
+        except ProgrammingError as e:
+            # Сервер не вывел типы параметров и т.п. — запрос остаётся обычным
+            statement.preparable = False
+            logger.warning("Запрос не подготовлен (%s): %s", e, statement.sql[:200])
+            if not idle:
+                raise
+            # PREPARE открыл транзакцию и прервал её — до него транзакции не
+            # было, откатывать больше нечего
+            conn.rollback()
+            return False
+        query_stats.record_prepare(statement.sql, time.perf_counter() - started)
+
+        prepared[statement.name] = True
+        while len(prepared) > AppConfig.PREPARED_STATEMENTS_MAX:
+            name, _ = prepared.popitem(last=False)
+            _count()
+            super().execute(f"DEALLOCATE {name}")
+        return True
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        return self._timed(
+            query,
+            len(vars_list),
+            lambda: super(InstrumentedCursor, self).executemany(query, vars_list),
+        )
+
+    def callproc(self, procname, parameters=None):
+        return self._timed(
+            f"CALL {procname}",
+            1,
+            lambda: super(InstrumentedCursor, self).callproc(procname, parameters),
+        )
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(
+            sql, 1, lambda: super(InstrumentedCursor, self).copy_expert(sql, file, size)
+        )
+
+    def copy_from(self, file, table, *args, **kwargs):
+        return self._timed(
+            f"COPY {table} FROM STDIN",
+            1,
+            lambda: super(InstrumentedCursor, self).copy_from(
+                file, table, *args, **kwargs
+            ),
+        )
+
+    def copy_to(self, file, table, *args, **kwargs):
+        return self._timed(
+            f"COPY {table} TO STDOUT",
+            1,
+            lambda: super(InstrumentedCursor, self).copy_to(
+                file, table, *args, **kwargs
+            ),
+        )
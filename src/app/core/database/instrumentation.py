@@ -0,0 +1,312 @@
+import atexit
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from app.core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+
+# Модули, кадры которых пропускаются при поиске вызывающего кода
+_SKIP_MODULES = (
+    "app.core.database.cursor",
+    "app.core.database.instrumentation",
+    "app.core.database.connection",
+    "psycopg2",
+    "contextlib",
+)
+
+MAX_CALLERS_PER_QUERY = 5
+
+# Кэш отпечатков: размер и самый длинный кэшируемый текст. Запросы
+# execute_values несут значения в тексте — каждый уникален, и кэш заполнился
+# бы ими, удерживая в памяти мегабайты текста
+FINGERPRINT_CACHE_SIZE = 10000
+FINGERPRINT_CACHE_MAX_QUERY = 4096
+
+# (метрика, тип, описание, поле статистики) для to_prometheus()
+_QUERY_METRICS = (
+    ("query_calls_total", "counter", "Query executions", "calls"),
+    ("query_seconds_total", "counter", "Time spent in queries", "total_time"),
+    ("query_max_seconds", "gauge", "Slowest single execution", "max_time"),
+    ("query_rows_total", "counter", "Rows returned or affected", "rows"),
+    ("query_errors_total", "counter", "Failed executions", "errors"),
+    (
+        "query_prepared_calls_total",
+        "counter",
+        "Executions of a prepared statement",
+        "prepared_calls",
+    ),
+    ("query_prepares_total", "counter", "PREPARE round trips", "prepares"),
+    (
+        "query_prepare_saved_seconds",
+        "gauge",
+        "Estimated parse time saved by prepared statements",
+        "prepare_saved_time",
+    ),
+)
+_ACTION_METRICS = (
+    ("action_runs_total", "counter", "UI action runs", "invocations"),
+    ("action_queries_total", "counter", "Queries issued by UI actions", "queries"),
+    ("action_max_queries", "gauge", "Most queries in a single run", "max_queries"),
+    ("action_db_seconds_total", "counter", "Query time of UI actions", "db_time"),
+)
+
+
+def fingerprint(query: str) -> str:
+    """Текст запроса без литералов и лишних пробелов — один ключ для всех
+    вызовов с разными параметрами."""
+    text = _WHITESPACE_RE.sub(" ", query).strip()
+    text = _STRING_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    return _IN_LIST_RE.sub("(...)", text)
+
+
+def _caller() -> str:
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_SKIP_MODULES):
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryStats:
+    """Накопленная статистика запросов по отпечаткам и действиям UI.
+
+    Запись идёт из InstrumentedCursor; действия (action()) — это загрузчики
+    AsyncLoader по ключу задачи или явные обёртки обработчиков в GUI.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries = {}  # отпечаток -> dict
+        self._actions = {}  # имя -> dict
+        self._fingerprints = {}  # текст запроса -> отпечаток (кэш)
+        self._local = threading.local()
+
+    # --- запросы ---
+
+    def _fingerprint(self, query: str) -> str:
+        if len(query) > FINGERPRINT_CACHE_MAX_QUERY:
+            return fingerprint(query)
+        result = self._fingerprints.get(query)
+        if result is None:
+            result = fingerprint(query)
+            if len(self._fingerprints) < FINGERPRINT_CACHE_SIZE:
+                self._fingerprints[query] = result
+        return result
+
+    def _entry(self, key: str) -> dict:
+        entry = self._queries.get(key)
+        if entry is None:
+            entry = self._queries[key] = {
+                "id": hashlib.md5(key.encode()).hexdigest()[:12],
+                "query": key,
+                "calls": 0,
+                "errors": 0,
+                "rows": 0,
+                "total_time": 0.0,
+                "max_time": 0.0,
+                "prepared_calls": 0,
+                "prepares": 0,
+                "prepare_time": 0.0,
+                "callers": {},
+            }
+        return entry
+
+    def record(
+        self,
+        query: str,
+        duration: float,
+        rows: int,
+        error: bool = False,
+        calls: int = 1,
+        prepared: bool = False,
+    ):
+        key = self._fingerprint(query)
+        caller = _caller()
+        with self._lock:
+            entry = self._entry(key)
+            entry["calls"] += calls
+            if prepared:
+                entry["prepared_calls"] += calls
+            entry["total_time"] += duration
+            entry["max_time"] = max(entry["max_time"], duration)
+            if rows > 0:
+                entry["rows"] += rows
+            if error:
+                entry["errors"] += 1
+            callers = entry["callers"]
+            if caller in callers or len(callers) < MAX_CALLERS_PER_QUERY:
+                callers[caller] = callers.get(caller, 0) + 1
+
+        for frame in self._action_stack():
+            frame["queries"] += calls
+            frame["db_time"] += duration
+
+        if duration * 1000 >= AppConfig.SLOW_QUERY_MS:
+            logger.warning(
+                "Медленный запрос %.0f ms (%s, строк: %s, действие: %s): %s",
+                duration * 1000,
+                caller,
+                rows,
+                self.current_action() or "-",
+                key[:500],
+            )
+
+    def record_prepare(self, query: str, duration: float):
+        """PREPARE запроса на очередном соединении (statements.py)."""
+        key = self._fingerprint(query)
+        with self._lock:
+            entry = self._entry(key)
+            entry["prepares"] += 1
+            entry["prepare_time"] += duration
+        for frame in self._action_stack():
+            frame["queries"] += 1
+            frame["db_time"] += duration
+
+    # --- действия ---
+
+    def _action_stack(self) -> list:
+        stack = getattr(self._local, "actions", None)
+        if stack is None:
+            stack = self._local.actions = []
+        return stack
+
+    def current_action(self) -> Optional[str]:
+        stack = self._action_stack()
+        return stack[-1]["name"] if stack else None
+
+    @contextmanager
+    def action(self, name: str):
+        frame = {"name": name, "queries": 0, "db_time": 0.0}
+        stack = self._action_stack()
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stack.pop()
+            self._record_action(frame, time.perf_counter() - started)
+
+    def _record_action(self, frame: dict, elapsed: float):
+        name = frame["name"]
+        with self._lock:
+            entry = self._actions.get(name)
+            if entry is None:
+                entry = self._actions[name] = {
+                    "action": name,
+                    "invocations": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_time": 0.0,
+                    "total_time": 0.0,
+                }
+            entry["invocations"] += 1
+            entry["queries"] += frame["queries"]
+            entry["max_queries"] = max(entry["max_queries"], frame["queries"])
+            entry["db_time"] += frame["db_time"]
+            entry["total_time"] += elapsed
+
+        if frame["queries"] >= AppConfig.ACTION_QUERY_WARN:
+            logger.warning(
+                "Действие «%s» выполнило %s запросов за %.0f ms",
+                name,
+                frame["queries"],
+                elapsed * 1000,
+            )
+
+    # --- выгрузка ---
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            queries = [
+                dict(q, callers=dict(q["callers"])) for q in self._queries.values()
+            ]
+            actions = [dict(a) for a in self._actions.values()]
+        for q in queries:
+            # Оценка снизу: повторное выполнение экономит разбор и анализ
+            # (время PREPARE), а при общем плане — ещё и планирование
+            reused = q["prepared_calls"] - q["prepares"]
+            q["prepare_saved_time"] = (
+                reused * q["prepare_time"] / q["prepares"]
+                if q["prepares"] and reused > 0
+                else 0.0
+            )
+        queries.sort(key=lambda q: q["total_time"], reverse=True)
+        actions.sort(key=lambda a: a["queries"], reverse=True)
+        return {"queries": queries, "actions": actions}
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._actions.clear()
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        data = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape_label(str(val))}"' for key, val in labels.items()
+                )
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        def per_query(field):
+            return [
+                ({"query_id": q["id"], "query": q["query"][:200]}, q[field])
+                for q in data["queries"]
+            ]
+
+        def per_action(field):
+            return [({"action": a["action"]}, a[field]) for a in data["actions"]]
+
+        for name, kind, help_text, field in _QUERY_METRICS:
+            metric(f"bank_db_{name}", kind, help_text, per_query(field))
+        for name, kind, help_text, field in _ACTION_METRICS:
+            metric(f"bank_db_{name}", kind, help_text, per_action(field))
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """.prom — текстовый формат Prometheus, иначе JSON."""
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+query_stats = QueryStats()
+
+
+def action(name: str):
+    """Относит запросы текущего потока внутри блока к действию name."""
+    return query_stats.action(name)
+
+
+def current_action() -> Optional[str]:
+    return query_stats.current_action()
+
+
+if AppConfig.QUERY_STATS_DUMP:
+    atexit.register(query_stats.dump, AppConfig.QUERY_STATS_DUMP)
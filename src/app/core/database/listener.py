@@ -0,0 +1,113 @@
+import json
+import select
+import threading
+
+import psycopg2
+from app.core.database.connection import DatabaseConnection
+from app.core.services.cache import invalidate_row, invalidate_all
+
+CHANGES_CHANNEL = "bank_changes"
+NOTIFY_TRIGGERS = (
+    "clients_notify_change",
+    "accounts_notify_change",
+    "transactions_notify_change",
+)
+
+
+class ChangeListener(threading.Thread):
+    """Слушает уведомления об изменении строк (deploy/migrations/0002).
+
+    Работает в отдельном потоке на собственном соединении вне пула. На каждое
+    уведомление сбрасывает кэш сущностей и вызывает on_change(table, op, id).
+    После восстановления соединения вызывается on_resync(): события за время
+    разрыва потеряны, и данные нужно перечитать целиком.
+    """
+
+    POLL_INTERVAL = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self, on_change, on_resync=None):
+        super().__init__(name="db-change-listener", daemon=True)
+        self.on_change = on_change
+        self.on_resync = on_resync
+        self._stop_event = threading.Event()
+        self._active = False
+        self._conn = None
+
+    @property
+    def active(self) -> bool:
+        """True, пока соединение слушает канал и триггеры установлены."""
+        return self._active
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        delay = 1.0
+        connected_before = False
+        while not self._stop_event.is_set():
+            try:
+                if not self._connect():
+                    return
+                if connected_before:
+                    invalidate_all()
+                    if self.on_resync:
+                        self.on_resync()
+                connected_before = True
+                delay = 1.0
+                self._listen()
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                print(f"[ERROR] Потеряно соединение для уведомлений: {e}")
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+            finally:
+                self._active = False
+                self._close()
+
+    def _connect(self) -> bool:
+        self._conn = psycopg2.connect(**DatabaseConnection().conn_params)
+        self._conn.autocommit = True
+        with self._conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_trigger WHERE tgname = ANY(%s)",
+                (list(NOTIFY_TRIGGERS),),
+            )
+            if cursor.fetchone()[0] < len(NOTIFY_TRIGGERS):
+                print(
+                    "[INFO] Триггеры уведомлений не установлены "
+                    "(deploy/migrations/0002), живое обновление отключено"
+                )
+                return False
+            cursor.execute(f"LISTEN {CHANGES_CHANNEL}")
+        self._active = True
+        return True
+
+    def _listen(self):
+        conn = self._conn
+        while not self._stop_event.is_set():
+            if select.select([conn], [], [], self.POLL_INTERVAL) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                self._dispatch(conn.notifies.pop(0).payload)
+
+    def _dispatch(self, payload: str):
+        try:
+            event = json.loads(payload)
+            table, op, row_id = event["table"], event["op"], int(event["id"])
+        except (ValueError, KeyError, TypeError):
+            print(f"[ERROR] Некорректное уведомление: {payload}")
+            return
+
+        invalidate_row(table, row_id)
+        self.on_change(table, op, row_id)
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.closed:
+            try:
+                conn.close()
+            except Exception:
+                pass
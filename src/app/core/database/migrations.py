@@ -0,0 +1,564 @@
+import argparse
+import hashlib
+import importlib.util
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import psycopg2
+from psycopg2 import errors, sql
+from app.core.config import AppConfig
+from app.core.database.connection import DatabaseConnection
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[3] / "deploy" / "migrations"
+
+# Первая строка SQL-файла: выполнять по одному оператору вне транзакции
+# (нужно для CREATE INDEX CONCURRENTLY)
+NO_TRANSACTION_DIRECTIVE = "-- migrate: no-transaction"
+
+_FILE_RE = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+_DOLLAR_TAG_RE = re.compile(r"\$[A-Za-z_]*\$")
+_CONCURRENT_INDEX_RE = re.compile(
+    r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE,
+)
+
+# Не даёт двум экземплярам мигратора работать одновременно
+_ADVISORY_LOCK_ID = 7_201_605
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+    @property
+    def is_python(self) -> bool:
+        return self.path.suffix == ".py"
+
+    @property
+    def transactional(self) -> bool:
+        if self.is_python:
+            return getattr(self.load_module(), "TRANSACTIONAL", True)
+        with self.path.open(encoding="utf-8") as f:
+            return f.readline().strip() != NO_TRANSACTION_DIRECTIVE
+
+    def load_module(self):
+        spec = importlib.util.spec_from_file_location(
+            f"migration_{self.version:04d}", self.path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def __str__(self):
+        return f"{self.version:04d}_{self.name}"
+
+
+class MigrationContext:
+    """То, что получает upgrade(ctx) в Python-миграции."""
+
+    def __init__(self, runner: "MigrationRunner", conn, transactional: bool):
+        self.runner = runner
+        self.conn = conn
+        self.transactional = transactional
+
+    def execute(self, query, params=None):
+        if self.transactional:
+            with self.conn.cursor() as cursor:
+                cursor.execute(query, params)
+        else:
+            self.runner._execute_with_retry(self.conn, query, params)
+
+    def backfill(
+        self,
+        table: str,
+        assignments: str,
+        where: str = "TRUE",
+        params: tuple = (),
+        key: str = "id",
+        batch_size: int = None,
+        pause: float = 0.0,
+    ) -> int:
+        """UPDATE table SET assignments WHERE where — пачками по диапазонам key.
+
+        Каждая пачка фиксируется отдельно: блокировки строк держатся недолго,
+        а прерванное заполнение можно продолжить повторным запуском (условие
+        where должно отсекать уже обработанные строки). Доступно только в
+        миграциях с TRANSACTIONAL = False.
+        """
+        if self.transactional:
+            raise RuntimeError("backfill() требует TRANSACTIONAL = False")
+
+        batch_size = batch_size or AppConfig.MIGRATION_BATCH_SIZE
+        table_id = sql.Identifier(table)
+        key_id = sql.Identifier(key)
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                sql.SQL("SELECT min({key}), max({key}) FROM {table}").format(
+                    key=key_id, table=table_id
+                )
+            )
+            low, high = cursor.fetchone()
+        if low is None:
+            return 0
+
+        update = sql.SQL(
+            "UPDATE {table} SET {assignments} "
+            "WHERE {key} >= %s AND {key} < %s AND ({where})"
+        ).format(
+            table=table_id,
+            assignments=sql.SQL(assignments),
+            key=key_id,
+            where=sql.SQL(where),
+        )
+
+        updated = 0
+        for start in range(low, high + 1, batch_size):
+            rowcount = self.runner._execute_with_retry(
+                self.conn, update, (start, start + batch_size, *params)
+            )
+            updated += rowcount
+            if pause:
+                time.sleep(pause)
+        print(f"[INFO] {table}: обновлено строк: {updated}")
+        return updated
+
+    def create_partitioned_index(self, name: str, table: str, definition: str):
+        """Индекс секционированной таблицы без блокировки записи.
+
+        CREATE INDEX на секционированной таблице держит SHARE-блокировку всех
+        секций, пока индекс строится, а CONCURRENTLY для неё не поддерживается.
+        Поэтому индекс создаётся пустым (ON ONLY), на каждой секции строится
+        CREATE INDEX CONCURRENTLY и присоединяется ALTER INDEX ... ATTACH
+        PARTITION; с последней секцией индекс становится действительным.
+        definition — всё после имени таблицы, например "(col DESC, id DESC)".
+        Повторный запуск продолжает с секций, где индекса ещё нет. Доступно
+        только в миграциях с TRANSACTIONAL = False.
+        """
+        if self.transactional:
+            raise RuntimeError(
+                "create_partitioned_index() требует TRANSACTIONAL = False"
+            )
+
+        self.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {definition}"
+        )
+        with self.conn.cursor() as cursor:
+            # Секции, к которым индекс ещё не присоединён
+            cursor.execute(
+                """
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(%s)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM pg_inherits ii
+                      JOIN pg_index x ON x.indexrelid = ii.inhrelid
+                      WHERE ii.inhparent = to_regclass(%s) AND x.indrelid = c.oid
+                  )
+                ORDER BY c.relname
+                """,
+                (table, name),
+            )
+            partitions = [row[0] for row in cursor.fetchall()]
+
+        for partition in partitions:
+            suffix = partition.removeprefix(f"{table}_")
+            child = f"{name}_{suffix}"[:63]
+            self.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} "
+                f"ON {partition} {definition}"
+            )
+            self.execute(f"ALTER INDEX {name} ATTACH PARTITION {child}")
+        # Недостроенный индекс не даст записать миграцию (см. _apply)
+        self.runner._concurrent_indexes.add(name)
+
+
+class MigrationRunner:
+    """Применяет deploy/migrations по порядку и ведёт таблицу schema_version.
+
+    SQL-файл по умолчанию выполняется целиком в одной транзакции. Файл с
+    первой строкой `-- migrate: no-transaction` выполняется по одному
+    оператору в autocommit — так работают CREATE INDEX CONCURRENTLY и
+    долгие пакетные заполнения. Такой файл должен быть идемпотентным
+    (IF NOT EXISTS и т.п.): при сбое он выполняется заново целиком.
+
+    Python-миграция (NNNN_name.py) определяет upgrade(ctx) и, при
+    необходимости, TRANSACTIONAL = False; см. MigrationContext.
+
+    На все операторы действует lock_timeout: DDL, не дождавшийся блокировки,
+    не выстраивает за собой очередь из запросов приложения, а повторяется
+    через паузу.
+    """
+
+    LOCK_RETRIES = 5
+    LOCK_RETRY_DELAY = 2.0
+
+    def __init__(self, directory: Path = MIGRATIONS_DIR, conn_params: dict = None):
+        self.directory = Path(directory)
+        self.conn_params = conn_params or DatabaseConnection().conn_params
+        self.lock_timeout = AppConfig.MIGRATION_LOCK_TIMEOUT
+        # Индексы, которые строит текущая миграция вне транзакции
+        self._concurrent_indexes = set()
+
+    def discover(self) -> List[Migration]:
+        migrations = []
+        for path in sorted(self.directory.iterdir()):
+            match = _FILE_RE.match(path.name)
+            if match:
+                migrations.append(Migration(int(match.group(1)), match.group(2), path))
+
+        versions = [m.version for m in migrations]
+        duplicates = {v for v in versions if versions.count(v) > 1}
+        if duplicates:
+            raise ValueError(f"Повторяющиеся номера миграций: {sorted(duplicates)}")
+        return migrations
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.conn_params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("SET lock_timeout = %s", (self.lock_timeout,))
+            cursor.execute("SET statement_timeout = 0")
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    checksum TEXT,
+                    applied_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    execution_ms INTEGER
+                )
+                """
+            )
+        return conn
+
+    def _applied(self, conn) -> dict:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT version, name, checksum, applied_at FROM schema_version")
+            return {row[0]: row[1:] for row in cursor.fetchall()}
+
+    def _record(self, cursor, migration: Migration, execution_ms: Optional[int]):
+        cursor.execute(
+            """
+            INSERT INTO schema_version (version, name, checksum, execution_ms)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (version) DO UPDATE
+            SET name = EXCLUDED.name, checksum = EXCLUDED.checksum,
+                applied_at = NOW(), execution_ms = EXCLUDED.execution_ms
+            """,
+            (migration.version, migration.name, migration.checksum, execution_ms),
+        )
+
+    def _execute_with_retry(self, conn, query, params=None) -> int:
+        match = _CONCURRENT_INDEX_RE.match(query) if isinstance(query, str) else None
+        index = match.group(1) if match else None
+        if index:
+            self._concurrent_indexes.add(index)
+        for attempt in range(1, self.LOCK_RETRIES + 1):
+            try:
+                if index:
+                    # Прерванный CONCURRENTLY оставляет INVALID-индекс с тем же
+                    # именем, и повтор с IF NOT EXISTS его бы просто пропустил
+                    self._drop_invalid_index(conn, index)
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.rowcount
+            except errors.LockNotAvailable:
+                if attempt == self.LOCK_RETRIES:
+                    raise
+                print(
+                    f"[INFO] Блокировка не получена за {self.lock_timeout}, "
+                    f"повтор {attempt}/{self.LOCK_RETRIES - 1}"
+                )
+                time.sleep(self.LOCK_RETRY_DELAY * attempt)
+
+    def status(self) -> List[dict]:
+        conn = self._connect()
+        try:
+            applied = self._applied(conn)
+            invalid = self._invalid_indexes(conn)
+        finally:
+            conn.close()
+
+        result = []
+        for migration in self.discover():
+            record = applied.get(migration.version)
+            if record is None:
+                state = "pending"
+            elif record[1] and record[1] != migration.checksum:
+                state = "changed"
+            else:
+                state = "applied"
+            result.append(
+                {
+                    "migration": str(migration),
+                    "state": state,
+                    "applied_at": record[2] if record else None,
+                    "transactional": migration.transactional,
+                }
+            )
+        if invalid:
+            print(
+                "[INFO] Недостроенные индексы (прерванный CONCURRENTLY), "
+                "migrate пересоздаст их: " + ", ".join(invalid)
+            )
+        return result
+
+    def migrate(self, target: int = None, dry_run: bool = False) -> List[Migration]:
+        conn = self._connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (_ADVISORY_LOCK_ID,))
+                if not cursor.fetchone()[0]:
+                    raise RuntimeError("Миграции уже выполняются другим процессом")
+
+            applied = self._applied(conn)
+            pending = [
+                m
+                for m in self.discover()
+                if m.version not in applied and (target is None or m.version <= target)
+            ]
+            for migration in self.discover():
+                record = applied.get(migration.version)
+                if record and record[1] and record[1] != migration.checksum:
+                    print(f"[INFO] Файл {migration} изменён после применения")
+
+            done = []
+            for migration in pending:
+                mode = "" if migration.transactional else " (вне транзакции)"
+                if dry_run:
+                    print(f"Будет применена: {migration}{mode}")
+                    continue
+                print(f"[INFO] Применение {migration}{mode}")
+                started = time.monotonic()
+                try:
+                    self._apply(conn, migration)
+                except Exception:
+                    invalid = self._invalid_indexes(conn)
+                    if invalid:
+                        print(
+                            "[INFO] Остались недостроенные индексы: "
+                            + ", ".join(invalid)
+                        )
+                    raise
+                print(f"✅ {migration}: {time.monotonic() - started:.1f} s")
+                done.append(migration)
+            return done
+        finally:
+            conn.close()
+
+    def _apply(self, conn, migration: Migration):
+        if migration.transactional:
+            self._apply_in_transaction(conn, migration)
+            return
+
+        started = time.monotonic()
+        self._concurrent_indexes = set()
+        if migration.is_python:
+            migration.load_module().upgrade(MigrationContext(self, conn, False))
+        else:
+            for statement in split_statements(migration.path.read_text(encoding="utf-8")):
+                self._execute_with_retry(conn, statement)
+        invalid = self._concurrent_indexes & set(self._invalid_indexes(conn))
+        if invalid:
+            raise RuntimeError(
+                f"{migration}: индексы не достроены (INVALID): "
+                + ", ".join(sorted(invalid))
+            )
+        with conn.cursor() as cursor:
+            self._record(cursor, migration, _elapsed_ms(started))
+
+    def _apply_in_transaction(self, conn, migration: Migration):
+        # Откат освобождает все блокировки, поэтому повторяется вся миграция
+        for attempt in range(1, self.LOCK_RETRIES + 1):
+            started = time.monotonic()
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cursor:
+                    if migration.is_python:
+                        migration.load_module().upgrade(
+                            MigrationContext(self, conn, True)
+                        )
+                    else:
+                        cursor.execute(migration.path.read_text(encoding="utf-8"))
+                    self._record(cursor, migration, _elapsed_ms(started))
+                conn.commit()
+                return
+            except errors.LockNotAvailable:
+                conn.rollback()
+                if attempt == self.LOCK_RETRIES:
+                    raise
+                print(
+                    f"[INFO] Блокировка не получена за {self.lock_timeout}, "
+                    f"повтор {attempt}/{self.LOCK_RETRIES - 1}"
+                )
+                time.sleep(self.LOCK_RETRY_DELAY * attempt)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.autocommit = True
+
+    def baseline(self, version: int) -> List[Migration]:
+        """Отмечает миграции до version применёнными, не выполняя их
+        (база, обновлённая вручную через psql)."""
+        conn = self._connect()
+        try:
+            applied = self._applied(conn)
+            marked = [
+                m
+                for m in self.discover()
+                if m.version <= version and m.version not in applied
+            ]
+            with conn.cursor() as cursor:
+                for migration in marked:
+                    self._record(cursor, migration, None)
+            return marked
+        finally:
+            conn.close()
+
+    def _drop_invalid_index(self, conn, name: str):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1 FROM pg_index
+                WHERE indexrelid = to_regclass(%s) AND NOT indisvalid
+                """,
+                (name,),
+            )
+            if cursor.fetchone() is None:
+                return
+            print(f"[INFO] Удаление недостроенного индекса {name}")
+            cursor.execute(
+                sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(
+                    sql.Identifier(name)
+                )
+            )
+
+    def _invalid_indexes(self, conn) -> List[str]:
+        if conn.closed:
+            return []
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.relname FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE NOT i.indisvalid AND n.nspname = current_schema()
+                """
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.monotonic() - started) * 1000)
+
+
+def split_statements(script: str) -> List[str]:
+    """Делит SQL-скрипт на операторы по `;` вне строк, комментариев и
+    $$-тел функций."""
+    statements = []
+    current = []
+    i = 0
+    length = len(script)
+    while i < length:
+        char = script[i]
+        if script.startswith("--", i):
+            end = script.find("\n", i)
+            end = length if end == -1 else end
+            i = end
+            continue
+        if script.startswith("/*", i):
+            end = script.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+            continue
+        if char in ("'", '"'):
+            end = i + 1
+            while end < length:
+                if script[end] == char:
+                    # Удвоенная кавычка — экранирование
+                    if end + 1 < length and script[end + 1] == char:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(script[i : end + 1])
+            i = end + 1
+            continue
+        if char == "$":
+            match = _DOLLAR_TAG_RE.match(script, i)
+            if match:
+                tag = match.group(0)
+                end = script.find(tag, match.end())
+                end = length if end == -1 else end + len(tag)
+                current.append(script[i:end])
+                i = end
+                continue
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Миграции схемы базы данных")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="применённые и ожидающие миграции")
+
+    migrate = commands.add_parser("migrate", help="применить ожидающие миграции")
+    migrate.add_argument("--to", type=int, help="до версии включительно")
+    migrate.add_argument("--dry-run", action="store_true", help="только показать")
+
+    baseline = commands.add_parser(
+        "baseline", help="отметить миграции применёнными без выполнения"
+    )
+    baseline.add_argument("version", type=int)
+
+    args = parser.parse_args(argv)
+    try:
+        runner = MigrationRunner()
+        if args.command == "status":
+            for row in runner.status():
+                mode = "" if row["transactional"] else "  no-transaction"
+                applied_at = row["applied_at"] or ""
+                print(f"{row['migration']:<40} {row['state']:<8} {applied_at}{mode}")
+        elif args.command == "migrate":
+            done = runner.migrate(args.to, args.dry_run)
+            if not args.dry_run and not done:
+                print("Нет ожидающих миграций")
+        else:
+            for migration in runner.baseline(args.version):
+                print(f"Отмечена: {migration}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if DatabaseConnection._instance is not None:
+            DatabaseConnection().close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
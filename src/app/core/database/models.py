@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 @dataclass
@@ -49,3 +49,35 @@ class Transaction:
     transaction_date: datetime
     status: str
     created_at: datetime
+    from_account_number: Optional[str] = None
+    to_account_number: Optional[str] = None
+
+
+@dataclass
+class TransferResult:
+    index: int
+    success: bool
+    transaction_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class TransactionPage:
+    items: List[Transaction]
+    # Ключ (transaction_date, id) последней строки; None — страниц больше нет
+    next_cursor: Optional[Tuple[datetime, int]] = None
+
+
+@dataclass
+class ClientPage:
+    items: List[Client]
+    # Ключ (last_name, first_name, id) последней строки; строки сравниваются
+    # по байтам (COLLATE "C")
+    next_cursor: Optional[Tuple[str, str, int]] = None
+
+
+@dataclass
+class AccountPage:
+    items: List[Account]
+    # Ключ (opened_date, id) последней строки
+    next_cursor: Optional[Tuple[datetime, int]] = None
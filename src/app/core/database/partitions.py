@@ -0,0 +1,151 @@
+import argparse
+import re
+import sys
+from datetime import date, datetime
+from typing import List, Optional
+from psycopg2 import sql
+from app.core.database.connection import DatabaseConnection
+
+# FROM (MINVALUE) — transactions_legacy, перенесённая миграцией 0004 таблица
+_BOUND_RE = re.compile(r"FROM \((?:MINVALUE|'([^']+)')\) TO \('([^']+)'\)")
+
+
+class PartitionManager:
+    """Обслуживание помесячных секций transactions (deploy/migrations/0004).
+
+    ensure() заранее создаёт секции на ближайшие месяцы, detach_older_than()
+    отсоединяет старые секции и переносит их в архивную схему (или удаляет).
+    """
+
+    def __init__(self, db: DatabaseConnection = None):
+        self.db = db or DatabaseConnection()
+
+    def ensure(self, months_ahead: int = 3, start: date = None) -> List[str]:
+        with self.db.transaction() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT ensure_transactions_partitions(%s, %s)",
+                    (months_ahead, start or date.today()),
+                )
+                return [row[0] for row in cursor.fetchall()]
+
+    def list_partitions(self) -> List[dict]:
+        with self.db.checkout() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT c.relname,
+                           pg_get_expr(c.relpartbound, c.oid),
+                           c.reltuples::bigint,
+                           pg_total_relation_size(c.oid)
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'transactions'::regclass
+                    ORDER BY c.relname
+                    """
+                )
+                rows = cursor.fetchall()
+
+        partitions = []
+        for name, bound, rows_estimate, size in rows:
+            match = _BOUND_RE.search(bound)
+            partitions.append(
+                {
+                    "name": name,
+                    "from": (
+                        _parse_bound(match.group(1))
+                        if match and match.group(1)
+                        else None
+                    ),
+                    "to": _parse_bound(match.group(2)) if match else None,
+                    "default": match is None,
+                    "rows_estimate": max(rows_estimate, 0),
+                    "size_bytes": size,
+                }
+            )
+        return partitions
+
+    def detach_older_than(
+        self, before: date, archive_schema: Optional[str] = "archive"
+    ) -> List[str]:
+        """Отсоединяет секции, целиком лежащие раньше `before`.
+
+        Секция переносится в схему archive_schema; при archive_schema=None
+        удаляется. Каждая секция — отдельная транзакция.
+        """
+        detached = []
+        for partition in self.list_partitions():
+            if partition["default"] or partition["to"] > before:
+                continue
+
+            name = sql.Identifier(partition["name"])
+            with self.db.transaction() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        sql.SQL("ALTER TABLE transactions DETACH PARTITION {}").format(
+                            name
+                        )
+                    )
+                    if archive_schema:
+                        schema = sql.Identifier(archive_schema)
+                        cursor.execute(
+                            sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(schema)
+                        )
+                        cursor.execute(
+                            sql.SQL("ALTER TABLE {} SET SCHEMA {}").format(name, schema)
+                        )
+                    else:
+                        cursor.execute(sql.SQL("DROP TABLE {}").format(name))
+            detached.append(partition["name"])
+        return detached
+
+
+def _parse_bound(value: str) -> date:
+    return datetime.fromisoformat(value).date()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Обслуживание секций таблицы transactions"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="создать секции заранее")
+    ensure.add_argument("--ahead", type=int, default=3, help="месяцев вперёд")
+
+    commands.add_parser("list", help="список секций")
+
+    detach = commands.add_parser("detach", help="отсоединить старые секции")
+    detach.add_argument(
+        "--before", type=date.fromisoformat, required=True, help="YYYY-MM-DD"
+    )
+    detach.add_argument("--schema", default="archive", help="архивная схема")
+    detach.add_argument(
+        "--drop", action="store_true", help="удалить вместо переноса в архив"
+    )
+
+    args = parser.parse_args(argv)
+    manager = PartitionManager()
+    try:
+        if args.command == "ensure":
+            for name in manager.ensure(args.ahead):
+                print(name)
+        elif args.command == "list":
+            for p in manager.list_partitions():
+                start = p["from"] or "MINVALUE"
+                bounds = "DEFAULT" if p["default"] else f"{start} — {p['to']}"
+                print(f"{p['name']:<28} {bounds:<26} ~{p['rows_estimate']} строк")
+        else:
+            schema = None if args.drop else args.schema
+            for name in manager.detach_older_than(args.before, schema):
+                print(f"Отсоединена: {name}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        manager.db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
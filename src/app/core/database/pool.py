@@ -0,0 +1,196 @@
+import threading
+import time
+from typing import Optional
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        conn_params: dict,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Некорректные размеры пула соединений")
+
+        self.conn_params = conn_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        # Condition по умолчанию использует RLock: счётчики можно обновлять
+        # как под уже захваченной блокировкой, так и вне её
+        self._cond = threading.Condition()
+        self._idle = []  # [(connection, время возврата в пул)]
+        self._in_use = set()
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_discarded": 0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+
+    def _open(self):
+        conn = psycopg2.connect(**self.conn_params)
+        conn.autocommit = False
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._stats["connections_discarded"] += 1
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+
+        status = conn.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                return False
+
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Пул соединений закрыт")
+
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+
+                if len(self._in_use) < self.max_size:
+                    conn, idle_since = None, None
+                    break
+
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Нет свободных соединений в пуле (max={self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            # Резервируем место до проверки/открытия соединения вне блокировки,
+            # чтобы параллельные checkout не превысили max_size
+            placeholder = object()
+            self._in_use.add(placeholder)
+
+            waited_for = time.monotonic() - started
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time_total"] += waited_for
+                self._stats["wait_time_max"] = max(
+                    self._stats["wait_time_max"], waited_for
+                )
+
+        try:
+            if conn is None or not self._is_healthy(conn, idle_since):
+                if conn is not None:
+                    self._discard(conn)
+                conn = self._open()
+        except Exception:
+            with self._cond:
+                self._in_use.discard(placeholder)
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._in_use.discard(placeholder)
+            self._in_use.add(conn)
+        return conn
+
+    def putconn(self, conn, close: bool = False):
+        with self._cond:
+            if conn not in self._in_use:
+                return
+
+        if not (close or self._closed or conn.closed):
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                close = True
+
+        with self._cond:
+            self._in_use.discard(conn)
+            if close or self._closed or conn.closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle.clear()
+            for conn in list(self._in_use):
+                if isinstance(conn, extensions.connection):
+                    self._discard(conn)
+            self._in_use.clear()
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                {
+                    "min_size": self.min_size,
+                    "max_size": self.max_size,
+                    "idle": len(self._idle),
+                    "in_use": len(self._in_use),
+                }
+            )
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = (
+            stats["wait_time_total"] / stats["waits"] if stats["waits"] else 0.0
+        )
+        stats["wait_ratio"] = stats["waits"] / checkouts if checkouts else 0.0
+        return stats
@@ -0,0 +1,92 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+from psycopg2 import extensions
+
+_PLACEHOLDER_RE = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+class Statement:
+    """Запрос сервиса в форме для PREPARE/EXECUTE.
+
+    Плейсхолдеры psycopg2 (%s или %(имя)s) заменяются на $1..$n в тексте
+    PREPARE, а значения подставляются в EXECUTE, так что параметры вызова не
+    меняются. Имя — хэш текста: одинаковый запрос из разных сервисов и
+    потоков — один оператор на соединении.
+    """
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.name = "s_" + hashlib.md5(sql.encode()).hexdigest()[:16]
+        # Сбрасывается, если сервер не смог подготовить запрос: дальше он
+        # выполняется обычным execute()
+        self.preparable = True
+
+        names = []
+        positional = 0
+
+        def placeholder(match):
+            nonlocal positional
+            if match.group(0) == "%%":
+                return "%"
+            if match.group(1):
+                if match.group(1) not in names:
+                    names.append(match.group(1))
+                return f"${names.index(match.group(1)) + 1}"
+            positional += 1
+            return f"${positional}"
+
+        body = _PLACEHOLDER_RE.sub(placeholder, sql)
+        if names and positional:
+            raise ValueError("Запрос смешивает %s и %(имя)s")
+
+        args = [f"%({name})s" for name in names] or ["%s"] * positional
+        self.prepare_sql = f"PREPARE {self.name} AS {body}"
+        self.execute_sql = f"EXECUTE {self.name}"
+        if args:
+            self.execute_sql += f" ({', '.join(args)})"
+
+
+class StatementRegistry:
+    """Разобранные запросы по тексту, общие для всех соединений.
+
+    Размер ограничен: запрос сверх лимита (например, собранный с
+    переменным числом условий) просто выполняется без подготовки.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._statements = {}
+
+    def get(self, sql: str) -> Optional[Statement]:
+        statement = self._statements.get(sql)
+        if statement is not None:
+            return statement
+        with self._lock:
+            statement = self._statements.get(sql)
+            if statement is None and len(self._statements) < self.max_size:
+                statement = self._statements[sql] = Statement(sql)
+            return statement
+
+    def __len__(self):
+        return len(self._statements)
+
+
+statement_registry = StatementRegistry()
+
+
+class PreparingConnection(extensions.connection):
+    """Соединение, помнящее подготовленные на нём операторы.
+
+    Подготовленные операторы живут до конца сеанса и не откатываются вместе
+    с транзакцией, поэтому набор хранится на самом соединении: новое
+    соединение пула начинает с пустого. `prepared` — LRU имён, лишние
+    вытесняются через DEALLOCATE (см. InstrumentedCursor.execute_prepared).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = OrderedDict()
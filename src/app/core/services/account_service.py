@@ -1,6 +1,17 @@
-from typing import List, Optional
-from app.core.database.models import Account
+from typing import Dict, Iterable, List, Optional
+from app.core.database.models import Account, AccountPage
 from app.core.services.base_service import BaseService
+from app.core.services.cache import (
+    account_cache,
+    client_accounts_cache,
+    invalidate_accounts,
+)
+
+ACCOUNT_SELECT = """
+    SELECT id, client_id, account_number, account_type,
+           balance, currency, opened_date, is_active, created_at, updated_at
+    FROM accounts
+"""
 
 
 class AccountService(BaseService):
@@ -11,46 +22,120 @@ class AccountService(BaseService):
         self, client_id: int, account_type: str = None
     ) -> List[Account]:
         try:
-            with self.db.get_cursor() as cursor:
-                query = """
-                    SELECT id, client_id, account_number, account_type, balance, currency, opened_date, is_active, created_at, updated_at
-                    FROM accounts
-                    WHERE 1=1
-                """
-                params = []
+            accounts = client_accounts_cache.get_or_load(
+                (client_id or None, account_type or None),
+                lambda: self._fetch_client_accounts(client_id, account_type),
+            )
+            return list(accounts)
+        except Exception as e:
+            print(f"Ошибка при получении счетов клиента: {e}")
+            return []
 
-                if client_id:
-                    query += " AND client_id = %s"
-                    params.append(client_id)
+    def _fetch_client_accounts(self, client_id: int, account_type: str = None):
+        version = account_cache.version()
+        with self.db.get_cursor() as cursor:
+            query = ACCOUNT_SELECT + " WHERE 1=1"
+            params = []
 
-                if account_type:
-                    query += " AND account_type = %s"
-                    params.append(account_type)
+            if client_id:
+                query += " AND client_id = %s"
+                params.append(client_id)
 
-                cursor.execute(query, tuple(params))
-                return [Account(*row) for row in cursor.fetchall()]
+            if account_type:
+                query += " AND account_type = %s"
+                params.append(account_type)
+
+            cursor.execute_prepared(query, tuple(params))
+            accounts = [Account(*row) for row in cursor.fetchall()]
+
+        for account in accounts:
+            account_cache.set(account.id, account, version)
+        return accounts
+
+    def get_accounts_page(
+        self,
+        client_id: int = None,
+        account_type: str = None,
+        after=None,
+        limit: int = 100,
+    ) -> AccountPage:
+        try:
+            query = """
+                SELECT id, client_id, account_number, account_type, balance, currency, opened_date, is_active, created_at, updated_at
+                FROM accounts
+                WHERE 1=1
+            """
+            params = []
+
+            if client_id:
+                query += " AND client_id = %s"
+                params.append(client_id)
+
+            if account_type:
+                query += " AND account_type = %s"
+                params.append(account_type)
+
+            if after:
+                query += " AND (opened_date, id) < (%s, %s)"
+                params.extend(after)
+
+            query += " ORDER BY opened_date DESC, id DESC LIMIT %s"
+            params.append(limit + 1)
+
+            with self.db.get_cursor() as cursor:
+                cursor.execute_prepared(query, tuple(params))
+                items = [Account(*row) for row in cursor.fetchall()]
+
+            next_cursor = None
+            if len(items) > limit:
+                items = items[:limit]
+                next_cursor = (items[-1].opened_date, items[-1].id)
+            return AccountPage(items, next_cursor)
         except Exception as e:
-            print(f"Ошибка при получении счетов клиента: {e}")
-            return []
+            print(f"Ошибка при получении страницы счетов: {e}")
+            return AccountPage([])
 
     def get_account_by_id(self, account_id: int) -> Optional[Account]:
         try:
-            with self.db.get_cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT id, client_id, account_number, account_type, 
-                           balance, currency, opened_date, is_active, created_at, updated_at 
-                    FROM accounts 
-                    WHERE id = %s
-                """,
-                    (account_id,),
-                )
-                result = cursor.fetchone()
-                return Account(*result) if result else None
+            return account_cache.get_or_load(
+                account_id, lambda: self._fetch_account(account_id)
+            )
         except Exception as e:
             print(f"Ошибка при получении счета {account_id}: {e}")
             return None
 
+    def _fetch_account(self, account_id: int) -> Optional[Account]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute_prepared(ACCOUNT_SELECT + " WHERE id = %s", (account_id,))
+            result = cursor.fetchone()
+            return Account(*result) if result else None
+
+    def get_accounts_by_ids(self, account_ids: Iterable[int]) -> Dict[int, Account]:
+        ids = {account_id for account_id in account_ids if account_id}
+        accounts = {}
+        for account_id in ids:
+            account = account_cache.get(account_id)
+            if account is not None:
+                accounts[account_id] = account
+
+        missing = list(ids - accounts.keys())
+        if not missing:
+            return accounts
+        try:
+            version = account_cache.version()
+            with self.db.get_cursor() as cursor:
+                cursor.execute_prepared(
+                    ACCOUNT_SELECT + " WHERE id = ANY(%s)", (missing,)
+                )
+                for row in cursor.fetchall():
+                    account = Account(*row)
+                    account_cache.set(account.id, account, version)
+                    accounts[account.id] = account
+            return accounts
+        except Exception as e:
+            print(f"Ошибка при получении счетов {missing}: {e}")
+            return accounts
+
     def account_exists(self, account_id: int) -> bool:
         return self._exists("accounts", account_id)
 
@@ -67,7 +152,7 @@ class AccountService(BaseService):
                 if cursor.fetchone():
                     raise ValueError("Счет с таким номером уже существует")
 
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute(
                     """
                     INSERT INTO accounts 
@@ -83,19 +168,18 @@ class AccountService(BaseService):
                         data.get("is_active", True),
                     ),
                 )
-                self.db.connection.commit()
+                self.db.after_commit(client_accounts_cache.clear)
                 return True
         except ValueError as ve:
             print(f"[INFO] Ошибка добавления счёта: {ve}")
             return False
         except Exception as e:
-            self.db.connection.rollback()
             print(f"[ERROR] Ошибка добавления счёта: {e}")
             return False
 
     def update_account(self, account_id: int, **data) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute(
                     """
                     UPDATE accounts 
@@ -112,28 +196,26 @@ class AccountService(BaseService):
                         account_id,
                     ),
                 )
-                self.db.connection.commit()
+                self.db.after_commit(lambda: invalidate_accounts(account_id))
                 return cursor.rowcount > 0
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка при обновлении счета {account_id}: {e}")
             return False
 
     def delete_account(self, account_id: int) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute("DELETE FROM accounts WHERE id = %s", (account_id,))
-                self.db.connection.commit()
+                self.db.after_commit(lambda: invalidate_accounts(account_id))
                 return cursor.rowcount > 0
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка при удалении счета {account_id}: {e}")
             return False
 
     def get_account_by_number(self, account_number: str) -> Optional[Account]:
         try:
             with self.db.get_cursor() as cursor:
-                cursor.execute(
+                cursor.execute_prepared(
                     """
                     SELECT id, client_id, account_number, account_type,
                            balance, currency, opened_date, is_active, created_at, updated_at
@@ -150,15 +232,14 @@ class AccountService(BaseService):
 
     def update_balance(self, account_id: int, amount: float) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
-                cursor.execute(
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
+                cursor.execute_prepared(
                     "UPDATE accounts SET balance = balance + %s, updated_at = NOW() WHERE id = %s",
                     (amount, account_id),
                 )
-                self.db.connection.commit()
+                self.db.after_commit(lambda: invalidate_accounts(account_id))
                 return cursor.rowcount > 0
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка обновления баланса: {e}")
             return False
 
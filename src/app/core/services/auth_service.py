@@ -1,62 +1,158 @@
-import bcrypt
 from typing import Optional
 from app.core.database.models import AuthUser, Client
 from app.core.services.base_service import BaseService
+from app.core.services.cache import unknown_login_cache
+from app.core.services.client_service import ClientService
+from app.core.services.login_throttle import login_throttle
+from app.core.services.passwords import password_hasher
 
 
 class AuthService(BaseService):
+    def __init__(self):
+        super().__init__()
+        self.hasher = password_hasher
+        self.client_service = ClientService()
+
     def hash_password(self, password: str) -> str:
-        return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        return self.hasher.hash(password)
 
     def verify_password(self, password: str, hashed: str) -> bool:
-        return bcrypt.checkpw(password.encode(), hashed.encode())
+        return self.hasher.verify(password, hashed)
+
+    def _find_user(self, login: str) -> Optional[AuthUser]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute_prepared(
+                "SELECT id, login, password_hash, role, client_id FROM auth WHERE login = %s",
+                (login,),
+            )
+            row = cursor.fetchone()
+            return AuthUser(*row) if row else None
 
     def get_user_by_login(self, login: str) -> Optional[AuthUser]:
         try:
-            with self.db.get_cursor() as cursor:
-                cursor.execute(
-                    "SELECT id, login, password_hash, role, client_id FROM auth WHERE login = %s",
-                    (login,),
-                )
-                row = cursor.fetchone()
-                if row:
-                    return AuthUser(*row)
-                return None
+            return self._find_user(login)
         except Exception as e:
             print(f"Ошибка при поиске пользователя: {e}")
             return None
 
-    def register_user(
-        self, login: str, password: str, role: str = "user"
-    ) -> Optional[int]:
-        """Возвращает ID созданного пользователя или None"""
+    def authenticate(
+        self, login: str, password: str, source: str = None
+    ) -> Optional[AuthUser]:
+        """Пользователь, если логин и пароль верны, иначе None.
+
+        source — адрес клиента для ограничения попыток по источнику (API).
+        После серии неудач бросает LoginThrottledError, не обращаясь к БД.
+        Неизвестный логин проверяется против фиктивного хэша: ответ занимает
+        столько же времени, сколько неверный пароль.
+        """
+        login_throttle.check(login, source)
+
+        if unknown_login_cache.get(login):
+            user = None
+        else:
+            version = unknown_login_cache.version()
+            try:
+                user = self._find_user(login)
+            except Exception as e:
+                print(f"Ошибка при поиске пользователя: {e}")
+                return None
+            if user is None:
+                unknown_login_cache.set(login, True, version)
+
+        if user is None:
+            self.hasher.verify_dummy(password)
+            login_throttle.failure(login, source)
+            return None
+        if not self.verify_password(password, user.password_hash):
+            login_throttle.failure(login, source)
+            return None
+
+        login_throttle.success(login, source)
+        if self.hasher.needs_rehash(user.password_hash):
+            self._rehash(user, password)
+        return user
+
+    def _rehash(self, user: AuthUser, password: str):
+        """Пересчитывает хэш со стоимостью BCRYPT_ROUNDS.
+
+        Открытый пароль известен только при входе, поэтому смена стоимости
+        применяется к пользователю при его первом входе после неё.
+        """
         try:
-            pwd_hash = self.hash_password(password)
-            with self.db.get_cursor() as cursor:
+            new_hash = self.hash_password(password)
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
+                # Пароль могли сменить параллельно — тогда хэш не трогаем
                 cursor.execute(
                     """
-                    INSERT INTO auth (login, password_hash, role)
-                    VALUES (%s, %s, %s)
-                    RETURNING id
+                    UPDATE auth SET password_hash = %s
+                    WHERE id = %s AND password_hash = %s
                     """,
-                    (login, pwd_hash, role),
+                    (new_hash, user.id, user.password_hash),
                 )
-                self.db.connection.commit()
-                return cursor.fetchone()[0]
+            user.password_hash = new_hash
+        except Exception as e:
+            print(f"Ошибка перехэширования пароля: {e}")
+
+    def register_user(
+        self, login: str, password: str, role: str = "user"
+    ) -> Optional[int]:
+        """Возвращает ID созданного пользователя или None"""
+        try:
+            return self._insert_user(login, self.hash_password(password), role)
+        except Exception as e:
+            print(f"Ошибка регистрации пользователя: {e}")
+            return None
+
+    def _insert_user(self, login: str, pwd_hash: str, role: str) -> int:
+        with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO auth (login, password_hash, role)
+                VALUES (%s, %s, %s)
+                RETURNING id
+                """,
+                (login, pwd_hash, role),
+            )
+            self.db.after_commit(lambda: unknown_login_cache.invalidate(login))
+            return cursor.fetchone()[0]
+
+    def register_client(
+        self, login: str, password: str, role: str = "user", **client_data
+    ) -> Optional[int]:
+        """Пользователь вместе с профилем клиента одной транзакцией: при
+        ошибке не остаётся ни учётной записи без профиля, ни занятого email.
+        Возвращает ID пользователя или None"""
+        # bcrypt — до транзакции, чтобы не держать соединение на время хэша
+        pwd_hash = self.hash_password(password)
+        try:
+            with self.db.transaction():
+                auth_id = self._insert_user(login, pwd_hash, role)
+                if not self.create_client_for_user(auth_id, **client_data):
+                    raise RuntimeError("Не удалось создать профиль клиента")
+            return auth_id
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка регистрации пользователя: {e}")
             return None
 
+    def create_client_for_user(self, auth_id: int, **client_data) -> bool:
+        """Создаёт клиента и связывает его с пользователем одной транзакцией"""
+        try:
+            with self.db.transaction():
+                client_id = self.client_service.add_client(**client_data)
+                if not self.link_client_to_auth(auth_id, client_id):
+                    raise RuntimeError("Не удалось связать пользователя с клиентом")
+            return True
+        except Exception as e:
+            print(f"Ошибка создания профиля клиента: {e}")
+            return False
+
     def link_client_to_auth(self, auth_id: int, client_id: int) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute(
                     "UPDATE auth SET client_id = %s WHERE id = %s", (client_id, auth_id)
                 )
-                self.db.connection.commit()
                 return True
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка связи пользователя с клиентом: {e}")
             return False
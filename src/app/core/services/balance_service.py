@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+from typing import Optional
+from app.core.services.base_service import BaseService
+
+
+class BalanceService(BaseService):
+    """История остатков по account_daily_balances (deploy/migrations/0003)."""
+
+    def _accounts_clause(self, account_id: int = None, client_id: int = None):
+        conditions = []
+        params = []
+
+        if account_id:
+            conditions.append("a.id = %s")
+            params.append(account_id)
+
+        if client_id:
+            conditions.append("a.client_id = %s")
+            params.append(client_id)
+
+        return " AND ".join(conditions), params
+
+    def get_balance_at(
+        self, on_date: date, account_id: int = None, client_id: int = None
+    ) -> Optional[float]:
+        """Остаток счёта (или сумма по счетам клиента) на конец дня on_date."""
+        where, params = self._accounts_clause(account_id, client_id)
+        if not where:
+            return None
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT SUM(b.closing_balance)
+                    FROM accounts a
+                    CROSS JOIN LATERAL (
+                        SELECT closing_balance
+                        FROM account_daily_balances
+                        WHERE account_id = a.id AND balance_date <= %s
+                        ORDER BY balance_date DESC
+                        LIMIT 1
+                    ) b
+                    WHERE {where}
+                    """,
+                    (on_date, *params),
+                )
+                result = cursor.fetchone()[0]
+                return float(result) if result is not None else None
+        except Exception as e:
+            print(f"Ошибка при получении остатка на {on_date}: {e}")
+            return None
+
+    def get_balance_series(
+        self,
+        account_id: int = None,
+        client_id: int = None,
+        date_from: date = None,
+        date_to: date = None,
+    ) -> dict:
+        """Остатки на конец каждого дня периода (по умолчанию — последний год).
+
+        Возвращает {"dates": [...], "balances": [...]}. Дни до открытия счёта
+        считаются нулевыми.
+        """
+        empty = {"dates": [], "balances": []}
+        where, params = self._accounts_clause(account_id, client_id)
+        if not where:
+            return empty
+
+        date_to = date_to or date.today()
+        date_from = date_from or date_to - timedelta(days=365)
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT d.day::date, COALESCE(SUM(b.closing_balance), 0)
+                    FROM generate_series(%s::date, %s::date, interval '1 day') AS d(day)
+                    CROSS JOIN (SELECT a.id FROM accounts a WHERE {where}) acc
+                    LEFT JOIN LATERAL (
+                        SELECT closing_balance
+                        FROM account_daily_balances
+                        WHERE account_id = acc.id AND balance_date <= d.day
+                        ORDER BY balance_date DESC
+                        LIMIT 1
+                    ) b ON TRUE
+                    GROUP BY d.day
+                    ORDER BY d.day
+                    """,
+                    (date_from, date_to, *params),
+                )
+                rows = cursor.fetchall()
+                return {
+                    "dates": [row[0] for row in rows],
+                    "balances": [float(row[1]) for row in rows],
+                }
+        except Exception as e:
+            print(f"Ошибка при получении истории остатков: {e}")
+            return empty
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import AppConfig
+
+_MISSING = object()
+
+
+class EntityCache:
+    """Потокобезопасный кэш сущностей с TTL и вытеснением по LRU.
+
+    Записи живут не дольше `ttl` секунд (изменения других операторов
+    становятся видны не позже этого срока), при переполнении вытесняются
+    давно не читавшиеся. Пишущие методы сервисов вызывают invalidate().
+    """
+
+    def __init__(self, name: str, ttl: float = 30.0, max_size: int = 5000):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        # Растёт при каждой инвалидации: результат чтения, начатого до неё,
+        # в кэш не попадает
+        self._version = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return default
+
+    def set(self, key, value, version: int = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, key, loader):
+        """Значение из кэша или loader(); None не кэшируется."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        version = self.version()
+        value = loader()
+        if value is not None:
+            self.set(key, value, version)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._version += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["max_size"] = self.max_size
+        return stats
+
+
+# Общие для всех экземпляров сервисов (их создаёт каждый контроллер)
+client_cache = EntityCache(
+    "clients", AppConfig.ENTITY_CACHE_TTL, AppConfig.ENTITY_CACHE_MAX_SIZE
+)
+account_cache = EntityCache(
+    "accounts", AppConfig.ENTITY_CACHE_TTL, AppConfig.ENTITY_CACHE_MAX_SIZE
+)
+# Списки счетов по (client_id, account_type)
+client_accounts_cache = EntityCache(
+    "client_accounts", AppConfig.ENTITY_CACHE_TTL, AppConfig.ENTITY_CACHE_MAX_SIZE
+)
+
+# Логины, которых нет в auth: повторные попытки входа под ними не идут в БД
+unknown_login_cache = EntityCache(
+    "unknown_logins",
+    AppConfig.UNKNOWN_LOGIN_CACHE_TTL,
+    AppConfig.LOGIN_TRACKER_MAX_SIZE,
+)
+
+
+def invalidate_accounts(*account_ids):
+    account_cache.invalidate(*account_ids)
+    # Какому клиенту принадлежит счёт, здесь неизвестно — списки сбрасываем целиком
+    client_accounts_cache.clear()
+
+
+def invalidate_row(table: str, row_id: int):
+    """Сброс по уведомлению об изменении строки (в т.ч. от других клиентов)."""
+    if table == "clients":
+        client_cache.invalidate(row_id)
+    elif table == "accounts":
+        invalidate_accounts(row_id)
+
+
+_CACHES = (client_cache, account_cache, client_accounts_cache, unknown_login_cache)
+
+
+def invalidate_all():
+    for cache in _CACHES:
+        cache.clear()
+
+
+def cache_stats() -> dict:
+    return {cache.name: cache.stats() for cache in _CACHES}
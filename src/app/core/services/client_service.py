@@ -1,9 +1,23 @@
-from typing import List, Optional
-from app.core.database.models import Client
+from typing import Dict, Iterable, List, Optional
+from app.core.database.models import Client, ClientPage
 from app.core.services.base_service import BaseService
+from app.core.services.cache import account_cache, client_accounts_cache, client_cache
+
+CLIENT_SELECT = """
+    SELECT id, first_name, last_name, passport_number,
+           phone_number, email, created_at, updated_at
+    FROM clients
+"""
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 class ClientService(BaseService):
+    # Короче трёх символов триграммный индекс не помогает
+    SEARCH_MIN_LENGTH = 3
+
     def get_all_clients(self) -> List[Client]:
         try:
             with self.db.get_cursor() as cursor:
@@ -20,30 +34,90 @@ class ClientService(BaseService):
             print(f"Ошибка при получении клиентов: {e}")
             return []
 
-    def get_client_by_id(self, client_id: int) -> Optional[Client]:
+    def get_clients_page(self, after=None, limit: int = 100) -> ClientPage:
         try:
-            with self.db.get_cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT id, first_name, last_name, passport_number, 
-                           phone_number, email, created_at, updated_at 
-                    FROM clients 
-                    WHERE id = %s
-                """,
-                    (client_id,),
+            query = """
+                SELECT id, first_name, last_name, passport_number,
+                       phone_number, email, created_at, updated_at
+                FROM clients
+            """
+            # Порядок по байтам: так же ключ сравнивают в Python при живом
+            # обновлении таблицы (PagedTableModel.sort_key)
+            params = []
+            if after:
+                query += (
+                    ' WHERE (last_name COLLATE "C", first_name COLLATE "C", id)'
+                    " > (%s, %s, %s)"
                 )
-                result = cursor.fetchone()
-                return Client(*result) if result else None
+                params.extend(after)
+            query += (
+                ' ORDER BY last_name COLLATE "C", first_name COLLATE "C", id'
+                " LIMIT %s"
+            )
+            params.append(limit + 1)
+
+            with self.db.get_cursor() as cursor:
+                cursor.execute_prepared(query, tuple(params))
+                items = [Client(*row) for row in cursor.fetchall()]
+
+            next_cursor = None
+            if len(items) > limit:
+                items = items[:limit]
+                last = items[-1]
+                next_cursor = (last.last_name, last.first_name, last.id)
+            return ClientPage(items, next_cursor)
+        except Exception as e:
+            print(f"Ошибка при получении страницы клиентов: {e}")
+            return ClientPage([])
+
+    def get_client_by_id(self, client_id: int) -> Optional[Client]:
+        try:
+            return client_cache.get_or_load(
+                client_id, lambda: self._fetch_client(client_id)
+            )
         except Exception as e:
             print(f"Ошибка при получении клиента {client_id}: {e}")
             return None
 
+    def _fetch_client(self, client_id: int) -> Optional[Client]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute_prepared(CLIENT_SELECT + " WHERE id = %s", (client_id,))
+            result = cursor.fetchone()
+            return Client(*result) if result else None
+
+    def get_clients_by_ids(self, client_ids: Iterable[int]) -> Dict[int, Client]:
+        ids = {client_id for client_id in client_ids if client_id}
+        clients = {}
+        for client_id in ids:
+            client = client_cache.get(client_id)
+            if client is not None:
+                clients[client_id] = client
+
+        missing = list(ids - clients.keys())
+        if not missing:
+            return clients
+        try:
+            version = client_cache.version()
+            with self.db.get_cursor() as cursor:
+                cursor.execute_prepared(
+                    CLIENT_SELECT + " WHERE id = ANY(%s)", (missing,)
+                )
+                for row in cursor.fetchall():
+                    client = Client(*row)
+                    client_cache.set(client.id, client, version)
+                    clients[client.id] = client
+            return clients
+        except Exception as e:
+            print(f"Ошибка при получении клиентов {missing}: {e}")
+            return clients
+
     def client_exists(self, client_id: int) -> bool:
         return self._exists("clients", client_id)
 
-    def add_client(self, **data) -> bool:
+    def add_client(self, **data) -> int:
+        """Возвращает ID созданного клиента"""
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute(
                     "SELECT 1 FROM clients WHERE passport_number = %s",
                     (data["passport_number"],),
@@ -66,15 +140,13 @@ class ClientService(BaseService):
                         data.get("email"),
                     ),
                 )
-                self.db.connection.commit()
-                return True
+                return cursor.fetchone()[0]
         except Exception as e:
-            self.db.connection.rollback()
             raise Exception(f"Ошибка добавления клиента: {str(e)}")
 
     def update_client(self, client_id: int, **data) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute(
                     """
                     UPDATE clients 
@@ -91,28 +163,26 @@ class ClientService(BaseService):
                         client_id,
                     ),
                 )
-                self.db.connection.commit()
+                self.db.after_commit(lambda: client_cache.invalidate(client_id))
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"Ошибка при обновлении клиента {client_id}: {e}")
-            self.db.connection.rollback()
             return False
 
     def delete_client(self, client_id: int) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute("DELETE FROM clients WHERE id = %s", (client_id,))
-                self.db.connection.commit()
+                self.db.after_commit(lambda: _invalidate_client(client_id))
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"Ошибка при удалении клиента {client_id}: {e}")
-            self.db.connection.rollback()
             return False
 
     def get_client_by_email(self, email: str) -> Optional[Client]:
         try:
             with self.db.get_cursor() as cursor:
-                cursor.execute(
+                cursor.execute_prepared(
                     """
                     SELECT id, first_name, last_name, passport_number, 
                            phone_number, email, created_at, updated_at 
@@ -127,18 +197,49 @@ class ClientService(BaseService):
             print(f"Ошибка при получении клиента по email: {e}")
             return None
 
-    def search_clients_by_name(self, full_name: str) -> list[Client]:
+    def search_clients(self, text: str, limit: int = 50) -> List[Client]:
+        """Поиск по ФИО, паспорту и email с ранжированием по похожести.
+
+        Использует триграммные GIN-индексы (deploy/migrations/0001).
+        """
+        text = text.strip()
+        if len(text) < self.SEARCH_MIN_LENGTH:
+            return []
         try:
             with self.db.get_cursor() as cursor:
-                cursor.execute(
+                cursor.execute_prepared(
                     """
                     SELECT id, first_name, last_name, passport_number, phone_number, email, created_at, updated_at
                     FROM clients
-                    WHERE first_name ILIKE %s OR last_name ILIKE %s
-                """,
-                    (f"%{full_name}%", f"%{full_name}%"),
+                    WHERE (first_name || ' ' || last_name) ILIKE %(pattern)s
+                       OR (first_name || ' ' || last_name) %% %(text)s
+                       OR passport_number ILIKE %(pattern)s
+                       OR email ILIKE %(pattern)s
+                    ORDER BY GREATEST(
+                                 similarity(first_name || ' ' || last_name, %(text)s),
+                                 similarity(passport_number, %(text)s),
+                                 similarity(COALESCE(email, ''), %(text)s)
+                             ) DESC,
+                             last_name, first_name, id
+                    LIMIT %(limit)s
+                    """,
+                    {
+                        "text": text,
+                        "pattern": "%" + _escape_like(text) + "%",
+                        "limit": limit,
+                    },
                 )
                 return [Client(*row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Ошибка при поиске клиентов: {e}")
             return []
+
+    def search_clients_by_name(self, full_name: str) -> list[Client]:
+        return self.search_clients(full_name)
+
+
+def _invalidate_client(client_id: int):
+    client_cache.invalidate(client_id)
+    # Счета клиента удаляются каскадом
+    account_cache.clear()
+    client_accounts_cache.clear()
@@ -1,7 +1,26 @@
-from app.core.database.connection import DatabaseConnection
+import hashlib
+from decimal import Decimal
+from functools import partial
+from typing import Optional
+import psycopg2
+from app.core.database.connection import DatabaseConnection, TransactionRolledBack
 from app.core.services.client_service import ClientService
 from app.core.services.account_service import AccountService
 from app.core.services.transaction_service import TransactionService
+from app.core.services.balance_service import BalanceService
+from app.core.services import cache
+
+# Длина столбца idempotency_keys.key
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+class _NotPosted(Exception):
+    """Операция не проведена — откатить вместе с занятым ключом."""
+
+
+def _request_amount(amount) -> Decimal:
+    """Сумма в параметрах запроса для хэша: 100, 100.0 и "100.00" — один запрос."""
+    return Decimal(str(amount)).quantize(Decimal("0.01"))
 
 
 class DataService:
@@ -10,6 +29,7 @@ class DataService:
         self.client_service = ClientService()
         self.account_service = AccountService()
         self.transaction_service = TransactionService()
+        self.balance_service = BalanceService()
 
     def client_exists(self, client_id: int) -> bool:
         return self.client_service.client_exists(client_id)
@@ -17,9 +37,15 @@ class DataService:
     def get_all_clients(self):
         return self.client_service.get_all_clients()
 
+    def get_clients_page(self, after=None, limit: int = 100):
+        return self.client_service.get_clients_page(after, limit)
+
     def get_client_by_id(self, client_id: int):
         return self.client_service.get_client_by_id(client_id)
 
+    def get_client_by_email(self, email: str):
+        return self.client_service.get_client_by_email(email)
+
     def add_client(self, **data):
         return self.client_service.add_client(**data)
 
@@ -29,9 +55,15 @@ class DataService:
     def delete_client(self, client_id: int):
         return self.client_service.delete_client(client_id)
 
+    def get_clients_by_ids(self, client_ids):
+        return self.client_service.get_clients_by_ids(client_ids)
+
     def search_clients_by_name(self, full_name: str):
         return self.client_service.search_clients_by_name(full_name)
 
+    def search_clients(self, text: str, limit: int = 50):
+        return self.client_service.search_clients(text, limit)
+
     def account_exists(self, account_id: int) -> bool:
         return self.account_service.account_exists(account_id)
 
@@ -41,15 +73,26 @@ class DataService:
     def get_client_accounts(self, client_id: int, account_type: str = None):
         return self.account_service.get_client_accounts(client_id, account_type)
 
+    def get_accounts_page(
+        self,
+        client_id: int = None,
+        account_type: str = None,
+        after=None,
+        limit: int = 100,
+    ):
+        return self.account_service.get_accounts_page(
+            client_id, account_type, after, limit
+        )
+
     def get_account_transactions(self, account_id: int):
         return self.transaction_service.get_account_transactions(account_id)
 
-    def get_client_transactions(self, client_id: int = None, account_id: int = None, transaction_type: str = None):
-        return self.transaction_service.get_client_transactions(client_id, account_id, transaction_type)
-
     def get_account_by_id(self, account_id: int):
         return self.account_service.get_account_by_id(account_id)
 
+    def get_accounts_by_ids(self, account_ids):
+        return self.account_service.get_accounts_by_ids(account_ids)
+
     def get_account_by_number(self, account_number: str):
         return self.account_service.get_account_by_number(account_number)
 
@@ -99,7 +142,9 @@ class DataService:
             print(f"[ERROR] Ошибка при создании счёта: {e}")
             return False
 
-    def deposit_to_account(self, account_id: int, amount: float) -> bool:
+    def deposit_to_account(
+        self, account_id: int, amount: float, idempotency_key: str = None
+    ) -> bool:
         try:
             account = self.account_service.get_account_by_id(account_id)
             if not account:
@@ -110,57 +155,110 @@ class DataService:
                 print("Сумма пополнения должна быть положительной")
                 return False
 
-            updated = self.account_service.update_balance(account_id, amount)
-            if updated:
-                self.transaction_service.add_transaction(
+            return self._post_once(
+                idempotency_key,
+                ("deposit", account_id, _request_amount(amount)),
+                partial(
+                    self._post_entry,
+                    account_id,
+                    amount,
                     from_account_id=None,
                     to_account_id=account_id,
                     amount=amount,
                     transaction_type="deposit",
                     description="Пополнение счёта",
-                )
-            return updated
+                ),
+            )
+        except ValueError:
+            raise
         except Exception as e:
             print(f"Ошибка при пополнении: {e}")
             return False
 
+    def _post_entry(
+        self, account_id: int, delta: float, **transaction
+    ) -> Optional[int]:
+        """Изменение баланса одного счёта и запись в журнал одной транзакцией:
+        если запись не удалась, баланс тоже не меняется. Возвращает ID
+        транзакции или None"""
+        with self.db.transaction():
+            if not self.account_service.update_balance(account_id, delta):
+                return None
+            transaction_id = self.transaction_service.add_transaction(**transaction)
+            if not transaction_id:
+                raise RuntimeError("Не удалось записать транзакцию")
+        return transaction_id
+
+    def _post_once(self, idempotency_key: Optional[str], request: tuple, post) -> bool:
+        """Проводит post() (-> ID транзакции или None) не больше одного раза
+        на ключ идемпотентности.
+
+        Повтор с тем же ключом и теми же параметрами `request` возвращает
+        исходный результат, не проводя операцию снова; с другими — ValueError.
+        Ключ занимается в одной транзакции с проводкой, поэтому неудачная
+        попытка его не занимает и её можно повторить с тем же ключом.
+        """
+        if not idempotency_key:
+            return post() is not None
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise ValueError(
+                f"Ключ идемпотентности длиннее {IDEMPOTENCY_KEY_MAX_LENGTH} символов"
+            )
+
+        request_hash = hashlib.sha256(repr(request).encode()).hexdigest()
+        try:
+            with self.db.transaction():
+                transaction_id = self.transaction_service.claim_idempotency_key(
+                    idempotency_key, request_hash
+                )
+                if transaction_id is not None:
+                    print(
+                        f"[INFO] Повтор запроса {idempotency_key}: "
+                        f"уже проведён (транзакция {transaction_id})"
+                    )
+                    return True
+
+                transaction_id = post()
+                if transaction_id is None:
+                    raise _NotPosted()
+                self.transaction_service.complete_idempotency_key(
+                    idempotency_key, transaction_id
+                )
+            return True
+        except _NotPosted:
+            return False
+        except (psycopg2.Error, TransactionRolledBack, RuntimeError) as e:
+            print(f"[ERROR] Ошибка проводки {idempotency_key}: {e}")
+            return False
+
     def make_transfer(
         self,
         from_account_id: int,
         to_account_id: int,
         amount: float,
         description: str = "",
+        idempotency_key: str = None,
     ) -> bool:
-        try:
-            from_acc = self.account_service.get_account_by_id(from_account_id)
-            to_acc = self.account_service.get_account_by_id(to_account_id)
-
-            if not from_acc or not to_acc:
-                print("Один из счетов не найден")
-                return False
-            if from_acc.balance < amount or amount <= 0:
-                print("Недостаточно средств или некорректная сумма")
-                return False
-
-            success_from = self.account_service.update_balance(from_account_id, -amount)
-            success_to = self.account_service.update_balance(to_account_id, amount)
-
-            if success_from and success_to:
-                self.transaction_service.add_transaction(
-                    from_account_id=from_account_id,
-                    to_account_id=to_account_id,
-                    amount=amount,
-                    transaction_type="transfer",
-                    description=description,
-                )
-                return True
-            else:
-                print("Ошибка обновления баланса")
-                return False
+        return self._post_once(
+            idempotency_key,
+            (
+                "transfer",
+                from_account_id,
+                to_account_id,
+                _request_amount(amount),
+                description,
+            ),
+            partial(
+                self.transaction_service.post_transfer,
+                from_account_id,
+                to_account_id,
+                amount,
+                description,
+            ),
+        )
 
-        except Exception as e:
-            print(f"Ошибка при переводе: {e}")
-            return False
+    def make_transfers_batch(self, transfers: list):
+        return self.transaction_service.post_transfers_batch(transfers)
 
     def make_manual_transaction(
         self,
@@ -169,62 +267,59 @@ class DataService:
         amount: float,
         description: str = "",
         transaction_type: str = "manual",
+        idempotency_key: str = None,
     ):
         try:
             if from_account_id and to_account_id:
-                from_acc = self.account_service.get_account_by_id(from_account_id)
-                to_acc = self.account_service.get_account_by_id(to_account_id)
-
-                if not from_acc or not to_acc:
-                    print("Один из счетов не найден")
-                    return False
-                if amount <= 0:
-                    print("Сумма должна быть положительной")
-                    return False
-
-                success_from = self.account_service.update_balance(
-                    from_account_id, -amount
+                post = partial(
+                    self.transaction_service.post_transfer,
+                    from_account_id,
+                    to_account_id,
+                    amount,
+                    description,
+                    transaction_type=transaction_type,
+                    check_balance=False,
                 )
-                success_to = self.account_service.update_balance(to_account_id, amount)
-
-                if success_from and success_to:
-                    self.transaction_service.add_transaction(
-                        from_account_id=from_account_id,
-                        to_account_id=to_account_id,
-                        amount=amount,
-                        transaction_type=transaction_type,
-                        description=description,
-                    )
-                return success_from and success_to
 
             elif to_account_id:
-                success = self.account_service.update_balance(to_account_id, amount)
-                if success:
-                    self.transaction_service.add_transaction(
-                        from_account_id=None,
-                        to_account_id=to_account_id,
-                        amount=amount,
-                        transaction_type=transaction_type,
-                        description=description,
-                    )
-                return success
+                post = partial(
+                    self._post_entry,
+                    to_account_id,
+                    amount,
+                    from_account_id=None,
+                    to_account_id=to_account_id,
+                    amount=amount,
+                    transaction_type=transaction_type,
+                    description=description,
+                )
 
             elif from_account_id:
-                success = self.account_service.update_balance(from_account_id, -amount)
-                if success:
-                    self.transaction_service.add_transaction(
-                        from_account_id=from_account_id,
-                        to_account_id=None,
-                        amount=amount,
-                        transaction_type=transaction_type,
-                        description=description,
-                    )
-                return success
+                post = partial(
+                    self._post_entry,
+                    from_account_id,
+                    -amount,
+                    from_account_id=from_account_id,
+                    to_account_id=None,
+                    amount=amount,
+                    transaction_type=transaction_type,
+                    description=description,
+                )
 
             else:
                 print("Не указаны ни один счёт")
                 return False
 
+            request = (
+                "manual",
+                from_account_id,
+                to_account_id,
+                _request_amount(amount),
+                description,
+                transaction_type,
+            )
+            return self._post_once(idempotency_key, request, post)
+        except ValueError:
+            raise
         except Exception as e:
             print(f"Ошибка при добавлении ручной транзакции: {e}")
             return False
@@ -239,51 +334,78 @@ class DataService:
             client_id, account_id, transaction_type
         )
 
-    def get_monthly_summary(
-        self, client_id: int, account_id: int = None, transaction_type: str = None
+    def get_transactions_page(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+        after=None,
+        limit: int = 100,
     ):
-        try:
-            transactions = self.transaction_service.get_client_transactions(
-                client_id, account_id, transaction_type
-            )
-
-            income_by_month = {}
-            expense_by_month = {}
-
-            for t in transactions:
-                month = t.transaction_date.strftime("%Y-%m")
+        return self.transaction_service.get_transactions_page(
+            client_id, account_id, transaction_type, after, limit
+        )
 
-                if t.transaction_type == "deposit":
-                    income_by_month[month] = income_by_month.get(month, 0) + t.amount
-                elif t.transaction_type == "transfer" and t.from_account_id:
-                    expense_by_month[month] = expense_by_month.get(month, 0) + t.amount
+    def get_transactions_by_ids(
+        self,
+        transaction_ids,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+    ):
+        return self.transaction_service.get_transactions_by_ids(
+            transaction_ids, client_id, account_id, transaction_type
+        )
 
-            months = sorted(set(income_by_month.keys()) | set(expense_by_month.keys()))
-            incomes = [income_by_month.get(m, 0) for m in months]
-            expenses = [expense_by_month.get(m, 0) for m in months]
+    def iter_transactions(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+        itersize: int = 2000,
+    ):
+        return self.transaction_service.iter_transactions(
+            client_id, account_id, transaction_type, itersize
+        )
 
-            return {"months": months, "incomes": incomes, "expenses": expenses}
-        except Exception as e:
-            print(f"Ошибка при загрузке данных по месяцам: {e}")
-            return {"months": [], "incomes": [], "expenses": []}
+    def get_monthly_summary(
+        self,
+        client_id: int,
+        account_id: int = None,
+        transaction_type: str = None,
+        date_from=None,
+        date_to=None,
+    ):
+        return self.transaction_service.get_monthly_summary(
+            client_id, account_id, transaction_type, date_from, date_to
+        )
 
     def get_transaction_type_summary(
         self, client_id: int, account_id: int = None, transaction_type: str = None
     ):
-        try:
-            transactions = self.transaction_service.get_client_transactions(
-                client_id, account_id, transaction_type
-            )
-            summary = {"deposit": 0, "transfer": 0, "withdrawal": 0}
+        return self.transaction_service.get_transaction_type_summary(
+            client_id, account_id, transaction_type
+        )
 
-            for t in transactions:
-                if t.transaction_type in summary:
-                    summary[t.transaction_type] += 1
+    def get_totals_summary(self, client_id: int):
+        return self.transaction_service.get_totals_summary(client_id)
 
-            return summary
-        except Exception as e:
-            print(f"Ошибка при распределении транзакций: {e}")
-            return {"deposit": 0, "transfer": 0, "withdrawal": 0}
+    def get_balance_at(self, on_date, account_id: int = None, client_id: int = None):
+        return self.balance_service.get_balance_at(on_date, account_id, client_id)
+
+    def get_balance_series(
+        self,
+        account_id: int = None,
+        client_id: int = None,
+        date_from=None,
+        date_to=None,
+    ):
+        return self.balance_service.get_balance_series(
+            account_id, client_id, date_from, date_to
+        )
 
     def delete_transaction(self, transaction_id: int):
         return self.transaction_service.delete_transaction(transaction_id)
+
+    def cache_stats(self) -> dict:
+        return cache.cache_stats()
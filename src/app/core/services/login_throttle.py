@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import AppConfig
+
+
+class LoginThrottledError(ValueError):
+    """Вход временно запрещён после серии неудачных попыток."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            f"Слишком много неудачных попыток входа, "
+            f"повторите через {max(1, round(retry_after))} с"
+        )
+
+
+class _Counters:
+    """Неудачные попытки по ключу с экспоненциальной задержкой.
+
+    Первые `free_attempts` неудач задержки не дают, дальше каждая удваивает
+    её (base_delay, 2·base_delay, ... до max_delay). Счётчик забывается
+    через `window` секунд без неудач. Ключей не больше `max_size`, давно
+    не встречавшиеся вытесняются.
+    """
+
+    def __init__(
+        self,
+        free_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        window: float,
+        max_size: int,
+    ):
+        self.free_attempts = free_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> [неудач, последняя, запрет до]
+
+    def _entry(self, key, now: float):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[1] > self.window:
+            del self._entries[key]
+            entry = None
+        return entry
+
+    def retry_after(self, key, now: float) -> float:
+        entry = self._entry(key, now)
+        return max(0.0, entry[2] - now) if entry else 0.0
+
+    def failure(self, key, now: float):
+        entry = self._entry(key, now)
+        if entry is None:
+            entry = self._entries[key] = [0, now, now]
+        entry[0] += 1
+        entry[1] = now
+        excess = entry[0] - self.free_attempts
+        if excess > 0:
+            delay = min(self.max_delay, self.base_delay * 2 ** min(excess - 1, 30))
+            entry[2] = now + delay
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def reset(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LoginThrottle:
+    """Ограничение частоты неудачных входов в памяти процесса.
+
+    Счётчики ведутся отдельно по логину (подбор пароля к одной учётной
+    записи) и по источнику — адресу клиента API (перебор многих логинов с
+    одного адреса). Пока действует задержка, попытка отклоняется до поиска
+    пользователя и bcrypt — всплеск подбора не нагружает ни БД, ни
+    процессор. Неизвестные логины учитываются так же, как известные, чтобы
+    по ответу нельзя было понять, существует ли логин.
+
+    Успешный вход сбрасывает счётчик логина, но не источника: иначе одна
+    своя учётная запись позволяла бы перебирать чужие без ограничений.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        window = AppConfig.LOGIN_FAILURE_WINDOW
+        base = AppConfig.LOGIN_BACKOFF_BASE
+        max_delay = AppConfig.LOGIN_BACKOFF_MAX
+        max_size = AppConfig.LOGIN_TRACKER_MAX_SIZE
+        self._logins = _Counters(
+            AppConfig.LOGIN_FREE_ATTEMPTS, base, max_delay, window, max_size
+        )
+        self._sources = _Counters(
+            AppConfig.LOGIN_SOURCE_FREE_ATTEMPTS, base, max_delay, window, max_size
+        )
+        self._stats = {"allowed": 0, "throttled": 0, "failures": 0, "successes": 0}
+
+    @staticmethod
+    def _login_key(login: str) -> str:
+        # Регистр и пробелы не должны давать новых попыток
+        return (login or "").strip().lower()
+
+    def check(self, login: str, source: Optional[str] = None):
+        """LoginThrottledError, если попытку нужно отклонить."""
+        now = time.monotonic()
+        with self._lock:
+            wait = self._logins.retry_after(self._login_key(login), now)
+            if source is not None:
+                wait = max(wait, self._sources.retry_after(source, now))
+            if wait > 0:
+                self._stats["throttled"] += 1
+            else:
+                self._stats["allowed"] += 1
+        if wait > 0:
+            raise LoginThrottledError(wait)
+
+    def failure(self, login: str, source: Optional[str] = None):
+        now = time.monotonic()
+        with self._lock:
+            self._stats["failures"] += 1
+            self._logins.failure(self._login_key(login), now)
+            if source is not None:
+                self._sources.failure(source, now)
+
+    def success(self, login: str, source: Optional[str] = None):
+        with self._lock:
+            self._stats["successes"] += 1
+            self._logins.reset(self._login_key(login))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                tracked_logins=len(self._logins),
+                tracked_sources=len(self._sources),
+            )
+
+
+login_throttle = LoginThrottle()
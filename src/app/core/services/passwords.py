@@ -0,0 +1,82 @@
+import os
+import re
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+from app.core.config import AppConfig
+
+_COST_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHasher:
+    """bcrypt в отдельном пуле потоков.
+
+    bcrypt отпускает GIL, поэтому хэши считаются параллельно на разных
+    ядрах, а размер пула ограничивает, сколько ядер уходит на вход: всплеск
+    входов в начале смены не отнимает процессор у остальных запросов API.
+    Вызовы блокируют вызывающий поток до результата — из GUI их делают
+    через AsyncLoader.
+    """
+
+    def __init__(self, rounds: int = None, workers: int = None):
+        self.rounds = rounds or AppConfig.BCRYPT_ROUNDS
+        self.workers = workers or AppConfig.AUTH_WORKERS or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._executor = None
+        self._dummy_hash = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="bcrypt"
+                )
+            return self._executor
+
+    def _hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode(), salt).decode()
+
+    @staticmethod
+    def _verify(password: str, hashed: str) -> bool:
+        try:
+            return bcrypt.checkpw(password.encode(), hashed.encode())
+        except ValueError:
+            # Повреждённый или не-bcrypt хэш
+            return False
+
+    def hash(self, password: str) -> str:
+        return self._pool().submit(self._hash, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._pool().submit(self._verify, password, hashed).result()
+
+    @staticmethod
+    def cost(hashed: str) -> Optional[int]:
+        match = _COST_RE.match(hashed or "")
+        return int(match.group(1)) if match else None
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Хэш посчитан с другой стоимостью, чем BCRYPT_ROUNDS."""
+        return self.cost(hashed) != self.rounds
+
+    def verify_dummy(self, password: str) -> bool:
+        """Проверка против случайного хэша той же стоимости — столько же
+        времени, сколько неверный пароль существующего пользователя.
+        Всегда False."""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(secrets.token_hex(16))
+        self.verify(password, self._dummy_hash)
+        return False
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -1,19 +1,74 @@
-from typing import List, Optional
-from app.core.database.models import Transaction
+from decimal import Decimal, InvalidOperation
+import uuid
+from typing import Iterator, List, Optional
+from psycopg2.extras import execute_values
+from app.core.database.models import Transaction, TransactionPage, TransferResult
 from app.core.services.base_service import BaseService
+from app.core.services.cache import invalidate_accounts
+
+# Номера счетов подтягиваются тем же запросом, чтобы таблицы не делали
+# отдельный SELECT на каждую сторону каждой транзакции
+TRANSACTION_WITH_ACCOUNTS_SELECT = """
+    SELECT t.id, t.from_account_id, t.to_account_id, t.amount,
+           t.transaction_type, t.description, t.transaction_date, t.status, t.created_at,
+           fa.account_number, ta.account_number
+    FROM transactions t
+    LEFT JOIN accounts fa ON fa.id = t.from_account_id
+    LEFT JOIN accounts ta ON ta.id = t.to_account_id
+"""
 
 
 class TransactionService(BaseService):
+    def _filter_clause(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+        date_from=None,
+        date_to=None,
+    ):
+        conditions = []
+        params = []
+
+        if client_id:
+            # = ANY(ARRAY(...)) позволяет планировщику объединить два индексных
+            # поиска (BitmapOr) без дублирования строк, в отличие от JOIN ... OR
+            conditions.append(
+                """(
+                    t.from_account_id = ANY(ARRAY(SELECT id FROM accounts WHERE client_id = %s))
+                    OR t.to_account_id = ANY(ARRAY(SELECT id FROM accounts WHERE client_id = %s))
+                )"""
+            )
+            params.extend([client_id, client_id])
+
+        if account_id:
+            conditions.append("(t.from_account_id = %s OR t.to_account_id = %s)")
+            params.extend([account_id, account_id])
+
+        if transaction_type and transaction_type != "Все":
+            conditions.append("t.transaction_type = %s")
+            params.append(transaction_type)
+
+        # Условия на transaction_date отсекают лишние месячные секции
+        if date_from:
+            conditions.append("t.transaction_date >= %s")
+            params.append(date_from)
+
+        if date_to:
+            conditions.append("t.transaction_date < %s")
+            params.append(date_to)
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
     def get_account_transactions(self, account_id: int) -> List[Transaction]:
         try:
             with self.db.get_cursor() as cursor:
                 cursor.execute(
-                    """
-                    SELECT id, from_account_id, to_account_id, amount, 
-                           transaction_type, description, transaction_date, status, created_at 
-                    FROM transactions 
-                    WHERE from_account_id = %s OR to_account_id = %s
-                    ORDER BY transaction_date DESC
+                    TRANSACTION_WITH_ACCOUNTS_SELECT
+                    + """
+                    WHERE t.from_account_id = %s OR t.to_account_id = %s
+                    ORDER BY t.transaction_date DESC
                 """,
                     (account_id, account_id),
                 )
@@ -29,41 +84,238 @@ class TransactionService(BaseService):
         transaction_type: str = None,
     ) -> List[Transaction]:
         try:
-            query = """
-                    SELECT t.id, t.from_account_id, t.to_account_id, t.amount,
-                        t.transaction_type, t.description, t.transaction_date, t.status, t.created_at
+            where, params = self._filter_clause(client_id, account_id, transaction_type)
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    TRANSACTION_WITH_ACCOUNTS_SELECT
+                    + where
+                    + " ORDER BY t.transaction_date DESC, t.id DESC",
+                    tuple(params),
+                )
+                return [Transaction(*row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Ошибка при получении транзакций клиента: {e}")
+            return []
+
+    def get_transactions_by_ids(
+        self,
+        transaction_ids: List[int],
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+    ) -> List[Transaction]:
+        """Транзакции из списка, попадающие под фильтр (для живого обновления).
+
+        Ошибки пробрасываются: пустой результат означал бы, что строки
+        нужно убрать из таблиц.
+        """
+        where, params = self._filter_clause(client_id, account_id, transaction_type)
+        where += " AND t.id = ANY(%s)" if where else " WHERE t.id = ANY(%s)"
+        params.append(list(transaction_ids))
+        with self.db.get_cursor() as cursor:
+            cursor.execute_prepared(
+                TRANSACTION_WITH_ACCOUNTS_SELECT + where, tuple(params)
+            )
+            return [Transaction(*row) for row in cursor.fetchall()]
+
+    def explain_transactions(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+        limit: int = 100,
+        analyze: bool = False,
+    ) -> List[str]:
+        """План запроса страницы транзакций — для проверки, что выборка идёт
+        по индексам, а не полным сканированием таблицы. Автоматически планы
+        проверяет python -m app.core.utils.index_benchmark check."""
+        where, params = self._filter_clause(client_id, account_id, transaction_type)
+        explain = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+        with self.db.get_cursor() as cursor:
+            cursor.execute(
+                explain
+                + TRANSACTION_WITH_ACCOUNTS_SELECT
+                + where
+                + " ORDER BY t.transaction_date DESC, t.id DESC LIMIT %s",
+                tuple(params) + (limit,),
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_transactions_page(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+        after=None,
+        limit: int = 100,
+    ) -> TransactionPage:
+        """Страница транзакций от новых к старым.
+
+        `after` — `next_cursor` предыдущей страницы; выборка идёт по ключу
+        (transaction_date, id), поэтому стоимость не зависит от номера страницы.
+        """
+        try:
+            where, params = self._filter_clause(client_id, account_id, transaction_type)
+            if after:
+                where += " AND " if where else " WHERE "
+                # Сравнение кортежей секции не отсекает — дублируем его
+                # отдельным условием на transaction_date
+                where += (
+                    "t.transaction_date <= %s AND (t.transaction_date, t.id) < (%s, %s)"
+                )
+                params.extend([after[0], *after])
+
+            with self.db.get_cursor() as cursor:
+                cursor.execute_prepared(
+                    TRANSACTION_WITH_ACCOUNTS_SELECT
+                    + where
+                    + " ORDER BY t.transaction_date DESC, t.id DESC LIMIT %s",
+                    tuple(params) + (limit + 1,),
+                )
+                items = [Transaction(*row) for row in cursor.fetchall()]
+
+            next_cursor = None
+            if len(items) > limit:
+                items = items[:limit]
+                next_cursor = (items[-1].transaction_date, items[-1].id)
+            return TransactionPage(items, next_cursor)
+        except Exception as e:
+            print(f"Ошибка при получении страницы транзакций: {e}")
+            return TransactionPage([])
+
+    def iter_transactions(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+        itersize: int = 2000,
+    ) -> Iterator[Transaction]:
+        """Потоковое чтение через серверный курсор: в памяти не больше
+        `itersize` строк, независимо от объёма истории."""
+        where, params = self._filter_clause(client_id, account_id, transaction_type)
+        with self.db.checkout() as conn:
+            with conn.cursor(name=f"transactions_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = itersize
+                cursor.execute(
+                    TRANSACTION_WITH_ACCOUNTS_SELECT
+                    + where
+                    + " ORDER BY t.transaction_date DESC, t.id DESC",
+                    tuple(params),
+                )
+                for row in cursor:
+                    yield Transaction(*row)
+
+    def get_monthly_summary(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+        date_from=None,
+        date_to=None,
+    ) -> dict:
+        try:
+            where, params = self._filter_clause(
+                client_id, account_id, transaction_type, date_from, date_to
+            )
+            where += " AND " if where else " WHERE "
+            where += """(
+                t.transaction_type = 'deposit'
+                OR (t.transaction_type = 'transfer' AND t.from_account_id IS NOT NULL)
+            )"""
+
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT to_char(date_trunc('month', t.transaction_date), 'YYYY-MM'),
+                           COALESCE(SUM(t.amount) FILTER (
+                               WHERE t.transaction_type = 'deposit'
+                           ), 0),
+                           COALESCE(SUM(t.amount) FILTER (
+                               WHERE t.transaction_type = 'transfer'
+                           ), 0)
                     FROM transactions t
-                    JOIN accounts a ON a.id = t.from_account_id OR a.id = t.to_account_id
-                """
-            params = []
+                    {where}
+                    GROUP BY date_trunc('month', t.transaction_date)
+                    ORDER BY date_trunc('month', t.transaction_date)
+                    """,
+                    tuple(params),
+                )
+                rows = cursor.fetchall()
 
-            if client_id:
-                query += " WHERE a.client_id = %s"
-                params.extend([client_id])
+            return {
+                "months": [row[0] for row in rows],
+                "incomes": [float(row[1]) for row in rows],
+                "expenses": [float(row[2]) for row in rows],
+            }
+        except Exception as e:
+            print(f"Ошибка при загрузке данных по месяцам: {e}")
+            return {"months": [], "incomes": [], "expenses": []}
 
-            if account_id:
-                query += " AND (t.from_account_id = %s OR t.to_account_id = %s)"
-                params.extend([account_id, account_id])
-            if transaction_type and transaction_type != "Все":
-                query += " AND t.transaction_type = %s"
-                params.append(transaction_type)
+    def get_transaction_type_summary(
+        self,
+        client_id: int = None,
+        account_id: int = None,
+        transaction_type: str = None,
+    ) -> dict:
+        summary = {"deposit": 0, "transfer": 0, "withdrawal": 0}
+        try:
+            where, params = self._filter_clause(client_id, account_id, transaction_type)
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT t.transaction_type, COUNT(*)
+                    FROM transactions t
+                    {where}
+                    GROUP BY t.transaction_type
+                    """,
+                    tuple(params),
+                )
+                for transaction_type, count in cursor.fetchall():
+                    if transaction_type in summary:
+                        summary[transaction_type] = count
+            return summary
+        except Exception as e:
+            print(f"Ошибка при распределении транзакций: {e}")
+            return {"deposit": 0, "transfer": 0, "withdrawal": 0}
 
+    def get_totals_summary(self, client_id: int = None) -> dict:
+        try:
+            where, params = self._filter_clause(client_id)
             with self.db.get_cursor() as cursor:
-                cursor.execute(query, tuple(params))
-                return [Transaction(*row) for row in cursor.fetchall()]
+                cursor.execute(
+                    f"""
+                    SELECT
+                        COALESCE(SUM(t.amount) FILTER (
+                            WHERE t.transaction_type = 'deposit' AND t.to_account_id IS NOT NULL
+                        ), 0),
+                        COALESCE(SUM(t.amount) FILTER (
+                            WHERE t.transaction_type = 'transfer' AND t.from_account_id IS NOT NULL
+                        ), 0),
+                        COUNT(*) FILTER (WHERE t.transaction_type = 'transfer'),
+                        COUNT(*) FILTER (WHERE t.transaction_type = 'deposit')
+                    FROM transactions t
+                    {where}
+                    """,
+                    tuple(params),
+                )
+                income, expense, transfers, deposits = cursor.fetchone()
+            return {
+                "total_income": float(income),
+                "total_expense": float(expense),
+                "total_transfers": transfers,
+                "total_deposits": deposits,
+            }
         except Exception as e:
-            print(f"Ошибка при получении транзакций клиента: {e}")
-            return []
+            print(f"Ошибка при формировании статистики: {e}")
+            return {}
 
     def get_all_transactions(self) -> List[Transaction]:
         try:
             with self.db.get_cursor() as cursor:
                 cursor.execute(
-                    """
-                    SELECT id, from_account_id, to_account_id, amount,
-                           transaction_type, description, transaction_date, status, created_at
-                    FROM transactions
-                    ORDER BY transaction_date DESC
+                    TRANSACTION_WITH_ACCOUNTS_SELECT
+                    + """
+                    ORDER BY t.transaction_date DESC
                     """
                 )
                 return [Transaction(*row) for row in cursor.fetchall()]
@@ -74,7 +326,7 @@ class TransactionService(BaseService):
     def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
         try:
             with self.db.get_cursor() as cursor:
-                cursor.execute(
+                cursor.execute_prepared(
                     """
                     SELECT id, from_account_id, to_account_id, amount,
                            transaction_type, description, transaction_date, status, created_at
@@ -92,10 +344,11 @@ class TransactionService(BaseService):
             print(f"Ошибка при получении транзакции по ID {transaction_id}: {e}")
             return None
 
-    def add_transaction(self, **data) -> bool:
+    def add_transaction(self, **data) -> Optional[int]:
+        """Возвращает ID транзакции или None"""
         try:
-            with self.db.get_cursor() as cursor:
-                cursor.execute(
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
+                cursor.execute_prepared(
                     """
                     INSERT INTO transactions 
                     (from_account_id, to_account_id, amount, transaction_type, description)
@@ -110,16 +363,250 @@ class TransactionService(BaseService):
                         data.get("description", ""),
                     ),
                 )
-                self.db.connection.commit()
-                return True
+                return cursor.fetchone()[0]
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка при добавлении транзакции: {e}")
-            return False
+            return None
+
+    def post_transfer(
+        self,
+        from_account_id: int,
+        to_account_id: int,
+        amount: float,
+        description: str = "",
+        transaction_type: str = "transfer",
+        check_balance: bool = True,
+    ) -> Optional[int]:
+        """Атомарный перевод: блокировка счетов, списание, зачисление и
+        запись в журнал в одной транзакции. Возвращает ID транзакции или None"""
+        try:
+            if from_account_id == to_account_id:
+                raise ValueError("Счета отправителя и получателя совпадают")
+            if amount <= 0:
+                raise ValueError("Сумма должна быть положительной")
+
+            params = {
+                "from_id": from_account_id,
+                "to_id": to_account_id,
+                "amount": amount,
+                "transaction_type": transaction_type,
+                "description": description,
+            }
+
+            with self.db.transaction() as conn:
+                with conn.cursor() as cursor:
+                    # Счета блокируются строго в порядке id, поэтому встречные
+                    # переводы ждут друг друга, а не взаимоблокируются
+                    cursor.execute_prepared(
+                        """
+                        SELECT id, balance >= %(amount)s
+                        FROM accounts
+                        WHERE id IN (%(from_id)s, %(to_id)s)
+                        ORDER BY id
+                        FOR UPDATE
+                        """,
+                        params,
+                    )
+                    sufficient = dict(cursor.fetchall())
+
+                    if len(sufficient) != 2:
+                        raise ValueError("Один из счетов не найден")
+                    if check_balance and not sufficient[from_account_id]:
+                        raise ValueError("Недостаточно средств")
+
+                    cursor.execute_prepared(
+                        """
+                        WITH moved AS (
+                            UPDATE accounts
+                            SET balance = CASE
+                                    WHEN id = %(from_id)s THEN balance - %(amount)s
+                                    ELSE balance + %(amount)s
+                                END,
+                                updated_at = NOW()
+                            WHERE id IN (%(from_id)s, %(to_id)s)
+                            RETURNING id
+                        )
+                        INSERT INTO transactions
+                        (from_account_id, to_account_id, amount, transaction_type, description)
+                        SELECT %(from_id)s, %(to_id)s, %(amount)s,
+                               %(transaction_type)s, %(description)s
+                        WHERE (SELECT COUNT(*) FROM moved) = 2
+                        RETURNING id
+                        """,
+                        params,
+                    )
+                    row = cursor.fetchone()
+                    if not row:
+                        raise RuntimeError("Ошибка обновления баланса")
+
+            self.db.after_commit(
+                lambda: invalidate_accounts(from_account_id, to_account_id)
+            )
+            return row[0]
+        except ValueError as ve:
+            print(f"[INFO] Перевод отклонён: {ve}")
+            return None
+        except Exception as e:
+            print(f"[ERROR] Ошибка при переводе: {e}")
+            return None
+
+    def post_transfers_batch(self, transfers: List[dict]) -> List[TransferResult]:
+        """Пакетное проведение переводов одной транзакцией.
+
+        Каждый элемент: from_account_id, to_account_id, amount и необязательные
+        description, transaction_type. Переводы применяются по порядку; не
+        прошедшие проверку отклоняются, остальные проводятся.
+        """
+        results = [TransferResult(index=i, success=False) for i in range(len(transfers))]
+        valid = []
+
+        for result, transfer in zip(results, transfers):
+            try:
+                from_id = int(transfer["from_account_id"])
+                to_id = int(transfer["to_account_id"])
+                amount = Decimal(str(transfer["amount"]))
+            except (KeyError, TypeError, ValueError, InvalidOperation):
+                result.error = "Некорректные данные перевода"
+                continue
+            if from_id == to_id:
+                result.error = "Счета отправителя и получателя совпадают"
+            elif not amount.is_finite() or amount <= 0:
+                result.error = "Сумма должна быть положительной"
+            else:
+                valid.append((result, transfer, from_id, to_id, amount))
+
+        if not valid:
+            return results
+
+        account_ids = sorted({acc for _, _, f, t, _ in valid for acc in (f, t)})
+
+        try:
+            with self.db.transaction() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT id, balance
+                        FROM accounts
+                        WHERE id = ANY(%s)
+                        ORDER BY id
+                        FOR UPDATE
+                        """,
+                        (account_ids,),
+                    )
+                    balances = dict(cursor.fetchall())
+
+                    deltas = {}
+                    accepted = []
+                    for result, transfer, from_id, to_id, amount in valid:
+                        if from_id not in balances or to_id not in balances:
+                            result.error = "Один из счетов не найден"
+                            continue
+                        if balances[from_id] < amount:
+                            result.error = "Недостаточно средств"
+                            continue
+                        balances[from_id] -= amount
+                        balances[to_id] += amount
+                        deltas[from_id] = deltas.get(from_id, 0) - amount
+                        deltas[to_id] = deltas.get(to_id, 0) + amount
+                        accepted.append(
+                            (
+                                result,
+                                (
+                                    from_id,
+                                    to_id,
+                                    amount,
+                                    transfer.get("transaction_type", "transfer"),
+                                    transfer.get("description", ""),
+                                ),
+                            )
+                        )
+
+                    if not accepted:
+                        return results
+
+                    execute_values(
+                        cursor,
+                        """
+                        UPDATE accounts AS a
+                        SET balance = a.balance + v.delta, updated_at = NOW()
+                        FROM (VALUES %s) AS v(id, delta)
+                        WHERE a.id = v.id
+                        """,
+                        list(deltas.items()),
+                        template="(%s, %s::numeric)",
+                        page_size=1000,
+                    )
+                    transaction_ids = execute_values(
+                        cursor,
+                        """
+                        INSERT INTO transactions
+                        (from_account_id, to_account_id, amount, transaction_type, description)
+                        VALUES %s
+                        RETURNING id
+                        """,
+                        [row for _, row in accepted],
+                        page_size=1000,
+                        fetch=True,
+                    )
+
+            self.db.after_commit(lambda: invalidate_accounts(*deltas))
+            for (result, _), (transaction_id,) in zip(accepted, transaction_ids):
+                result.success = True
+                result.transaction_id = transaction_id
+        except Exception as e:
+            print(f"[ERROR] Ошибка пакетного проведения переводов: {e}")
+            for result, *_ in valid:
+                if result.error is None:
+                    result.error = "Пакет не проведён"
+                result.success = False
+                result.transaction_id = None
+
+        return results
+
+    def claim_idempotency_key(self, key: str, request_hash: str) -> Optional[int]:
+        """Занимает ключ идемпотентности в текущей транзакции.
+
+        None — ключ новый, операцию нужно провести и вызвать
+        complete_idempotency_key в той же транзакции. Иначе — ID транзакции,
+        уже проведённой с этим ключом. Параллельный запрос с тем же ключом
+        ждёт на INSERT, пока первый не завершится, и получает его результат.
+        """
+        with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
+            cursor.execute_prepared(
+                """
+                INSERT INTO idempotency_keys (key, request_hash)
+                VALUES (%s, %s)
+                ON CONFLICT (key) DO NOTHING
+                """,
+                (key, request_hash),
+            )
+            if cursor.rowcount:
+                return None
+            cursor.execute_prepared(
+                """
+                SELECT request_hash, transaction_id
+                FROM idempotency_keys
+                WHERE key = %s
+                """,
+                (key,),
+            )
+            row = cursor.fetchone()
+        if row is None or row[1] is None:
+            raise RuntimeError(f"Ключ идемпотентности {key} занят, но не завершён")
+        if row[0] != request_hash:
+            raise ValueError("Ключ идемпотентности уже использован для другой операции")
+        return row[1]
+
+    def complete_idempotency_key(self, key: str, transaction_id: int):
+        with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
+            cursor.execute_prepared(
+                "UPDATE idempotency_keys SET transaction_id = %s WHERE key = %s",
+                (transaction_id, key),
+            )
 
     def update_transaction(self, transaction_id: int, **data) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute(
                     """
                     UPDATE transactions SET
@@ -139,23 +626,19 @@ class TransactionService(BaseService):
                         transaction_id,
                     ),
                 )
-                self.db.connection.commit()
                 return cursor.rowcount > 0
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка при обновлении транзакции {transaction_id}: {e}")
             return False
 
     def delete_transaction(self, transaction_id: int) -> bool:
         try:
-            with self.db.get_cursor() as cursor:
+            with self.db.transaction(savepoint=False) as conn, conn.cursor() as cursor:
                 cursor.execute(
                     "DELETE FROM transactions WHERE id = %s",
                     (transaction_id,),
                 )
-                self.db.connection.commit()
                 return cursor.rowcount > 0
         except Exception as e:
-            self.db.connection.rollback()
             print(f"Ошибка при удалении транзакции {transaction_id}: {e}")
             return False
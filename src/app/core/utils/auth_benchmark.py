@@ -0,0 +1,141 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.api.client import RemoteAuthService
+from app.core.database.connection import DatabaseConnection
+from app.core.database.cursor import round_trips
+from app.core.services.auth_service import AuthService
+from app.core.services.passwords import password_hasher
+from app.core.utils.service_benchmark import percentile, print_case
+
+
+class AuthBenchmark:
+    """Пропускная способность входа: всплеск логинов, как в начале смены.
+
+    Входы распределяются по `users` разным пользователям (как при реальном
+    всплеске — кэш одной строки не помогает) и выполняются в `concurrency`
+    потоков: локально через AuthService или, с `url`, через API-сервер.
+    Перед замером каждый пользователь входит один раз — хэши с устаревшей
+    стоимостью пересчитываются, и замер идёт уже на BCRYPT_ROUNDS.
+    """
+
+    def __init__(self, password: str = "password", url: str = None):
+        self.password = password
+        self.db = DatabaseConnection()
+        self.auth = RemoteAuthService(url) if url else AuthService()
+        self.remote = bool(url)
+
+    def _logins(self, users: int) -> list:
+        with self.db.checkout() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT login FROM auth
+                    WHERE client_id IS NOT NULL
+                    ORDER BY id LIMIT %s
+                    """,
+                    (users,),
+                )
+                logins = [row[0] for row in cursor.fetchall()]
+        if not logins:
+            raise RuntimeError(
+                "Нет пользователей: загрузите данные через app.core.utils.seed_data"
+            )
+        return logins
+
+    def _login(self, login: str) -> bool:
+        try:
+            return self.auth.authenticate(login, self.password) is not None
+        finally:
+            if not self.remote:
+                self.db.release()
+
+    def run(self, logins: int = 200, concurrency: int = 8, users: int = 50) -> dict:
+        names = self._logins(users)
+        with ThreadPoolExecutor(concurrency) as executor:
+            warmup = list(executor.map(self._login, names))
+        if not all(warmup):
+            print(
+                f"[INFO] Не удалось войти {warmup.count(False)} из {len(names)} "
+                "пользователей: проверьте --password"
+            )
+
+        def one(i):
+            trips = round_trips()
+            started = time.perf_counter()
+            try:
+                ok = self._login(names[i % len(names)])
+            except Exception as e:
+                print(f"[ERROR] {e}")
+                ok = False
+            return time.perf_counter() - started, round_trips() - trips, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            samples = list(executor.map(one, range(logins)))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(sample[0] * 1000 for sample in samples)
+        return {
+            "iterations": logins,
+            "concurrency": concurrency,
+            "users": len(names),
+            "remote": self.remote,
+            # Через API хэши считает сервер со своими настройками
+            "bcrypt_rounds": None if self.remote else password_hasher.rounds,
+            "auth_workers": None if self.remote else password_hasher.workers,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": sum(latencies) / len(latencies),
+            "max_ms": latencies[-1],
+            "throughput_ops": logins / wall if wall else 0.0,
+            # Обращения к БД из этого процесса (через API — 0)
+            "round_trips": sum(sample[1] for sample in samples) / logins,
+            "failures": sum(1 for sample in samples if not sample[2]),
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Замер входов в секунду (bcrypt + поиск пользователя)"
+    )
+    parser.add_argument("--logins", type=int, default=200, help="число входов")
+    parser.add_argument("--concurrency", type=int, default=8, help="число потоков")
+    parser.add_argument("--users", type=int, default=50, help="разных пользователей")
+    parser.add_argument("--password", default="password", help="пароль клиентов")
+    parser.add_argument("--url", help="входить через API-сервер по этому адресу")
+    parser.add_argument("--out", help="сохранить результат в JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        result = AuthBenchmark(args.password, args.url).run(
+            args.logins, args.concurrency, args.users
+        )
+        if args.url:
+            print(f"— через API {args.url}")
+        else:
+            print(
+                f"— локально: bcrypt cost {result['bcrypt_rounds']}, "
+                f"потоков bcrypt: {result['auth_workers']}"
+            )
+        print_case("login", result)
+        if args.out:
+            result["created_at"] = datetime.now().isoformat(timespec="seconds")
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        password_hasher.shutdown()
+        if DatabaseConnection._instance is not None:
+            DatabaseConnection().close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
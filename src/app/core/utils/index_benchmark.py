@@ -0,0 +1,354 @@
+import argparse
+import json
+import statistics
+import sys
+from collections import Counter
+from datetime import datetime
+from app.core.database.connection import DatabaseConnection
+from app.core.services.account_service import ACCOUNT_SELECT
+from app.core.services.client_service import CLIENT_SELECT
+from app.core.services.transaction_service import (
+    TRANSACTION_WITH_ACCOUNTS_SELECT,
+    TransactionService,
+)
+
+PAGE_LIMIT = 101  # limit + 1, как в get_*_page
+
+# Ожидания к планам для check: {запрос: (индексы, разрешена ли сортировка)}.
+# Страницы по ключу должны читаться индексом в нужном порядке, без Sort;
+# фильтр по счёту объединяет два индекса (BitmapOr) и сортирует результат
+PLAN_EXPECTATIONS = {
+    "clients_page": (("idx_clients_name_order_c",), False),
+    "client_accounts_page": (("idx_accounts_client_opened",), False),
+    "all_transactions_page": (("idx_transactions_date_id",), False),
+    "all_transactions_next_page": (("idx_transactions_date_id",), False),
+    "account_transactions_page": (
+        ("idx_transactions_from_account_date", "idx_transactions_to_account_date"),
+        True,
+    ),
+    "account_transactions_next_page": (
+        ("idx_transactions_from_account_date", "idx_transactions_to_account_date"),
+        True,
+    ),
+}
+
+
+class IndexBenchmark:
+    """Планы и время запросов сервисов — до и после миграции индексов
+    (deploy/migrations/0005).
+
+    Запросы собираются из тех же констант и условий, что и в сервисах.
+    Порядок работы: загрузка данных (app.core.utils.seed_data) →
+    run --out before.json → миграция → run --out after.json →
+    compare before.json after.json. check проверяет планы по
+    PLAN_EXPECTATIONS и годится для регрессионного прогона (код выхода 1).
+    """
+
+    def __init__(self, db: DatabaseConnection = None):
+        self.db = db or DatabaseConnection()
+        self.transactions = TransactionService()
+
+    def queries(self) -> dict:
+        """{имя: (SQL, параметры)} для запросов сервисов на текущих данных."""
+        with self.db.checkout() as conn:
+            with conn.cursor() as cursor:
+                # Самый активный счёт и его клиент — худший случай для списков
+                cursor.execute(
+                    """
+                    SELECT to_account_id FROM transactions
+                    GROUP BY to_account_id ORDER BY count(*) DESC LIMIT 1
+                    """
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    raise RuntimeError(
+                        "Нет транзакций: сначала загрузите данные (app.core.utils.seed_data)"
+                    )
+                account_id = row[0]
+                cursor.execute(
+                    "SELECT client_id, account_type FROM accounts WHERE id = %s",
+                    (account_id,),
+                )
+                client_id, account_type = cursor.fetchone()
+                cursor.execute(
+                    """
+                    SELECT t.transaction_date, t.id FROM transactions t
+                    WHERE t.from_account_id = %s OR t.to_account_id = %s
+                    ORDER BY t.transaction_date DESC, t.id DESC
+                    OFFSET %s LIMIT 1
+                    """,
+                    (account_id, account_id, PAGE_LIMIT - 1),
+                )
+                after = cursor.fetchone()
+                cursor.execute(
+                    """
+                    SELECT t.transaction_date, t.id FROM transactions t
+                    ORDER BY t.transaction_date DESC, t.id DESC
+                    OFFSET %s LIMIT 1
+                    """,
+                    (PAGE_LIMIT - 1,),
+                )
+                all_after = cursor.fetchone()
+                cursor.execute("SELECT date_trunc('month', NOW()) - interval '11 months'")
+                date_from = cursor.fetchone()[0]
+
+        order = " ORDER BY t.transaction_date DESC, t.id DESC LIMIT %s"
+
+        def transactions_page(client=None, account=None, cursor_after=None):
+            where, params = self.transactions._filter_clause(client, account)
+            if cursor_after:
+                where += " AND " if where else " WHERE "
+                where += (
+                    "t.transaction_date <= %s AND (t.transaction_date, t.id) < (%s, %s)"
+                )
+                params.extend([cursor_after[0], *cursor_after])
+            return (
+                TRANSACTION_WITH_ACCOUNTS_SELECT + where + order,
+                (*params, PAGE_LIMIT),
+            )
+
+        summary_where, summary_params = self.transactions._filter_clause(
+            account_id=account_id, date_from=date_from
+        )
+
+        queries = {
+            "clients_page": (
+                CLIENT_SELECT
+                + ' ORDER BY last_name COLLATE "C", first_name COLLATE "C", id'
+                + " LIMIT %s",
+                (PAGE_LIMIT,),
+            ),
+            "client_accounts": (
+                ACCOUNT_SELECT + " WHERE client_id = %s AND account_type = %s",
+                (client_id, account_type),
+            ),
+            "client_accounts_page": (
+                ACCOUNT_SELECT
+                + " WHERE client_id = %s ORDER BY opened_date DESC, id DESC LIMIT %s",
+                (client_id, PAGE_LIMIT),
+            ),
+            "all_transactions_page": transactions_page(),
+            "account_transactions_page": transactions_page(account=account_id),
+            "client_transactions_page": transactions_page(client=client_id),
+            "account_monthly_summary": (
+                f"""
+                SELECT date_trunc('month', t.transaction_date),
+                       SUM(t.amount) FILTER (WHERE t.transaction_type = 'deposit'),
+                       SUM(t.amount) FILTER (WHERE t.transaction_type = 'transfer')
+                FROM transactions t
+                {summary_where}
+                GROUP BY 1 ORDER BY 1
+                """,
+                tuple(summary_params),
+            ),
+        }
+        if after:
+            queries["account_transactions_next_page"] = transactions_page(
+                account=account_id, cursor_after=after
+            )
+        if all_after:
+            queries["all_transactions_next_page"] = transactions_page(
+                cursor_after=all_after
+            )
+        return queries
+
+    def check_plans(self) -> list:
+        """Нарушения PLAN_EXPECTATIONS в планах запросов (пустой список — всё
+        в порядке). Нужна миграция 0005 и данные seed_data: на почти пустых
+        таблицах планировщик законно выбирает полное сканирование."""
+        problems = []
+        queries = self.queries()
+        with self.db.checkout() as conn:
+            with conn.cursor() as cursor:
+                for name, (indexes, sort_allowed) in PLAN_EXPECTATIONS.items():
+                    if name not in queries:
+                        continue
+                    query, params = queries[name]
+                    cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+                    nodes = list(plan_nodes(cursor.fetchone()[0][0]["Plan"]))
+                    used = {node.get("Index Name") for node in nodes}
+
+                    for index in indexes:
+                        # У секций transactions свои копии индекса
+                        if not used & partition_indexes(cursor, index):
+                            problems.append(f"{name}: не использует {index}")
+                    if not sort_allowed:
+                        problems.extend(
+                            f"{name}: {node['Node Type']} вместо порядка индекса"
+                            for node in nodes
+                            if node["Node Type"] in ("Sort", "Incremental Sort")
+                        )
+        return problems
+
+    def run(self, repeat: int = 5) -> dict:
+        results = {}
+        queries = self.queries()
+        with self.db.checkout() as conn:
+            with conn.cursor() as cursor:
+                for name, (query, params) in queries.items():
+                    runs = []
+                    # Первый прогон прогревает кэш и не учитывается
+                    for _ in range(repeat + 1):
+                        cursor.execute(
+                            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params
+                        )
+                        runs.append(cursor.fetchone()[0][0])
+                    runs = runs[1:]
+                    plan = runs[-1]["Plan"]
+                    results[name] = {
+                        "execution_ms": statistics.median(
+                            r["Execution Time"] for r in runs
+                        ),
+                        "planning_ms": statistics.median(r["Planning Time"] for r in runs),
+                        "rows": plan.get("Actual Rows"),
+                        "shared_hit": plan.get("Shared Hit Blocks", 0),
+                        "shared_read": plan.get("Shared Read Blocks", 0),
+                        "plan": summarize_plan(plan),
+                    }
+                cursor.execute(
+                    """
+                    SELECT indexname FROM pg_indexes
+                    WHERE tablename IN ('clients', 'accounts', 'transactions', 'auth')
+                    ORDER BY indexname
+                    """
+                )
+                indexes = [row[0] for row in cursor.fetchall()]
+
+        return {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "repeat": repeat,
+            "indexes": indexes,
+            "queries": results,
+        }
+
+
+def plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def partition_indexes(cursor, index: str) -> set:
+    """Индекс и его копии на секциях (для несекционированной таблицы — он сам)."""
+    cursor.execute(
+        """
+        WITH RECURSIVE tree(oid) AS (
+            SELECT to_regclass(%s)::oid
+            UNION ALL
+            SELECT i.inhrelid FROM pg_inherits i JOIN tree ON i.inhparent = tree.oid
+        )
+        SELECT c.relname FROM tree JOIN pg_class c ON c.oid = tree.oid
+        """,
+        (index,),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def summarize_plan(plan: dict) -> list:
+    """Узлы плана в порядке обхода, одинаковые узлы по секциям схлопнуты."""
+    labels = []
+
+    def walk(node):
+        label = node["Node Type"]
+        if "Index Name" in node:
+            label += f" using {node['Index Name']}"
+        elif "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+        labels.append(label)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan)
+    counts = Counter(labels)
+    summary = []
+    for label in dict.fromkeys(labels):
+        summary.append(f"{label} ×{counts[label]}" if counts[label] > 1 else label)
+    return summary
+
+
+def print_results(results: dict):
+    for name, r in results["queries"].items():
+        print(
+            f"{name:<32} {r['execution_ms']:>9.2f} ms  "
+            f"buffers {r['shared_hit'] + r['shared_read']:>7}  rows {r['rows']}"
+        )
+        for label in r["plan"]:
+            print(f"    {label}")
+
+
+def print_comparison(before: dict, after: dict):
+    print(f"{'query':<32} {'before, ms':>11} {'after, ms':>11} {'speedup':>9}")
+    for name, old in before["queries"].items():
+        new = after["queries"].get(name)
+        if new is None:
+            continue
+        speedup = old["execution_ms"] / new["execution_ms"] if new["execution_ms"] else 0
+        print(
+            f"{name:<32} {old['execution_ms']:>11.2f} {new['execution_ms']:>11.2f} "
+            f"{speedup:>8.1f}x"
+        )
+        if old["plan"] != new["plan"]:
+            print("    до:    " + " > ".join(old["plan"]))
+            print("    после: " + " > ".join(new["plan"]))
+
+    removed = sorted(set(before["indexes"]) - set(after["indexes"]))
+    added = sorted(set(after["indexes"]) - set(before["indexes"]))
+    if removed:
+        print("Удалены индексы: " + ", ".join(removed))
+    if added:
+        print("Добавлены индексы: " + ", ".join(added))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Планы и время запросов сервисов до/после миграции индексов"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="EXPLAIN ANALYZE запросов сервисов")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--out", help="сохранить результат в JSON")
+
+    compare = commands.add_parser("compare", help="сравнить два прогона")
+    compare.add_argument("before")
+    compare.add_argument("after")
+
+    commands.add_parser(
+        "check", help="проверить, что страницы читаются по индексам (код выхода 1)"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        with open(args.before, encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.after, encoding="utf-8") as f:
+            after = json.load(f)
+        print_comparison(before, after)
+        return 0
+
+    benchmark = IndexBenchmark()
+    try:
+        if args.command == "check":
+            problems = benchmark.check_plans()
+            for problem in problems:
+                print(f"❌ {problem}")
+            if problems:
+                return 1
+            print("✅ Планы запросов используют индексы")
+            return 0
+
+        results = benchmark.run(args.repeat)
+        print_results(results)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        benchmark.db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
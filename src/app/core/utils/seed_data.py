@@ -0,0 +1,473 @@
+import argparse
+import io
+import math
+import random
+import sys
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from app.core.database.connection import DatabaseConnection
+from app.core.services.auth_service import AuthService
+
+# Объёмы для замеров: clients, transactions (счетов в среднем ~1.8 на клиента)
+SCALES = {
+    "small": (1_000, 100_000),
+    "medium": (10_000, 1_000_000),
+    "large": (100_000, 10_000_000),
+}
+
+FIRST_NAMES = [
+    "Иван", "Пётр", "Сергей", "Алексей", "Дмитрий", "Андрей", "Михаил", "Олег",
+    "Анна", "Мария", "Елена", "Ольга", "Наталья", "Татьяна", "Ирина", "Светлана",
+]
+LAST_NAMES = [
+    "Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев",
+    "Соколов", "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев",
+    "Лебедев", "Семёнов", "Егоров", "Павлов", "Козлов", "Степанов", "Николаев",
+    "Орлов", "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев", "Соловьёв",
+]
+DESCRIPTIONS = [
+    "Перевод", "Оплата услуг", "Оплата покупки", "Перевод на сберегательный счет",
+    "Кредитный платеж", "Возврат долга", "Пополнение", "Зарплата",
+]
+
+ACCOUNTS_PER_CLIENT = ([1, 2, 3, 4], [50, 30, 15, 5])
+ACCOUNT_TYPES = (["checking", "savings", "credit"], [60, 30, 10])
+CURRENCIES = (["RUB", "USD", "EUR"], [95, 3, 2])
+STATUSES = (["completed", "pending", "failed"], [980, 15, 5])
+DEPOSIT_SHARE = 0.2
+
+# Сезонность: декабрь и предпраздничные месяцы выше, лето и январь ниже
+MONTH_FACTORS = [0.8, 0.85, 1.0, 0.95, 1.05, 0.9, 0.85, 0.9, 1.0, 1.05, 1.15, 1.45]
+# Пн..Вс
+WEEKDAY_FACTORS = [1.05, 1.0, 1.0, 1.05, 1.2, 0.85, 0.6]
+# Часы суток: ночью почти пусто, пики в обед и вечером
+HOUR_WEIGHTS = [
+    1, 1, 1, 1, 1, 2, 4, 8, 14, 18, 20, 21,
+    24, 22, 20, 19, 19, 21, 23, 22, 17, 12, 7, 3,
+]
+# Рост числа операций за период (первый месяц относительно последнего)
+GROWTH_START = 0.7
+
+PARETO_ALPHA = 1.16  # «правило 80/20» для оборотов по счетам
+
+COPY_BATCH_ROWS = 50_000
+
+
+class DataGenerator:
+    """Синтетические clients, auth, accounts и transactions для замеров.
+
+    Результат определяется параметрами и seed (и датой end): один и тот же
+    набор получается при каждом запуске на пустой базе (--truncate).
+    Загрузка идёт через COPY одной транзакцией, триггеры пользователя на
+    время загрузки отключаются, после неё пересчитываются остатки и
+    дневная история (account_daily_balances).
+
+    Распределения:
+    - число операций по счетам — степенное (веса Парето), небольшая доля
+      счетов даёт большую часть оборота;
+    - даты — по месяцам, дням недели и часам (MONTH_FACTORS и др.) с
+      ростом к концу периода; id растут вместе с датой, как в живой базе.
+    """
+
+    def __init__(
+        self,
+        clients: int,
+        transactions: int,
+        months: int = 24,
+        end: date = None,
+        seed: int = 42,
+        password: str = "password",
+        db: DatabaseConnection = None,
+    ):
+        self.clients = clients
+        self.transactions = transactions
+        self.months = months
+        # По умолчанию история заканчивается вчера: без операций «из будущего»
+        self.end = end or date.today() - timedelta(days=1)
+        self.start = self.end - timedelta(days=round(months * 30.44))
+        self.seed = seed
+        self.password = password
+        self.db = db or DatabaseConnection()
+        self.rng = random.Random(seed)
+
+    def run(self, truncate: bool = False):
+        with self.db.transaction() as conn:
+            with conn.cursor() as cursor:
+                if truncate:
+                    self._truncate(cursor)
+                cursor.execute(
+                    "ALTER TABLE clients DISABLE TRIGGER USER;"
+                    "ALTER TABLE accounts DISABLE TRIGGER USER;"
+                    "ALTER TABLE transactions DISABLE TRIGGER USER;"
+                )
+
+                client_ids = self._load_clients(cursor)
+                accounts = self._load_accounts(cursor, client_ids)
+                if self._function_exists(cursor, "ensure_transactions_partitions"):
+                    cursor.execute(
+                        "SELECT ensure_transactions_partitions(3, %s)", (self.start,)
+                    )
+                deltas = self._load_transactions(cursor, accounts)
+                self._apply_balances(cursor, deltas)
+
+                cursor.execute(
+                    "ALTER TABLE clients ENABLE TRIGGER USER;"
+                    "ALTER TABLE accounts ENABLE TRIGGER USER;"
+                    "ALTER TABLE transactions ENABLE TRIGGER USER;"
+                )
+                if self._function_exists(cursor, "rebuild_account_daily_balances"):
+                    self._timed(
+                        "account_daily_balances",
+                        lambda: cursor.execute(
+                            "SELECT rebuild_account_daily_balances(%s)",
+                            ([account_id for account_id, _ in accounts],),
+                        ),
+                    )
+
+        # Статистика планировщика — отдельной транзакцией после загрузки
+        with self.db.transaction() as conn:
+            with conn.cursor() as cursor:
+                for table in ("clients", "auth", "accounts", "transactions"):
+                    cursor.execute(f"ANALYZE {table}")
+                cursor.execute("SELECT to_regclass('account_daily_balances')")
+                if cursor.fetchone()[0]:
+                    cursor.execute("ANALYZE account_daily_balances")
+
+    def _truncate(self, cursor):
+        # Администраторы не привязаны к клиентам и переживают очистку
+        cursor.execute(
+            """
+            CREATE TEMP TABLE seed_admins ON COMMIT DROP AS
+            SELECT login, password_hash, role FROM auth WHERE client_id IS NULL
+            """
+        )
+        # Таблицы из миграций, которых может не быть на старой базе
+        extra = ""
+        for table in ("account_daily_balances", "idempotency_keys"):
+            cursor.execute("SELECT to_regclass(%s)", (table,))
+            if cursor.fetchone()[0]:
+                extra += f", {table}"
+        cursor.execute(
+            f"TRUNCATE transactions{extra}, accounts, auth, clients RESTART IDENTITY"
+        )
+        cursor.execute(
+            "INSERT INTO auth (login, password_hash, role) "
+            "SELECT login, password_hash, role FROM seed_admins"
+        )
+
+    def _load_clients(self, cursor) -> list:
+        base = self._next_id(cursor, "clients")
+        client_ids = list(range(base, base + self.clients))
+        rng = self.rng
+        password_hash = AuthService().hash_password(self.password)
+
+        def client_rows():
+            for client_id in client_ids:
+                first_name = rng.choice(FIRST_NAMES)
+                last_name = rng.choice(LAST_NAMES)
+                if first_name[-1] == "а":
+                    last_name += "а"
+                created = datetime.combine(
+                    self.start - timedelta(days=rng.randint(30, 1500)),
+                    datetime.min.time(),
+                )
+                yield (
+                    client_id,
+                    first_name,
+                    last_name,
+                    f"{4000000000 + client_id:010d}",
+                    f"+79{rng.randint(0, 999999999):09d}",
+                    f"client{client_id}@example.com",
+                    created,
+                    created,
+                )
+
+        self._timed(
+            "clients",
+            lambda: self._copy(
+                cursor,
+                "clients",
+                (
+                    "id", "first_name", "last_name", "passport_number",
+                    "phone_number", "email", "created_at", "updated_at",
+                ),
+                client_rows(),
+            ),
+        )
+        self._timed(
+            "auth",
+            lambda: self._copy(
+                cursor,
+                "auth",
+                ("login", "password_hash", "role", "client_id"),
+                (
+                    (f"client{client_id}@example.com", password_hash, "user", client_id)
+                    for client_id in client_ids
+                ),
+            ),
+        )
+        self._sync_sequence(cursor, "clients")
+        return client_ids
+
+    def _load_accounts(self, cursor, client_ids: list) -> list:
+        """Возвращает [(id, opened_date)]."""
+        rng = self.rng
+        next_id = self._next_id(cursor, "accounts")
+        accounts = []
+        rows = []
+        for client_id in client_ids:
+            count = rng.choices(*ACCOUNTS_PER_CLIENT)[0]
+            for _ in range(count):
+                account_type = rng.choices(*ACCOUNT_TYPES)[0]
+                opened = self.start - timedelta(days=rng.randint(0, 1500))
+                # Начальный остаток; кредитные счета уходят в минус
+                balance = round(rng.lognormvariate(10, 1.2), 2)
+                if account_type == "credit":
+                    balance = -balance
+                created = datetime.combine(opened, datetime.min.time())
+                rows.append(
+                    (
+                        next_id,
+                        client_id,
+                        f"40817810{next_id:012d}",
+                        account_type,
+                        f"{balance:.2f}",
+                        rng.choices(*CURRENCIES)[0],
+                        opened,
+                        "t",
+                        created,
+                        created,
+                    )
+                )
+                accounts.append((next_id, opened))
+                next_id += 1
+
+        self._timed(
+            "accounts",
+            lambda: self._copy(
+                cursor,
+                "accounts",
+                (
+                    "id", "client_id", "account_number", "account_type", "balance",
+                    "currency", "opened_date", "is_active", "created_at", "updated_at",
+                ),
+                rows,
+            ),
+        )
+        self._sync_sequence(cursor, "accounts")
+        return accounts
+
+    def _load_transactions(self, cursor, accounts: list) -> dict:
+        """Возвращает изменение остатка по каждому счёту."""
+        rng = self.rng
+        account_ids = [account_id for account_id, _ in accounts]
+        cum_weights = list(
+            accumulate(rng.paretovariate(PARETO_ALPHA) for _ in account_ids)
+        )
+        cum_hours = list(accumulate(HOUR_WEIGHTS))
+        deltas = {}
+
+        def pick_account():
+            return account_ids[
+                bisect_right(cum_weights, rng.random() * cum_weights[-1])
+            ]
+
+        def transaction_rows():
+            for day, count in self._daily_counts():
+                moments = sorted(
+                    (
+                        bisect_right(cum_hours, rng.random() * cum_hours[-1]),
+                        rng.randrange(3600),
+                    )
+                    for _ in range(count)
+                )
+                for hour, seconds in moments:
+                    moment = datetime(day.year, day.month, day.day, hour) + timedelta(
+                        seconds=seconds
+                    )
+                    amount = round(rng.lognormvariate(8, 1.3) + 1, 2)
+                    status = rng.choices(*STATUSES)[0]
+                    to_id = pick_account()
+                    if rng.random() < DEPOSIT_SHARE:
+                        from_id = None
+                        transaction_type = "deposit"
+                    else:
+                        from_id = pick_account()
+                        while from_id == to_id and len(account_ids) > 1:
+                            from_id = pick_account()
+                        transaction_type = "transfer"
+
+                    if status == "completed":
+                        deltas[to_id] = deltas.get(to_id, 0) + amount
+                        if from_id is not None:
+                            deltas[from_id] = deltas.get(from_id, 0) - amount
+
+                    yield (
+                        from_id,
+                        to_id,
+                        f"{amount:.2f}",
+                        transaction_type,
+                        rng.choice(DESCRIPTIONS),
+                        moment,
+                        status,
+                        moment,
+                    )
+
+        self._timed(
+            "transactions",
+            lambda: self._copy(
+                cursor,
+                "transactions",
+                (
+                    "from_account_id", "to_account_id", "amount", "transaction_type",
+                    "description", "transaction_date", "status", "created_at",
+                ),
+                transaction_rows(),
+            ),
+        )
+        return deltas
+
+    def _daily_counts(self):
+        """(день, число операций) — сумма по всем дням равна self.transactions."""
+        days = [
+            self.start + timedelta(days=offset)
+            for offset in range((self.end - self.start).days + 1)
+        ]
+        span = max(len(days) - 1, 1)
+        weights = [
+            MONTH_FACTORS[day.month - 1]
+            * WEEKDAY_FACTORS[day.weekday()]
+            * (GROWTH_START + (1 - GROWTH_START) * index / span)
+            for index, day in enumerate(days)
+        ]
+        total_weight = sum(weights)
+        # Накопленное округление: без потерь и перекоса к отдельным дням
+        issued = 0
+        running = 0.0
+        for day, weight in zip(days, weights):
+            running += weight
+            target = math.floor(self.transactions * running / total_weight + 0.5)
+            yield day, target - issued
+            issued = target
+
+    def _apply_balances(self, cursor, deltas: dict):
+        cursor.execute(
+            "CREATE TEMP TABLE seed_balance_deltas "
+            "(account_id INTEGER, delta NUMERIC(15, 2)) ON COMMIT DROP"
+        )
+        self._copy(
+            cursor,
+            "seed_balance_deltas",
+            ("account_id", "delta"),
+            ((account_id, f"{delta:.2f}") for account_id, delta in deltas.items()),
+        )
+        cursor.execute(
+            """
+            UPDATE accounts a
+            SET balance = a.balance + d.delta
+            FROM seed_balance_deltas d
+            WHERE a.id = d.account_id
+            """
+        )
+
+    def _copy(self, cursor, table: str, columns: tuple, rows) -> int:
+        query = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        total = 0
+        buffer = io.StringIO()
+        batch = 0
+        for row in rows:
+            buffer.write("\t".join(_copy_value(value) for value in row))
+            buffer.write("\n")
+            batch += 1
+            if batch == COPY_BATCH_ROWS:
+                buffer.seek(0)
+                cursor.copy_expert(query, buffer)
+                total += batch
+                buffer = io.StringIO()
+                batch = 0
+        if batch:
+            buffer.seek(0)
+            cursor.copy_expert(query, buffer)
+            total += batch
+        return total
+
+    def _timed(self, name: str, action):
+        started = time.monotonic()
+        result = action()
+        rows = f": {result} строк" if isinstance(result, int) else ""
+        print(f"[INFO] {name}{rows} за {time.monotonic() - started:.1f} s")
+        return result
+
+    def _next_id(self, cursor, table: str) -> int:
+        cursor.execute(f"SELECT COALESCE(max(id), 0) + 1 FROM {table}")
+        return cursor.fetchone()[0]
+
+    def _sync_sequence(self, cursor, table: str):
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT COALESCE(max(id), 1) FROM {table}))"
+        )
+
+    def _function_exists(self, cursor, name: str) -> bool:
+        cursor.execute("SELECT to_regproc(%s) IS NOT NULL", (name,))
+        return cursor.fetchone()[0]
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    return str(value)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Генерация синтетических данных для замеров производительности"
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), help="готовый объём")
+    parser.add_argument("--clients", type=int, help="число клиентов")
+    parser.add_argument("--transactions", type=int, help="число транзакций")
+    parser.add_argument("--months", type=int, default=24, help="глубина истории")
+    parser.add_argument(
+        "--end", type=date.fromisoformat, help="последний день истории (YYYY-MM-DD)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="password", help="пароль клиентов")
+    parser.add_argument(
+        "--truncate", action="store_true", help="очистить таблицы перед загрузкой"
+    )
+    args = parser.parse_args(argv)
+
+    clients, transactions = SCALES[args.scale or "small"]
+    generator = DataGenerator(
+        args.clients or clients,
+        args.transactions if args.transactions is not None else transactions,
+        months=args.months,
+        end=args.end,
+        seed=args.seed,
+        password=args.password,
+    )
+    try:
+        started = time.monotonic()
+        generator.run(truncate=args.truncate)
+        print(f"✅ Seed done in {time.monotonic() - started:.1f} s")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        generator.db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
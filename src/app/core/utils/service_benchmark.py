@@ -0,0 +1,380 @@
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from app.core.database.connection import DatabaseConnection
+from app.core.database.cursor import round_trips
+from app.core.database.instrumentation import action, query_stats
+from app.core.services.auth_service import AuthService
+from app.core.services.cache import invalidate_all
+from app.core.services.client_service import ClientService
+from app.core.services.data_service import DataService
+from app.core.services.transaction_service import TransactionService
+from app.core.utils.seed_data import SCALES, DataGenerator
+
+# Рост p50/p95 сильнее порога считается регрессией, если разница заметна
+# и в абсолютных числах (короткие запросы шумят)
+REGRESSION_THRESHOLD = 0.2
+REGRESSION_MIN_DELTA_MS = 1.0
+
+
+class ServiceBenchmark:
+    """Замеры горячих путей сервисного слоя на локальной базе.
+
+    Для каждого сценария: p50/p95/p99 задержки, пропускная способность
+    и число обращений к серверу на операцию (InstrumentedCursor). Переводы
+    выполняются туда и обратно на 1.00, остатки счетов не меняются.
+    """
+
+    def __init__(self, password: str = "password"):
+        self.password = password
+        self.db = DatabaseConnection()
+        self.data_service = DataService()
+        self.transactions = TransactionService()
+        self.clients = ClientService()
+        self.auth = AuthService()
+
+    def _pick(self) -> dict:
+        """Параметры сценариев на текущих данных: самый активный клиент и т.п."""
+        with self.db.checkout() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT a.client_id
+                    FROM accounts a
+                    JOIN (
+                        SELECT to_account_id FROM transactions
+                        GROUP BY to_account_id ORDER BY count(*) DESC LIMIT 1
+                    ) busiest ON busiest.to_account_id = a.id
+                    """
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    raise RuntimeError(
+                        "Нет данных: загрузите их через app.core.utils.seed_data"
+                    )
+                client_id = row[0]
+                cursor.execute(
+                    """
+                    SELECT c.first_name, c.last_name, au.login
+                    FROM clients c LEFT JOIN auth au ON au.client_id = c.id
+                    WHERE c.id = %s LIMIT 1
+                    """,
+                    (client_id,),
+                )
+                first_name, last_name, login = cursor.fetchone()
+                cursor.execute(
+                    """
+                    SELECT id FROM accounts
+                    WHERE balance > 1000 AND is_active AND currency = 'RUB'
+                    ORDER BY balance DESC LIMIT 2
+                    """
+                )
+                transfer_accounts = [row[0] for row in cursor.fetchall()]
+
+        today = date.today()
+        month_index = today.year * 12 + today.month - 12
+        return {
+            "client_id": client_id,
+            "full_name": f"{first_name} {last_name}",
+            "partial_name": last_name[:4],
+            "login": login,
+            "transfer_accounts": transfer_accounts,
+            "summary_from": date(month_index // 12, month_index % 12 + 1, 1),
+        }
+
+    def cases(self) -> dict:
+        """{имя: функция(i)}; функция возвращает ложное значение при неудаче."""
+        p = self._pick()
+        client_id = p["client_id"]
+        data = self.data_service
+
+        def client_transactions(i):
+            return self.transactions.get_client_transactions(client_id) is not None
+
+        def transactions_page(i):
+            page = data.get_transactions_page(client_id=client_id)
+            if page.next_cursor:
+                data.get_transactions_page(client_id=client_id, after=page.next_cursor)
+            return bool(page.items)
+
+        def monthly_summary(i):
+            return bool(
+                data.get_monthly_summary(client_id, date_from=p["summary_from"])["months"]
+            )
+
+        def search_by_name(i):
+            return self.clients.search_clients_by_name(p["full_name"]) is not None
+
+        def search_partial(i):
+            return data.search_clients(p["partial_name"]) is not None
+
+        def clients_page(i):
+            return bool(data.get_clients_page().items)
+
+        def accounts_page(i):
+            return bool(data.get_accounts_page(client_id=client_id).items)
+
+        def login(i):
+            # Те же шаги, что AuthController.authenticate
+            user = self.auth.authenticate(p["login"], self.password)
+            if not user:
+                return False
+            return self.clients.get_client_by_id(user.client_id) is not None
+
+        cases = {
+            "get_client_transactions": client_transactions,
+            "get_transactions_page": transactions_page,
+            "get_monthly_summary": monthly_summary,
+            "search_clients_by_name": search_by_name,
+            "search_clients_partial": search_partial,
+            "get_clients_page": clients_page,
+            "get_accounts_page": accounts_page,
+        }
+        if p["login"]:
+            cases["login"] = login
+
+        if len(p["transfer_accounts"]) == 2:
+            first, second = p["transfer_accounts"]
+
+            def make_transfer(i):
+                source, target = (first, second) if i % 2 == 0 else (second, first)
+                return data.make_transfer(source, target, 1.0, "benchmark")
+
+            cases["make_transfer"] = make_transfer
+
+            def deposit(i):
+                # Чтение счёта и проводка с ключом, затем списание обратно
+                key = uuid.uuid4().hex
+                if i % 2 == 0:
+                    return data.deposit_to_account(first, 1.0, key)
+                return data.make_manual_transaction(
+                    first, None, 1.0, "benchmark", idempotency_key=key
+                )
+
+            cases["deposit_to_account"] = deposit
+        return cases
+
+    def measure(
+        self, func, iterations: int, warmup: int = 3, concurrency: int = 1
+    ) -> dict:
+        for i in range(warmup):
+            func(i)
+
+        def one(i):
+            trips = round_trips()
+            started = time.perf_counter()
+            try:
+                ok = bool(func(i))
+            except Exception as e:
+                print(f"[ERROR] {e}")
+                ok = False
+            elapsed = time.perf_counter() - started
+            trips = round_trips() - trips
+            if concurrency > 1:
+                # Как в фоновых загрузчиках: соединение возвращается в пул
+                self.db.release()
+            return elapsed, trips, ok
+
+        timeouts = self.db.pool_stats()["timeouts"]
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(concurrency) as executor:
+                samples = list(executor.map(one, range(iterations)))
+        else:
+            samples = [one(i) for i in range(iterations)]
+        wall = time.perf_counter() - started
+
+        latencies = sorted(sample[0] * 1000 for sample in samples)
+        return {
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": sum(latencies) / len(latencies),
+            "max_ms": latencies[-1],
+            "throughput_ops": iterations / wall if wall else 0.0,
+            "round_trips": sum(sample[1] for sample in samples) / iterations,
+            "failures": sum(1 for sample in samples if not sample[2]),
+            # Потоку не хватило соединения: при concurrency = DB_POOL_MAX_SIZE
+            # это значит, что операция держит больше одного соединения
+            "pool_timeouts": self.db.pool_stats()["timeouts"] - timeouts,
+        }
+
+    def run(
+        self,
+        iterations: int = 50,
+        concurrency: int = 1,
+        only: list = None,
+    ) -> dict:
+        results = {}
+        for name, func in self.cases().items():
+            if only and name not in only:
+                continue
+            # Кэш сущностей сбрасывается, чтобы сценарии не зависели от порядка
+            invalidate_all()
+            # bcrypt медленный по замыслу: для входа хватает меньшего числа итераций
+            count = max(5, iterations // 5) if name == "login" else iterations
+
+            def traced(i, func=func, name=name):
+                with action(name):
+                    return func(i)
+
+            results[name] = self.measure(traced, count, concurrency=concurrency)
+            print_case(name, results[name])
+        return results
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def print_case(name: str, r: dict):
+    print(
+        f"{name:<26} p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  "
+        f"p99 {r['p99_ms']:>8.2f} ms  {r['throughput_ops']:>8.1f} op/s  "
+        f"{r['round_trips']:>6.1f} rt/op"
+        + (f"  ошибок: {r['failures']}" if r["failures"] else "")
+        + (f"  таймаутов пула: {r['pool_timeouts']}" if r.get("pool_timeouts") else "")
+    )
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """Список регрессий [(масштаб, сценарий, метрика, было, стало)]."""
+    regressions = []
+    for scale, cases in current["scales"].items():
+        base_cases = baseline["scales"].get(scale, {})
+        for name, r in cases.items():
+            old = base_cases.get(name)
+            if old is None:
+                continue
+            print(
+                f"{scale:<8} {name:<26} p50 {old['p50_ms']:>8.2f} → {r['p50_ms']:>8.2f}  "
+                f"p95 {old['p95_ms']:>8.2f} → {r['p95_ms']:>8.2f} ms  "
+                f"rt {old['round_trips']:.1f} → {r['round_trips']:.1f}"
+            )
+            for metric in ("p50_ms", "p95_ms"):
+                before, after = old[metric], r[metric]
+                if (
+                    after > before * (1 + REGRESSION_THRESHOLD)
+                    and after - before > REGRESSION_MIN_DELTA_MS
+                ):
+                    regressions.append((scale, name, metric, before, after))
+            # Лишние обращения к серверу — регрессия при любом времени
+            if r["round_trips"] > old["round_trips"] + 0.5:
+                regressions.append(
+                    (scale, name, "round_trips", old["round_trips"], r["round_trips"])
+                )
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Замеры сервисного слоя: задержки, пропускная способность, "
+        "обращения к серверу"
+    )
+    parser.add_argument(
+        "--scales",
+        help="через запятую: "
+        + ", ".join(sorted(SCALES))
+        + ". Перед каждым масштабом база ОЧИЩАЕТСЯ и заполняется заново; "
+        "без параметра замеры идут на текущих данных",
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1, help="число потоков")
+    parser.add_argument("--only", help="сценарии через запятую")
+    parser.add_argument("--password", default="password", help="пароль клиентов")
+    parser.add_argument("--seed", type=int, default=42, help="seed генератора данных")
+    parser.add_argument("--out", help="сохранить результат в JSON")
+    parser.add_argument("--baseline", help="сравнить с сохранённым результатом")
+    args = parser.parse_args(argv)
+
+    scales = args.scales.split(",") if args.scales else [None]
+    only = args.only.split(",") if args.only else None
+    try:
+        unknown = [s for s in scales if s is not None and s not in SCALES]
+        if unknown:
+            raise ValueError(f"Неизвестный масштаб: {', '.join(unknown)}")
+
+        results = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "scales": {},
+            # Самые затратные запросы каждого масштаба (instrumentation.py)
+            "queries": {},
+        }
+        benchmark = ServiceBenchmark(args.password)
+        for scale in scales:
+            if scale is not None:
+                clients, transactions = SCALES[scale]
+                print(f"[INFO] Загрузка данных «{scale}»")
+                DataGenerator(
+                    clients, transactions, seed=args.seed, password=args.password
+                ).run(truncate=True)
+            label = scale or "current"
+            print(f"— {label}")
+            query_stats.reset()
+            results["scales"][label] = benchmark.run(
+                args.iterations, args.concurrency, only
+            )
+            results["queries"][label] = query_stats.snapshot()["queries"][:20]
+
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+        starved = [
+            (scale, name)
+            for scale, cases in results["scales"].items()
+            for name, r in cases.items()
+            if r["pool_timeouts"]
+        ]
+        if starved:
+            for scale, name in starved:
+                print(f"❌ {scale}/{name}: потокам не хватило соединений пула")
+            return 1
+
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+            regressions = compare(baseline, results)
+            if regressions:
+                for scale, name, metric, before, after in regressions:
+                    print(f"❌ {scale}/{name}: {metric} {before:.2f} → {after:.2f}")
+                return 1
+            print("✅ Регрессий нет")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if DatabaseConnection._instance is not None:
+            DatabaseConnection().close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 from pathlib import Path
 import sys
 from PyQt6.QtWidgets import QApplication
+from app.api.client import check_connection, remote_mode
 from app.core.config import AppConfig
 from app.ui.views.auth_window import AuthWindow
 
@@ -8,6 +9,8 @@ from app.ui.views.auth_window import AuthWindow
 def main():
     try:
         AppConfig.validate()
+        if remote_mode():
+            check_connection()
 
         app = QApplication(sys.argv)
         window = AuthWindow()
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QTableView
-from app.ui.utils.base_table_model import BaseTableModel
+from app.ui.utils.paged_table_model import PagedTableModel
 from app.ui.controllers.base_controller import BaseController
 from app.core.database.models import Account
 from typing import Optional
@@ -7,38 +7,38 @@ from typing import Optional
 
 class AccountController(BaseController):
     def load_client_accounts(self, client_id: int, table_view: QTableView):
-        accounts = self.data_service.get_client_accounts(client_id)
-        data = []
-        for account in accounts:
-            data.append(
-                [
-                    account.id,
-                    account.account_number,
-                    account.account_type,
-                    f"{account.balance:.2f}",
-                    account.currency,
-                    account.opened_date.strftime("%Y-%m-%d"),
-                    "Да" if account.is_active else "Нет",
-                    account.created_at.strftime("%Y-%m-%d %H:%M"),
-                    account.updated_at.strftime("%Y-%m-%d %H:%M"),
-                ]
-            )
-        headers = [
-            "ID",
-            "Номер счета",
-            "Тип",
-            "Баланс",
-            "Валюта",
-            "Дата открытия",
-            "Активен",
-            "Создан",
-            "Обновлен",
+        columns = [
+            ("ID", lambda a: a.id),
+            ("Номер счета", lambda a: a.account_number),
+            ("Тип", lambda a: a.account_type),
+            ("Баланс", lambda a: f"{a.balance:.2f}"),
+            ("Валюта", lambda a: a.currency),
+            ("Дата открытия", lambda a: a.opened_date.strftime("%Y-%m-%d")),
+            ("Активен", lambda a: "Да" if a.is_active else "Нет"),
+            ("Создан", lambda a: a.created_at.strftime("%Y-%m-%d %H:%M")),
+            ("Обновлен", lambda a: a.updated_at.strftime("%Y-%m-%d %H:%M")),
         ]
-        table_view.setModel(BaseTableModel(data, headers))
+        table_view.setModel(
+            PagedTableModel(
+                lambda after, limit: self.data_service.get_accounts_page(
+                    client_id, after=after, limit=limit
+                ),
+                columns,
+                loader=self.loader,
+                key="accounts",
+                fetch_items=lambda ids: [
+                    a
+                    for a in self.data_service.get_accounts_by_ids(ids).values()
+                    if a.client_id == client_id
+                ],
+                sort_key=lambda a: (a.opened_date, a.id),
+                descending=True,
+            )
+        )
 
     def select_account(self, client_id: int, account_id: int) -> Optional[Account]:
-        accounts = self.data_service.get_client_accounts(client_id)
-        return next((a for a in accounts if a.id == account_id), None)
+        account = self.data_service.get_account_by_id(account_id)
+        return account if account and account.client_id == client_id else None
 
     def add_account(self, client_id: int, **data) -> bool:
         try:
@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtCore import QObject, pyqtSignal
-from app.core.services.data_service import DataService
+from app.api.client import create_data_service
+from app.ui.utils.async_loader import AsyncLoader
 
 
 class AdminController(QObject):
@@ -8,7 +9,8 @@ class AdminController(QObject):
 
     def __init__(self):
         super().__init__()
-        self.data_service = DataService()
+        self.data_service = create_data_service()
+        self.loader = AsyncLoader(self)
         self.client_id = None
 
     def show_error(self, message: str):
@@ -138,10 +140,11 @@ class AdminController(QObject):
         client_id: int = None,
         account_id: int = None,
         transaction_type: str = None,
+        date_from=None,
     ):
         try:
             return self.data_service.get_monthly_summary(
-                client_id, account_id, transaction_type
+                client_id, account_id, transaction_type, date_from=date_from
             )
         except Exception as e:
             self.show_error(f"Ошибка при формировании ежемесячной статистики: {e}")
@@ -1,4 +1,5 @@
 from typing import Optional
+from app.api.client import RemoteAuthService, RemoteDataService, remote_mode
 from app.core.services.auth_service import AuthService
 from app.core.services.client_service import ClientService
 from app.ui.utils.app_storage import AppStorage
@@ -6,12 +7,16 @@ from app.ui.utils.app_storage import AppStorage
 
 class AuthController:
     def __init__(self):
-        self.auth_service = AuthService()
-        self.client_service = ClientService()
+        if remote_mode():
+            self.auth_service = RemoteAuthService()
+            self.client_service = RemoteDataService()
+        else:
+            self.auth_service = AuthService()
+            self.client_service = ClientService()
 
     def authenticate(self, login: str, password: str) -> Optional[str]:
-        user = self.auth_service.get_user_by_login(login)
-        if user and self.auth_service.verify_password(password, user.password_hash):
+        user = self.auth_service.authenticate(login, password)
+        if user:
             AppStorage.current_account = user
             if user.client_id:
                 AppStorage.current_client = self.client_service.get_client_by_id(
@@ -23,8 +28,10 @@ class AuthController:
     def register(self, login: str, password: str, role: str = "user") -> Optional[int]:
         return self.auth_service.register_user(login, password, role)
 
+    def register_client(
+        self, login: str, password: str, **client_data
+    ) -> Optional[int]:
+        return self.auth_service.register_client(login, password, "user", **client_data)
+
     def create_client_for_user(self, auth_id: int, **client_data) -> bool:
-        if self.client_service.add_client(**client_data):
-            client_id = self.client_service.get_client_by_email(client_data["email"]).id
-            return self.auth_service.link_client_to_auth(auth_id, client_id)
-        return False
+        return self.auth_service.create_client_for_user(auth_id, **client_data)
@@ -1,6 +1,7 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
-from app.core.services.data_service import DataService
+from app.api.client import create_data_service
+from app.ui.utils.async_loader import AsyncLoader
 
 
 class BaseController(QObject):
@@ -8,7 +9,8 @@ class BaseController(QObject):
 
     def __init__(self):
         super().__init__()
-        self.data_service = DataService()
+        self.data_service = create_data_service()
+        self.loader = AsyncLoader(self)
 
     def show_error(self, message: str):
         msg = QMessageBox()
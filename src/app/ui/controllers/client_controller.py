@@ -1,37 +1,33 @@
 from app.ui.controllers.base_controller import BaseController
 from app.core.database.models import Client
 from typing import Optional
-from app.ui.utils.base_table_model import BaseTableModel
+from app.ui.utils.paged_table_model import PagedTableModel
 
 
 class ClientController(BaseController):
     def load_clients(self, table_view):
-        clients = self.data_service.get_all_clients()
-        data = []
-        for client in clients:
-            data.append(
-                [
-                    client.id,
-                    client.last_name,
-                    client.first_name,
-                    client.passport_number,
-                    client.phone_number or "",
-                    client.email or "",
-                    client.created_at.strftime("%Y-%m-%d %H:%M"),
-                    client.updated_at.strftime("%Y-%m-%d %H:%M"),
-                ]
-            )
-        headers = [
-            "ID",
-            "Фамилия",
-            "Имя",
-            "Паспорт",
-            "Телефон",
-            "Email",
-            "Создан",
-            "Обновлен",
+        columns = [
+            ("ID", lambda c: c.id),
+            ("Фамилия", lambda c: c.last_name),
+            ("Имя", lambda c: c.first_name),
+            ("Паспорт", lambda c: c.passport_number),
+            ("Телефон", lambda c: c.phone_number or ""),
+            ("Email", lambda c: c.email or ""),
+            ("Создан", lambda c: c.created_at.strftime("%Y-%m-%d %H:%M")),
+            ("Обновлен", lambda c: c.updated_at.strftime("%Y-%m-%d %H:%M")),
         ]
-        table_view.setModel(BaseTableModel(data, headers))
+        table_view.setModel(
+            PagedTableModel(
+                self.data_service.get_clients_page,
+                columns,
+                loader=self.loader,
+                key="clients",
+                fetch_items=lambda ids: list(
+                    self.data_service.get_clients_by_ids(ids).values()
+                ),
+                sort_key=lambda c: (c.last_name, c.first_name, c.id),
+            )
+        )
 
     def select_client(self, client_id: int) -> Optional[Client]:
         return self.data_service.get_client_by_id(client_id)
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QTableView
-from app.ui.utils.base_table_model import BaseTableModel
+from app.ui.utils.paged_table_model import PagedTableModel
 from app.ui.controllers.base_controller import BaseController
 from app.core.database.models import Transaction, Account
 from typing import Optional, List
@@ -39,57 +39,44 @@ class TransactionController(BaseController):
         accounts: List[Account] = None,
     ) -> str:
         if account_id:
-            transactions = self.data_service.get_account_transactions(account_id)
-            account = next((a for a in accounts if a.id == account_id), None)
+            account = next((a for a in accounts or [] if a.id == account_id), None)
             description = (
                 f"Транзакции счета: {account.account_number}"
                 if account
                 else "Транзакции счета"
             )
         elif client_id:
-            transactions = self.data_service.get_client_transactions(client_id)
             description = "Все транзакции клиента"
         else:
-            transactions = self.data_service.get_all_transactions()
             description = "Все транзакции"
 
-        if not accounts:
-            accounts = (
-                self.data_service.get_client_accounts(client_id) if client_id else []
-            )
-
-        data = []
-        for t in transactions:
-            from_acc = next(
-                (a for a in accounts if a and a.id == t.from_account_id), None
-            )
-            to_acc = next((a for a in accounts if a and a.id == t.to_account_id), None)
-
-            data.append(
-                [
-                    t.id,
-                    from_acc.account_number if from_acc else "Внесение",
-                    to_acc.account_number if to_acc else "",
-                    f"{t.amount:.2f}",
-                    t.transaction_type,
-                    t.description or "",
-                    t.transaction_date.strftime("%Y-%m-%d %H:%M"),
-                    t.status,
-                    t.created_at.strftime("%Y-%m-%d %H:%M"),
-                ]
-            )
-
-        headers = [
-            "ID",
-            "Отправитель",
-            "Получатель",
-            "Сумма",
-            "Тип",
-            "Описание",
-            "Дата",
-            "Статус",
-            "Создана",
+        columns = [
+            ("ID", lambda t: t.id),
+            ("Отправитель", lambda t: t.from_account_number or "Внесение"),
+            ("Получатель", lambda t: t.to_account_number or ""),
+            ("Сумма", lambda t: f"{t.amount:.2f}"),
+            ("Тип", lambda t: t.transaction_type),
+            ("Описание", lambda t: t.description or ""),
+            ("Дата", lambda t: t.transaction_date.strftime("%Y-%m-%d %H:%M")),
+            ("Статус", lambda t: t.status),
+            ("Создана", lambda t: t.created_at.strftime("%Y-%m-%d %H:%M")),
         ]
-        table_view.setModel(BaseTableModel(data, headers))
+        # Счёт уже задаёт выборку, фильтр по клиенту нужен только без него
+        client_filter = None if account_id else client_id
+        table_view.setModel(
+            PagedTableModel(
+                lambda after, limit: self.data_service.get_transactions_page(
+                    client_filter, account_id, after=after, limit=limit
+                ),
+                columns,
+                loader=self.loader,
+                key="transactions",
+                fetch_items=lambda ids: self.data_service.get_transactions_by_ids(
+                    ids, client_filter, account_id
+                ),
+                sort_key=lambda t: (t.transaction_date, t.id),
+                descending=True,
+            )
+        )
 
         return description
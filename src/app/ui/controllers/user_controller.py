@@ -1,7 +1,9 @@
+import uuid
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
-from app.core.services.data_service import DataService
-from app.ui.utils.base_table_model import BaseTableModel
+from app.api.client import create_data_service
+from app.ui.utils.async_loader import AsyncLoader
+from app.ui.utils.paged_table_model import PagedTableModel
 
 
 class UserController(QObject):
@@ -9,8 +11,19 @@ class UserController(QObject):
 
     def __init__(self):
         super().__init__()
-        self.data_service = DataService()
+        self.data_service = create_data_service()
+        self.loader = AsyncLoader(self)
         self.selected_account_id = None
+        # операция -> (данные формы, ключ идемпотентности)
+        self._pending_keys = {}
+
+    def _idempotency_key(self, operation: str, *request) -> str:
+        """Ключ не меняется, пока операция с теми же данными не проведена:
+        повтор после ошибки или обрыва связи не проведёт её второй раз."""
+        pending = self._pending_keys.get(operation)
+        if pending is None or pending[0] != request:
+            pending = self._pending_keys[operation] = (request, uuid.uuid4().hex)
+        return pending[1]
 
     @pyqtSlot()
     def show_error(self, message: str):
@@ -81,11 +94,15 @@ class UserController(QObject):
                 self.show_error("Счёт получателя не найден")
                 return False
 
+            key = self._idempotency_key(
+                "transfer", from_account_id, to_account.id, amount, description
+            )
             success = self.data_service.make_transfer(
-                from_account_id, to_account.id, amount, description
+                from_account_id, to_account.id, amount, description, key
             )
 
             if success:
+                self._pending_keys.pop("transfer", None)
                 self.data_updated.emit()
 
             return success
@@ -104,8 +121,10 @@ class UserController(QObject):
             return False
 
         try:
-            success = self.data_service.deposit_to_account(account_id, amount)
+            key = self._idempotency_key("deposit", account_id, amount)
+            success = self.data_service.deposit_to_account(account_id, amount, key)
             if success:
+                self._pending_keys.pop("deposit", None)
                 self.data_updated.emit()
             return success
         except Exception as e:
@@ -115,70 +134,32 @@ class UserController(QObject):
     @pyqtSlot()
     def load_transactions(self, table_view, client_id: int = None):
         try:
-            transactions = self.data_service.get_client_transactions(client_id)
-            seen_ids = set()
-            data = []
-
-            for t in transactions:
-                if t.id in seen_ids:
-                    continue
-                seen_ids.add(t.id)
-
-                from_acc = self.data_service.get_account_by_id(t.from_account_id)
-                to_acc = self.data_service.get_account_by_id(t.to_account_id)
-
-                data.append(
-                    [
-                        t.id,
-                        from_acc.account_number if from_acc else "—",
-                        to_acc.account_number if to_acc else "—",
-                        f"{t.amount:.2f}",
-                        t.transaction_type,
-                        t.description or "",
-                        t.transaction_date.strftime("%Y-%m-%d %H:%M"),
-                    ]
-                )
-
-            headers = [
-                "ID",
-                "Отправитель",
-                "Получатель",
-                "Сумма",
-                "Тип",
-                "Описание",
-                "Дата",
+            columns = [
+                ("ID", lambda t: t.id),
+                ("Отправитель", lambda t: t.from_account_number or "—"),
+                ("Получатель", lambda t: t.to_account_number or "—"),
+                ("Сумма", lambda t: f"{t.amount:.2f}"),
+                ("Тип", lambda t: t.transaction_type),
+                ("Описание", lambda t: t.description or ""),
+                ("Дата", lambda t: t.transaction_date.strftime("%Y-%m-%d %H:%M")),
             ]
-            table_view.setModel(BaseTableModel(data, headers))
+            table_view.setModel(
+                PagedTableModel(
+                    lambda after, limit: self.data_service.get_transactions_page(
+                        client_id, after=after, limit=limit
+                    ),
+                    columns,
+                    loader=self.loader,
+                    key="transactions",
+                )
+            )
         except Exception as e:
             self.show_error(f"Ошибка при загрузке транзакций: {str(e)}")
 
     @pyqtSlot()
     def get_transaction_summary(self, client_id: int) -> dict:
         try:
-            transactions = self.data_service.get_client_transactions(client_id)
-            total_income = sum(
-                t.amount
-                for t in transactions
-                if t.to_account_id and t.transaction_type == "deposit"
-            )
-            total_expense = sum(
-                t.amount
-                for t in transactions
-                if t.from_account_id and t.transaction_type == "transfer"
-            )
-            total_transfers = len(
-                [t for t in transactions if t.transaction_type == "transfer"]
-            )
-            total_deposits = len(
-                [t for t in transactions if t.transaction_type == "deposit"]
-            )
-
-            return {
-                "total_income": total_income,
-                "total_expense": total_expense,
-                "total_transfers": total_transfers,
-                "total_deposits": total_deposits,
-            }
+            return self.data_service.get_totals_summary(client_id)
         except Exception as e:
             self.show_error(f"Ошибка при формировании статистики: {str(e)}")
             return {}
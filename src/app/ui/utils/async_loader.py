@@ -0,0 +1,160 @@
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from app.core.config import AppConfig
+from app.core.database.connection import DatabaseConnection
+from app.core.database.instrumentation import action, current_action
+
+_thread_pool = None
+
+
+def query_thread_pool() -> QThreadPool:
+    """Общий пул потоков для запросов к БД.
+
+    Размер на единицу меньше пула соединений: одно соединение остаётся за
+    GUI-потоком, и фоновые задачи не ждут соединение друг за другом.
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = QThreadPool()
+        _thread_pool.setMaxThreadCount(max(1, AppConfig.DB_POOL_MAX_SIZE - 1))
+    return _thread_pool
+
+
+class _WorkerSignals(QObject):
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, str)
+
+
+class _QueryWorker(QRunnable):
+    def __init__(self, key: str, generation: int, fn, args, kwargs, action_name: str):
+        super().__init__()
+        # Временем жизни управляет AsyncLoader (см. _running)
+        self.setAutoDelete(False)
+        self.signals = _WorkerSignals()
+        self.key = key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.action_name = action_name
+        self._lock = threading.Lock()
+        self._connection = None
+        self._done = False
+
+    def run(self):
+        # В удалённом режиме (API_URL) запросы идут через API, соединения с БД нет
+        db = None if AppConfig.API_URL else DatabaseConnection()
+        try:
+            if db is not None:
+                with self._lock:
+                    self._connection = db.connection
+            with action(self.action_name):
+                result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.key, self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.key, self.generation, result)
+        finally:
+            with self._lock:
+                self._done = True
+                self._connection = None
+            # Потоки пула переиспользуются — соединение возвращаем сразу
+            if db is not None:
+                db.release()
+
+    def cancel(self):
+        """Прерывает выполняющийся запрос на сервере (pg_cancel_backend)."""
+        with self._lock:
+            if not self._done and self._connection is not None:
+                try:
+                    self._connection.cancel()
+                except Exception:
+                    pass
+
+
+class AsyncLoader(QObject):
+    """Выполняет вызовы сервисов в фоне и отдаёт результат в GUI-поток.
+
+    Задачи группируются по ключу (например, "transactions"): новая задача с
+    тем же ключом делает результат предыдущей устаревшим, и он отбрасывается.
+    """
+
+    loading_changed = pyqtSignal(str, bool)
+
+    def __init__(self, parent=None, thread_pool: QThreadPool = None):
+        super().__init__(parent)
+        self._thread_pool = thread_pool or query_thread_pool()
+        self._generations = {}
+        self._pending = {}
+        # Ссылки на запущенные воркеры (и их сигналы) держим до завершения,
+        # даже если их результат уже устарел
+        self._running = {}
+
+    def submit(
+        self,
+        key: str,
+        fn,
+        *args,
+        on_result=None,
+        on_error=None,
+        cancel_previous: bool = False,
+        **kwargs,
+    ):
+        """cancel_previous=True прерывает на сервере ещё выполняющийся запрос
+        предыдущей задачи с тем же ключом (только для задач-чтений)."""
+        if cancel_previous:
+            self._cancel_running(key)
+
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        # Запросы задачи относятся к действию, из которого она запущена,
+        # а без него — к ключу задачи
+        worker = _QueryWorker(
+            key, generation, fn, args, kwargs, current_action() or key
+        )
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.failed.connect(self._on_failed)
+        self._running[(key, generation)] = worker
+        self._pending[key] = (on_result, on_error)
+
+        self.loading_changed.emit(key, True)
+        self._thread_pool.start(worker)
+
+    def _cancel_running(self, key: str):
+        for (running_key, _), worker in self._running.items():
+            if running_key == key:
+                worker.cancel()
+
+    def cancel(self, key: str, interrupt: bool = False):
+        if interrupt:
+            self._cancel_running(key)
+        if key in self._pending:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            del self._pending[key]
+            self.loading_changed.emit(key, False)
+
+    def is_loading(self, key: str = None) -> bool:
+        return key in self._pending if key else bool(self._pending)
+
+    def _take(self, key: str, generation: int):
+        self._running.pop((key, generation), None)
+        if generation != self._generations.get(key) or key not in self._pending:
+            return None
+        on_result, on_error = self._pending.pop(key)
+        self.loading_changed.emit(key, False)
+        return on_result, on_error
+
+    def _on_finished(self, key: str, generation: int, result):
+        callbacks = self._take(key, generation)
+        if callbacks and callbacks[0]:
+            callbacks[0](result)
+
+    def _on_failed(self, key: str, generation: int, message: str):
+        callbacks = self._take(key, generation)
+        if not callbacks:
+            return
+        if callbacks[1]:
+            callbacks[1](message)
+        else:
+            print(f"Ошибка фоновой загрузки ({key}): {message}")
@@ -0,0 +1,98 @@
+from typing import Optional
+
+from PyQt6.QtCore import QModelIndex, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+from PyQt6.QtWidgets import QCompleter, QLineEdit
+
+from app.core.services.client_service import ClientService
+
+
+class ClientSearchEdit(QLineEdit):
+    """Поле выбора клиента для фильтров: поиск вместо полного списка.
+
+    Введённый текст после паузы в наборе уходит в search(text, limit) через
+    loader под ключом `key`, найденные клиенты показываются подсказками.
+    client_changed(id) — клиент выбран из подсказок; client_changed(None) —
+    поле очищено или текст изменён после выбора, фильтр снят («Все»).
+    """
+
+    DEBOUNCE_MS = 300
+    SEARCH_LIMIT = 20
+
+    client_changed = pyqtSignal(object)
+
+    def __init__(self, loader, search, key: str, parent=None):
+        super().__init__(parent)
+        self._loader = loader
+        self._search = search
+        self._key = key
+        self._client_id = None
+
+        self.setPlaceholderText("Все (ФИО, паспорт или email)")
+        self.setClearButtonEnabled(True)
+
+        self._suggestions = QStandardItemModel(self)
+        completer = QCompleter(self._suggestions, self)
+        # Подсказки уже отобраны сервером, повторно по префиксу не фильтруем
+        completer.setCompletionMode(
+            QCompleter.CompletionMode.UnfilteredPopupCompletion
+        )
+        completer.activated[QModelIndex].connect(self._on_activated)
+        self.setCompleter(completer)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._run_search)
+
+        # textEdited — только ввод пользователя, не setText из подсказки
+        self.textEdited.connect(self._on_text_edited)
+        self.textChanged.connect(self._on_text_changed)
+
+    def client_id(self) -> Optional[int]:
+        return self._client_id
+
+    def _set_client(self, client_id: Optional[int]):
+        if client_id != self._client_id:
+            self._client_id = client_id
+            self.client_changed.emit(client_id)
+
+    def _on_text_edited(self, text: str):
+        self._set_client(None)
+        self._timer.start()
+
+    def _on_text_changed(self, text: str):
+        # Кнопка очистки меняет текст без textEdited
+        if not text:
+            self._set_client(None)
+
+    def _run_search(self):
+        text = self.text().strip()
+        if len(text) < ClientService.SEARCH_MIN_LENGTH:
+            self._loader.cancel(self._key, interrupt=True)
+            self._suggestions.clear()
+            return
+
+        self._loader.submit(
+            self._key,
+            self._search,
+            text,
+            limit=self.SEARCH_LIMIT,
+            on_result=self._on_found,
+            cancel_previous=True,
+        )
+
+    def _on_found(self, clients):
+        self._suggestions.clear()
+        for client in clients:
+            item = QStandardItem(
+                f"{client.first_name} {client.last_name} ({client.passport_number})"
+            )
+            item.setData(client.id, Qt.ItemDataRole.UserRole)
+            self._suggestions.appendRow(item)
+        if clients and self.hasFocus() and self._client_id is None:
+            self.completer().complete()
+
+    def _on_activated(self, index: QModelIndex):
+        self.setText(index.data())
+        self._set_client(index.data(Qt.ItemDataRole.UserRole))
@@ -0,0 +1,77 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from app.core.config import AppConfig
+from app.core.database.listener import ChangeListener
+
+
+class LiveUpdates(QObject):
+    """Изменения в БД (свои и других операторов) для открытых окон.
+
+    Уведомления приходят из потока ChangeListener и собираются в пакеты:
+    changed(dict) отдаёт {таблица: множество id}. Если за один пакет
+    изменилось слишком много строк таблицы, вместо множества передаётся None —
+    такую таблицу проще перечитать целиком. resync — события могли потеряться
+    (переподключение), перечитать нужно всё.
+    """
+
+    BATCH_INTERVAL_MS = 200
+    MAX_BATCH_ROWS = 200
+
+    changed = pyqtSignal(dict)
+    resync = pyqtSignal()
+
+    _notified = pyqtSignal(str, int)
+    _resync_requested = pyqtSignal()
+
+    _instance = None
+
+    @classmethod
+    def instance(cls) -> "LiveUpdates":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self._pending = {}
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.BATCH_INTERVAL_MS)
+        self._timer.timeout.connect(self._flush)
+
+        # Сигналы из потока слушателя доставляются в GUI-поток через очередь
+        self._notified.connect(self._on_notified)
+        self._resync_requested.connect(self.resync)
+
+        self._listener = None
+        # В удалённом режиме прямого соединения с БД нет — окна обновляются
+        # полной перезагрузкой
+        if AppConfig.LIVE_UPDATES and not AppConfig.API_URL:
+            self._listener = ChangeListener(
+                lambda table, op, row_id: self._notified.emit(table, row_id),
+                self._resync_requested.emit,
+            )
+            self._listener.start()
+
+    @property
+    def active(self) -> bool:
+        """Если False, окна обновляются полной перезагрузкой, как раньше."""
+        return self._listener is not None and self._listener.active
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+
+    def _on_notified(self, table: str, row_id: int):
+        ids = self._pending.setdefault(table, set())
+        if ids is not None:
+            ids.add(row_id)
+            if len(ids) > self.MAX_BATCH_ROWS:
+                self._pending[table] = None
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _flush(self):
+        changes, self._pending = self._pending, {}
+        if changes:
+            self.changed.emit(changes)
@@ -0,0 +1,357 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+
+class _Segment:
+    __slots__ = ("start", "end", "count", "items", "loading")
+
+    def __init__(self, start, end, items):
+        # Границы страницы — курсоры keyset: после start и до end включительно
+        # (end=None — до конца выборки)
+        self.start = start
+        self.end = end
+        self.count = len(items)
+        self.items = items
+        self.loading = False
+
+
+class PagedTableModel(QAbstractTableModel):
+    """Модель таблицы поверх постраничного запроса.
+
+    fetch_page(after, limit) должен возвращать объект с полями `items` и
+    `next_cursor` (например, TransactionPage). columns — список пар
+    (заголовок, функция форматирования ячейки). Страницы подгружаются по мере
+    прокрутки через fetchMore, а в памяти остаются только последние
+    `max_loaded_pages` из просмотренных. Вытесненная страница при обращении
+    перечитывается по своим курсорам keyset: с loader — в фоне (пока она
+    грузится, ячейки пустые), строки, вставленные или удалённые в её
+    диапазоне за это время, добавляются или убираются, а не сдвигают соседние
+    страницы. Границу end можно проверить только с sort_key (в порядке
+    курсора); без него перечитываются прежние `count` строк.
+
+    Если передан loader (AsyncLoader), новые страницы запрашиваются в фоне под
+    ключом `key`; модель, созданная с тем же ключом позже, отменяет загрузку
+    предыдущей.
+
+    Для живого обновления нужны fetch_items(keys) — актуальные версии строк,
+    входящих в выборку модели, — и sort_key/descending с порядком выборки:
+    refresh_items(keys) обновляет, удаляет и вставляет строки на месте, не
+    перечитывая страницы.
+    sort_key сравнивается в Python, поэтому текстовые ключи в SQL должны
+    упорядочиваться по кодовым точкам (COLLATE "C"), а не по правилам локали.
+    """
+
+    loaded = pyqtSignal()
+
+    def __init__(
+        self,
+        fetch_page,
+        columns,
+        page_size: int = 200,
+        max_loaded_pages: int = 20,
+        loader=None,
+        key: str = None,
+        fetch_items=None,
+        sort_key=None,
+        descending: bool = False,
+        item_key=lambda item: item.id,
+    ):
+        super().__init__()
+        self._fetch_page = fetch_page
+        self._columns = columns
+        self._page_size = page_size
+        self._max_loaded_pages = max_loaded_pages
+
+        self._segments = []
+        self._offsets = []
+        self._row_count = 0
+        self._loaded = OrderedDict()
+        self._next_cursor = None
+        self._exhausted = False
+
+        self._loader = loader
+        self._key = key or f"page_model_{id(self)}"
+        self._fetching = False
+
+        self._fetch_items = fetch_items
+        self._sort_key = sort_key
+        self._descending = descending
+        self._item_key = item_key
+        self._refresh_pending = set()
+
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=None):
+        if parent is not None and parent.isValid():
+            return 0
+        return self._row_count
+
+    def columnCount(self, parent=None):
+        return len(self._columns)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._exhausted and not self._fetching
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self._exhausted or self._fetching:
+            return
+
+        if self._loader is None:
+            self._append_page(self._fetch_page(self._next_cursor, self._page_size))
+            return
+
+        self._fetching = True
+        self._loader.submit(
+            self._key,
+            self._fetch_page,
+            self._next_cursor,
+            self._page_size,
+            on_result=self._append_page,
+            on_error=self._on_fetch_failed,
+        )
+
+    def _on_fetch_failed(self, message: str):
+        self._fetching = False
+        print(f"Ошибка загрузки страницы: {message}")
+
+    def _append_page(self, page):
+        self._fetching = False
+        self._exhausted = page.next_cursor is None
+        if page.items:
+            first = self._row_count
+            self.beginInsertRows(QModelIndex(), first, first + len(page.items) - 1)
+            self._segments.append(
+                _Segment(self._next_cursor, page.next_cursor, page.items)
+            )
+            self._offsets.append(first)
+            self._row_count += len(page.items)
+            self.endInsertRows()
+
+            self._next_cursor = page.next_cursor
+            self._touch(len(self._segments) - 1)
+        self.loaded.emit()
+
+    def _touch(self, segment_index: int):
+        self._loaded[segment_index] = True
+        self._loaded.move_to_end(segment_index)
+        while len(self._loaded) > self._max_loaded_pages:
+            evicted, _ = self._loaded.popitem(last=False)
+            self._segments[evicted].items = None
+
+    def item_at(self, row: int):
+        if row < 0 or row >= self._row_count:
+            return None
+
+        segment_index = bisect_right(self._offsets, row) - 1
+        segment = self._segments[segment_index]
+        if segment.items is None:
+            self._reload_segment(segment_index)
+            if segment.items is None:
+                return None
+        self._touch(segment_index)
+
+        offset = row - self._offsets[segment_index]
+        # Страница могла «усохнуть», если строки удалили после первой загрузки
+        return segment.items[offset] if offset < len(segment.items) else None
+
+    def _reload_segment(self, segment_index: int):
+        segment = self._segments[segment_index]
+        if segment.loading:
+            return
+        # С запасом: в диапазон страницы могли вставить строки
+        limit = segment.count + self._page_size
+        if self._loader is None:
+            # Синхронно (из data()) число строк менять нельзя
+            items = self._within(segment, self._fetch_page(segment.start, limit).items)
+            segment.items = items[: segment.count]
+            return
+
+        segment.loading = True
+        self._loader.submit(
+            f"{self._key}:page:{segment_index}",
+            self._fetch_page,
+            segment.start,
+            limit,
+            on_result=lambda page: self._on_segment_loaded(segment_index, page),
+            on_error=lambda message: self._on_segment_failed(segment_index, message),
+        )
+
+    def _within(self, segment: _Segment, items: list) -> list:
+        if segment.end is None:
+            return items
+        if self._sort_key is None:
+            return items[: segment.count]
+        if self._descending:
+            return [item for item in items if self._sort_key(item) >= segment.end]
+        return [item for item in items if self._sort_key(item) <= segment.end]
+
+    def _on_segment_loaded(self, segment_index: int, page):
+        segment = self._segments[segment_index]
+        segment.loading = False
+        items = self._within(segment, page.items)
+        first = self._offsets[segment_index]
+        delta = len(items) - segment.count
+        if delta > 0:
+            row = first + segment.count
+            self.beginInsertRows(QModelIndex(), row, row + delta - 1)
+            segment.items = items
+            self._shift_offsets(segment_index, delta)
+            self.endInsertRows()
+        elif delta < 0:
+            row = first + len(items)
+            self.beginRemoveRows(QModelIndex(), row, row - delta - 1)
+            segment.items = items
+            self._shift_offsets(segment_index, delta)
+            self.endRemoveRows()
+        else:
+            segment.items = items
+        self._touch(segment_index)
+        if items:
+            self.dataChanged.emit(
+                self.index(first, 0),
+                self.index(first + len(items) - 1, len(self._columns) - 1),
+            )
+
+    def _on_segment_failed(self, segment_index: int, message: str):
+        self._segments[segment_index].loading = False
+        print(f"Ошибка загрузки страницы: {message}")
+
+    def refresh_items(self, keys):
+        if self._fetch_items is None or not keys:
+            return
+        if self._loader is None:
+            keys = list(keys)
+            self.apply_changes(keys, self._fetch_items(keys))
+            return
+
+        # Новый запрос отменяет предыдущий, поэтому перечитываем все ключи,
+        # ещё не применённые к модели
+        self._refresh_pending.update(keys)
+        keys = list(self._refresh_pending)
+        self._loader.submit(
+            f"{self._key}:refresh",
+            self._fetch_items,
+            keys,
+            on_result=lambda items: self._on_items_refreshed(keys, items),
+        )
+
+    def _on_items_refreshed(self, keys, items):
+        self._refresh_pending.difference_update(keys)
+        self.apply_changes(keys, items)
+
+    def apply_changes(self, keys, items):
+        """keys — изменённые ключи, items — те из них, что входят в выборку."""
+        fresh = {self._item_key(item): item for item in items}
+        for key in keys:
+            location = self._locate(key)
+            item = fresh.get(key)
+            if location is not None:
+                segment_index, offset = location
+                row = self._offsets[segment_index] + offset
+                if item is not None and not self._moved(
+                    self._segments[segment_index].items[offset], item
+                ):
+                    self._segments[segment_index].items[offset] = item
+                    self.dataChanged.emit(
+                        self.index(row, 0), self.index(row, len(self._columns) - 1)
+                    )
+                    continue
+                self._remove_row(segment_index, offset)
+            if item is not None:
+                self._insert_item(item)
+
+    def _locate(self, key):
+        # Ищем только среди страниц в памяти: вытесненные перечитаются целиком
+        for segment_index in self._loaded:
+            items = self._segments[segment_index].items
+            for offset, item in enumerate(items):
+                if self._item_key(item) == key:
+                    return segment_index, offset
+        return None
+
+    def _moved(self, old, new) -> bool:
+        return self._sort_key is not None and self._sort_key(old) != self._sort_key(
+            new
+        )
+
+    def _precedes(self, item, other) -> bool:
+        if self._sort_key is None:
+            return True
+        if self._descending:
+            return self._sort_key(item) > self._sort_key(other)
+        return self._sort_key(item) < self._sort_key(other)
+
+    def _shift_offsets(self, segment_index: int, delta: int):
+        segment = self._segments[segment_index]
+        segment.count += delta
+        for i in range(segment_index + 1, len(self._offsets)):
+            self._offsets[i] += delta
+        self._row_count += delta
+
+    def _remove_row(self, segment_index: int, offset: int):
+        row = self._offsets[segment_index] + offset
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._segments[segment_index].items[offset]
+        self._shift_offsets(segment_index, -1)
+        self.endRemoveRows()
+
+    def _insert_item(self, item):
+        target = None
+        after_evicted = False
+        for segment_index, segment in enumerate(self._segments):
+            if segment.items is None:
+                after_evicted = True
+                continue
+            offset = next(
+                (
+                    i
+                    for i, existing in enumerate(segment.items)
+                    if self._precedes(item, existing)
+                ),
+                None,
+            )
+            if offset is not None:
+                if offset == 0 and after_evicted:
+                    # Место строки может быть внутри вытесненной страницы —
+                    # она появится при её перечитывании
+                    return
+                target = (segment_index, offset)
+                break
+            after_evicted = False
+
+        if target is None:
+            if not self._exhausted:
+                # Строка после загруженных — придёт со следующей страницей
+                return
+            if not self._segments:
+                self._segments.append(_Segment(None, None, []))
+                self._offsets.append(0)
+            last = len(self._segments) - 1
+            if self._segments[last].items is None:
+                return
+            target = (last, self._segments[last].count)
+
+        segment_index, offset = target
+        row = self._offsets[segment_index] + offset
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._segments[segment_index].items.insert(offset, item)
+        self._shift_offsets(segment_index, 1)
+        self.endInsertRows()
+        self._touch(segment_index)
+
+    def data(self, index, role):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        item = self.item_at(index.row())
+        if item is None:
+            return None
+        return self._columns[index.column()][1](item)
+
+    def headerData(self, section, orientation, role):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self._columns[section][0]
+        return None
@@ -12,7 +12,7 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QLineEdit,
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QFont
 from PyQt6.QtCharts import (
     QChartView,
@@ -23,8 +23,16 @@ from PyQt6.QtCharts import (
     QBarCategoryAxis,
 )
 from app.ui.controllers.admin_controller import AdminController
+from app.ui.controllers.stats_controller import monthly_summary_start
 from app.ui.utils.base_table_model import BaseTableModel
+from app.ui.utils.paged_table_model import PagedTableModel
+from app.ui.utils.live_updates import LiveUpdates
+from app.ui.utils.client_search_edit import ClientSearchEdit
 from app.core.database.models import Client, Account, Transaction
+from app.core.services.client_service import ClientService
+
+
+CLIENT_SEARCH_DEBOUNCE_MS = 300
 
 
 class AdminWindow(QWidget):
@@ -33,9 +41,11 @@ class AdminWindow(QWidget):
         self.setWindowTitle("Панель Администратора")
         self.resize(1200, 900)
         self.admin_controller = AdminController()
-        self.clients = []
-        self.accounts = []
-        self.transactions = []
+        self.live = LiveUpdates.instance()
+        # id строк, изменения которых ещё не применены (см. _apply_live)
+        self._live_pending = {"clients": set()}
+        # Имена владельцев для колонки «Клиент» таблицы счетов
+        self._account_client_names = {}
         self.init_ui()
 
     def switch_to_other_version(self):
@@ -87,6 +97,12 @@ class AdminWindow(QWidget):
         header_layout.addWidget(title_label)
         header_layout.addStretch()
 
+        self.loading_label = QLabel("Загрузка…")
+        self.loading_label.setStyleSheet("color: #7F8C8D; font-style: italic;")
+        self.loading_label.setVisible(False)
+        self.admin_controller.loader.loading_changed.connect(self._on_loading_changed)
+        header_layout.addWidget(self.loading_label)
+
         logout_btn = QPushButton("Выйти")
         logout_btn.clicked.connect(self.close)
         logout_btn.setStyleSheet(
@@ -117,7 +133,14 @@ class AdminWindow(QWidget):
 
         search_client_layout = QHBoxLayout()
         self.client_search_input = QLineEdit()
-        self.client_search_input.setPlaceholderText("Поиск по имени или фамилии...")
+        self.client_search_input.setPlaceholderText(
+            "Поиск по ФИО, паспорту или email..."
+        )
+        # Запрос уходит только после паузы в наборе, а не на каждую букву
+        self._client_search_timer = QTimer(self)
+        self._client_search_timer.setSingleShot(True)
+        self._client_search_timer.setInterval(CLIENT_SEARCH_DEBOUNCE_MS)
+        self._client_search_timer.timeout.connect(self._run_client_search)
         self.client_search_input.textChanged.connect(self._on_client_search_changed)
         search_client_layout.addWidget(QLabel("Поиск клиента:"))
         search_client_layout.addWidget(self.client_search_input)
@@ -154,14 +177,14 @@ class AdminWindow(QWidget):
         accounts_layout = QVBoxLayout(accounts_tab)
 
         account_filter_layout = QHBoxLayout()
-        self.account_client_combo = QComboBox()
+        self.account_client_edit = self._client_filter("account_filter_clients")
         self.account_type_filter_combo = QComboBox()
         self.account_type_filter_combo.addItems(
             ["Все", "checking", "savings", "credit"]
         )
 
         account_filter_layout.addWidget(QLabel("Фильтр по клиенту:"))
-        account_filter_layout.addWidget(self.account_client_combo)
+        account_filter_layout.addWidget(self.account_client_edit)
         account_filter_layout.addWidget(QLabel("Фильтр по типу:"))
         account_filter_layout.addWidget(self.account_type_filter_combo)
         account_filter_layout.addStretch()
@@ -195,7 +218,9 @@ class AdminWindow(QWidget):
         transactions_layout = QVBoxLayout(transactions_tab)
 
         transaction_filter_layout = QHBoxLayout()
-        self.transaction_client_combo = QComboBox()
+        self.transaction_client_edit = self._client_filter(
+            "transaction_filter_clients"
+        )
         self.transaction_account_combo = QComboBox()
         self.transaction_type_combo = QComboBox()
         self.transaction_type_combo.addItems(
@@ -203,7 +228,7 @@ class AdminWindow(QWidget):
         )
 
         transaction_filter_layout.addWidget(QLabel("Фильтр по клиенту:"))
-        transaction_filter_layout.addWidget(self.transaction_client_combo)
+        transaction_filter_layout.addWidget(self.transaction_client_edit)
         transaction_filter_layout.addWidget(QLabel("Фильтр по счёту:"))
         transaction_filter_layout.addWidget(self.transaction_account_combo)
         transaction_filter_layout.addWidget(QLabel("Тип операции:"))
@@ -222,7 +247,7 @@ class AdminWindow(QWidget):
         stats_layout = QVBoxLayout(stats_tab)
 
         filter_layout = QHBoxLayout()
-        self.stats_client_combo = QComboBox()
+        self.stats_client_edit = self._client_filter("stats_filter_clients")
         self.stats_account_combo = QComboBox()
         self.stats_transaction_type_combo = QComboBox()
         self.stats_transaction_type_combo.addItems(
@@ -230,7 +255,7 @@ class AdminWindow(QWidget):
         )
 
         filter_layout.addWidget(QLabel("Фильтр по клиенту:"))
-        filter_layout.addWidget(self.stats_client_combo)
+        filter_layout.addWidget(self.stats_client_edit)
         filter_layout.addWidget(QLabel("Фильтр по счёту:"))
         filter_layout.addWidget(self.stats_account_combo)
         filter_layout.addWidget(QLabel("Тип операции:"))
@@ -248,14 +273,17 @@ class AdminWindow(QWidget):
         main_layout.addWidget(tab_widget)
         self.setLayout(main_layout)
 
-        self.account_client_combo.currentIndexChanged.connect(
+        for combo, key, _ in self._account_combos():
+            self._load_account_combo(combo, key, None)
+
+        self.account_client_edit.client_changed.connect(
             self._on_account_filter_changed
         )
         self.account_type_filter_combo.currentIndexChanged.connect(
             self._on_account_filter_changed
         )
-        self.transaction_client_combo.currentIndexChanged.connect(
-            self._on_transaction_filter_changed
+        self.transaction_client_edit.client_changed.connect(
+            self._on_transaction_client_changed
         )
         self.transaction_account_combo.currentIndexChanged.connect(
             self._on_transaction_filter_changed
@@ -263,8 +291,8 @@ class AdminWindow(QWidget):
         self.transaction_type_combo.currentIndexChanged.connect(
             self._on_transaction_filter_changed
         )
-        self.stats_client_combo.currentIndexChanged.connect(
-            self._on_stats_filter_changed
+        self.stats_client_edit.client_changed.connect(
+            self._on_stats_client_changed
         )
         self.stats_account_combo.currentIndexChanged.connect(
             self._on_stats_filter_changed
@@ -273,184 +301,361 @@ class AdminWindow(QWidget):
             self._on_stats_filter_changed
         )
 
+        self.live.changed.connect(self._on_live_changes)
+        self.live.resync.connect(self._reload_all)
+
+        self._reload_all()
+
+    def _client_filter(self, key: str) -> ClientSearchEdit:
+        return ClientSearchEdit(
+            self.admin_controller.loader,
+            self.admin_controller.data_service.search_clients,
+            key,
+        )
+
+    def _reload_all(self):
+        self._account_client_names.clear()
         self.load_clients()
         self.load_all_accounts()
-        self.load_all_transactions()
+        self._on_transaction_filter_changed()
         self.load_stats_data()
 
+    def _on_live_changes(self, changes: dict):
+        if "clients" in changes:
+            if changes["clients"] is None:
+                self._account_client_names.clear()
+                self.load_clients()
+                self._load_account_table()
+            else:
+                self._refresh_clients(changes["clients"])
+
+        if "accounts" in changes:
+            model = self.account_table.model()
+            if changes["accounts"] is None or not isinstance(model, PagedTableModel):
+                self._load_account_table()
+            else:
+                model.refresh_items(changes["accounts"])
+            self._refresh_account_combos()
+
+        if "transactions" in changes:
+            model = self.transaction_table.model()
+            if changes["transactions"] is None or not isinstance(
+                model, PagedTableModel
+            ):
+                self._on_transaction_filter_changed()
+            else:
+                model.refresh_items(changes["transactions"])
+            self.load_stats_data()
+
+    def _refresh_clients(self, ids):
+        model = self.client_table.model()
+        if isinstance(model, PagedTableModel):
+            model.refresh_items(ids)
+        elif self.client_search_input.text().strip():
+            self._run_client_search()
+
+        # Имена перечитываем только у владельцев уже показанных счетов
+        shown = [i for i in ids if i in self._account_client_names]
+        if shown:
+            self._apply_live(
+                "clients",
+                shown,
+                self.admin_controller.data_service.get_clients_by_ids,
+                self._merge_client_names,
+            )
+
+    def _apply_live(self, table: str, ids, fetch_by_ids, merge):
+        # Новый запрос отменяет предыдущий, поэтому берём все неприменённые id
+        pending = self._live_pending[table]
+        pending.update(ids)
+        ids = set(pending)
+
+        def on_result(found):
+            pending.difference_update(ids)
+            merge(ids, found)
+
+        self.admin_controller.loader.submit(
+            f"live_{table}", fetch_by_ids, ids, on_result=on_result
+        )
+
+    def _merge_client_names(self, ids, found: dict):
+        for client_id in ids:
+            self._account_client_names.pop(client_id, None)
+        self._account_client_names.update(
+            (c.id, f"{c.first_name} {c.last_name}") for c in found.values()
+        )
+        self.account_table.viewport().update()
+
+    def _on_loading_changed(self, key: str, loading: bool):
+        self.loading_label.setVisible(self.admin_controller.loader.is_loading())
+
     def load_clients(self):
-        try:
-            self.clients = self.admin_controller.get_all_clients()
-            self._update_client_combos()
-            self._load_client_table(self.clients)
-        except Exception as e:
-            self.show_error(f"Ошибка при загрузке клиентов: {e}")
-
-    def _update_client_combos(self):
-        for combo in [
-            self.transaction_client_combo,
-            self.account_client_combo,
-            self.stats_client_combo,
-        ]:
-            combo.blockSignals(True)
-            combo.clear()
-            combo.addItem("Все", None)
-            for client in self.clients:
-                full_name = f"{client.first_name} {client.last_name}"
-                combo.addItem(full_name, client.id)
-            combo.blockSignals(False)
+        if self.client_search_input.text().strip():
+            self._run_client_search()
+        else:
+            self._load_client_table()
+
+    _CLIENT_COLUMNS = [
+        ("ID", lambda c: c.id),
+        ("ФИО", lambda c: f"{c.first_name} {c.last_name}"),
+        ("Паспорт", lambda c: c.passport_number),
+        ("Телефон", lambda c: c.phone_number or "—"),
+        ("Email", lambda c: c.email or "—"),
+    ]
 
     def _load_client_table(self, clients=None):
-        if clients is None:
-            clients = self.clients
-        data = []
-        for client in clients:
-            data.append(
-                [
-                    client.id,
-                    f"{client.first_name} {client.last_name}",
-                    client.passport_number,
-                    client.phone_number or "—",
-                    client.email or "—",
-                ]
+        # clients — результаты поиска, без них — весь список постранично
+        if clients is not None:
+            data = [
+                [fmt(client) for _, fmt in self._CLIENT_COLUMNS] for client in clients
+            ]
+            headers = [header for header, _ in self._CLIENT_COLUMNS]
+            self.client_table.setModel(BaseTableModel(data, headers))
+            return
+
+        data_service = self.admin_controller.data_service
+        self.client_table.setModel(
+            PagedTableModel(
+                data_service.get_clients_page,
+                self._CLIENT_COLUMNS,
+                loader=self.admin_controller.loader,
+                key="client_table",
+                fetch_items=lambda ids: list(
+                    data_service.get_clients_by_ids(ids).values()
+                ),
+                sort_key=lambda c: (c.last_name, c.first_name, c.id),
             )
-        headers = ["ID", "ФИО", "Паспорт", "Телефон", "Email"]
-        self.client_table.setModel(BaseTableModel(data, headers))
+        )
 
     def _on_client_search_changed(self, text: str):
-        if not text.strip():
-            self.load_clients()
+        self._client_search_timer.start()
+
+    def _run_client_search(self):
+        loader = self.admin_controller.loader
+        text = self.client_search_input.text().strip()
+        if not text:
+            loader.cancel("client_search", interrupt=True)
+            self._load_client_table()
+            return
+        if len(text) < ClientService.SEARCH_MIN_LENGTH:
             return
 
-        filtered = self.admin_controller.search_clients_by_name(text)
-        self._load_client_table(filtered)
+        loader.submit(
+            "client_search",
+            self.admin_controller.data_service.search_clients,
+            text,
+            on_result=self._load_client_table,
+            on_error=lambda e: self.show_error(f"Ошибка при поиске клиентов: {e}"),
+            cancel_previous=True,
+        )
 
     def load_all_accounts(self):
-        try:
-            self.accounts = self.admin_controller.get_all_accounts()
-            self._update_account_combo()
-            self._load_account_table(self.accounts)
-        except Exception as e:
-            self.show_error(f"Ошибка при загрузке счетов: {e}")
-
-    def _update_account_combo(self):
-        self.transaction_account_combo.blockSignals(True)
-        self.stats_account_combo.blockSignals(True)
-        self.transaction_account_combo.clear()
-        self.stats_account_combo.clear()
-        self.transaction_account_combo.addItem("Все", None)
-        self.stats_account_combo.addItem("Все", None)
-        for acc in self.accounts:
-            item_text = f"{acc.account_number} ({acc.account_type})"
-            self.transaction_account_combo.addItem(item_text, acc.id)
-            self.stats_account_combo.addItem(item_text, acc.id)
-        self.transaction_account_combo.blockSignals(False)
-        self.stats_account_combo.blockSignals(False)
-
-    def _load_account_table(self, accounts=None):
-        if accounts is None:
-            accounts = self.accounts
-        data = []
+        self._load_account_table()
+        self._refresh_account_combos()
+
+    def _account_combos(self):
+        return [
+            (
+                self.transaction_account_combo,
+                "transaction_accounts",
+                self.transaction_client_edit,
+            ),
+            (self.stats_account_combo, "stats_accounts", self.stats_client_edit),
+        ]
+
+    def _load_account_combo(self, combo: QComboBox, key: str, client_id):
+        # Фильтр по счёту — среди счетов выбранного клиента, без клиента он пуст
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem("Все", None)
+        combo.blockSignals(False)
+        combo.setEnabled(client_id is not None)
+        self._refresh_account_combo(combo, key, client_id)
+
+    def _refresh_account_combo(self, combo: QComboBox, key: str, client_id):
+        if client_id is None:
+            self.admin_controller.loader.cancel(key)
+            return
+
+        self.admin_controller.loader.submit(
+            key,
+            self.admin_controller.data_service.get_client_accounts,
+            client_id,
+            on_result=lambda accounts: self._fill_account_combo(combo, accounts),
+            on_error=lambda e: self.show_error(f"Ошибка при загрузке счетов: {e}"),
+        )
+
+    def _refresh_account_combos(self):
+        for combo, key, client_edit in self._account_combos():
+            self._refresh_account_combo(combo, key, client_edit.client_id())
+
+    def _fill_account_combo(self, combo: QComboBox, accounts):
+        selected = combo.currentData()
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem("Все", None)
         for acc in accounts:
-            client_info = self.admin_controller.data_service.get_client_by_id(
-                acc.client_id
-            )
-            client_name = (
-                f"{client_info.first_name} {client_info.last_name}"
-                if client_info
-                else "—"
+            combo.addItem(f"{acc.account_number} ({acc.account_type})", acc.id)
+        index = max(combo.findData(selected), 0)
+        combo.setCurrentIndex(index)
+        combo.blockSignals(False)
+        if combo.currentData() != selected:
+            # Выбранный счёт удалён — фильтр по нему снят
+            combo.currentIndexChanged.emit(index)
+
+    def _with_client_names(self, accounts):
+        # Выполняется в фоновом потоке: имена владельцев для колонки «Клиент»
+        missing = {
+            acc.client_id
+            for acc in accounts
+            if acc.client_id not in self._account_client_names
+        }
+        if missing:
+            clients = self.admin_controller.data_service.get_clients_by_ids(missing)
+            self._account_client_names.update(
+                (c.id, f"{c.first_name} {c.last_name}") for c in clients.values()
             )
+        return accounts
 
-            data.append(
+    def _load_account_table(self):
+        client_id, account_type = self._account_filter()
+        data_service = self.admin_controller.data_service
+
+        def fetch_page(after, limit):
+            page = data_service.get_accounts_page(client_id, account_type, after, limit)
+            self._with_client_names(page.items)
+            return page
+
+        def fetch_items(ids):
+            return self._with_client_names(
                 [
-                    acc.account_number,
-                    acc.account_type,
-                    f"{acc.balance:.2f} {acc.currency}",
-                    "Активен" if acc.is_active else "Заблокирован",
-                    acc.opened_date.strftime("%Y-%m-%d"),
-                    client_name,
+                    a
+                    for a in data_service.get_accounts_by_ids(ids).values()
+                    if (not client_id or a.client_id == client_id)
+                    and (not account_type or a.account_type == account_type)
                 ]
             )
 
-        headers = ["Номер", "Тип", "Баланс", "Статус", "Дата открытия", "Клиент"]
-        self.account_table.setModel(BaseTableModel(data, headers))
+        columns = [
+            ("Номер", lambda a: a.account_number),
+            ("Тип", lambda a: a.account_type),
+            ("Баланс", lambda a: f"{a.balance:.2f} {a.currency}"),
+            ("Статус", lambda a: "Активен" if a.is_active else "Заблокирован"),
+            ("Дата открытия", lambda a: a.opened_date.strftime("%Y-%m-%d")),
+            ("Клиент", lambda a: self._account_client_names.get(a.client_id, "—")),
+        ]
+        self.account_table.setModel(
+            PagedTableModel(
+                fetch_page,
+                columns,
+                loader=self.admin_controller.loader,
+                key="account_table",
+                fetch_items=fetch_items,
+                sort_key=lambda a: (a.opened_date, a.id),
+                descending=True,
+            )
+        )
 
-    def _on_account_filter_changed(self):
-        client_id = self.account_client_combo.currentData()
+    def _account_filter(self):
+        client_id = self.account_client_edit.client_id()
         account_type = self.account_type_filter_combo.currentText()
         account_type = None if account_type == "Все" else account_type
+        return client_id, account_type
 
-        accounts = self.admin_controller.get_filtered_accounts(client_id, account_type)
-        self._load_account_table(accounts)
+    def _on_account_filter_changed(self):
+        self._load_account_table()
 
     def load_all_transactions(self):
         try:
-            self.transactions = self.admin_controller.get_all_transactions()
-            self._load_transaction_table(self.transactions)
+            self._load_transaction_table()
         except Exception as e:
             self.show_error(f"Ошибка при загрузке транзакций: {e}")
 
-    def _load_transaction_table(self, transactions):
-        data = []
-        for t in transactions:
-            from_acc = self.admin_controller.data_service.get_account_by_id(
-                t.from_account_id
-            )
-            to_acc = self.admin_controller.data_service.get_account_by_id(
-                t.to_account_id
-            )
-
-            data.append(
-                [
-                    t.id,
-                    from_acc.account_number if from_acc else "—",
-                    to_acc.account_number if to_acc else "—",
-                    f"{t.amount:.2f}",
-                    t.transaction_type,
-                    t.description or "—",
-                    t.transaction_date.strftime("%Y-%m-%d %H:%M"),
-                ]
+    def _load_transaction_table(
+        self, client_id=None, account_id=None, transaction_type=None
+    ):
+        data_service = self.admin_controller.data_service
+        columns = [
+            ("ID", lambda t: t.id),
+            ("Отправитель", lambda t: t.from_account_number or "—"),
+            ("Получатель", lambda t: t.to_account_number or "—"),
+            ("Сумма", lambda t: f"{t.amount:.2f}"),
+            ("Тип", lambda t: t.transaction_type),
+            ("Описание", lambda t: t.description or "—"),
+            ("Дата", lambda t: t.transaction_date.strftime("%Y-%m-%d %H:%M")),
+        ]
+        self.transaction_table.setModel(
+            PagedTableModel(
+                lambda after, limit: data_service.get_transactions_page(
+                    client_id, account_id, transaction_type, after, limit
+                ),
+                columns,
+                loader=self.admin_controller.loader,
+                key="transactions",
+                fetch_items=lambda ids: data_service.get_transactions_by_ids(
+                    ids, client_id, account_id, transaction_type
+                ),
+                sort_key=lambda t: (t.transaction_date, t.id),
+                descending=True,
             )
+        )
+        self.transaction_table.setColumnHidden(0, True)
 
-        headers = [
-            "Отправитель",
-            "Получатель",
-            "Сумма",
-            "Тип",
-            "Описание",
-            "Дата",
-        ]
-        self.transaction_table.setModel(BaseTableModel(data, headers))
+    def _on_transaction_client_changed(self, client_id):
+        self._load_account_combo(
+            self.transaction_account_combo, "transaction_accounts", client_id
+        )
+        self._on_transaction_filter_changed()
 
     def _on_transaction_filter_changed(self):
-        client_id = self.transaction_client_combo.currentData()
+        client_id = self.transaction_client_edit.client_id()
         account_id = self.transaction_account_combo.currentData()
         transaction_type = self.transaction_type_combo.currentText()
         transaction_type = None if transaction_type == "Все" else transaction_type
 
-        transactions = self.admin_controller.get_filtered_transactions(
-            client_id, account_id, transaction_type
-        )
-        self._load_transaction_table(transactions)
+        self._load_transaction_table(client_id, account_id, transaction_type)
 
     def load_stats_data(self):
         self._on_stats_filter_changed()
 
+    def _on_stats_client_changed(self, client_id):
+        self._load_account_combo(self.stats_account_combo, "stats_accounts", client_id)
+        self._on_stats_filter_changed()
+
     def _on_stats_filter_changed(self):
-        client_id = self.stats_client_combo.currentData()
+        client_id = self.stats_client_edit.client_id()
         account_id = self.stats_account_combo.currentData()
         transaction_type = self.stats_transaction_type_combo.currentText()
         transaction_type = None if transaction_type == "Все" else transaction_type
 
-        summary = self.admin_controller.get_monthly_summary(
-            client_id, account_id, transaction_type
+        self.admin_controller.loader.submit(
+            "stats",
+            self._fetch_stats,
+            client_id,
+            account_id,
+            transaction_type,
+            on_result=self._on_stats_loaded,
+            on_error=lambda e: self.show_error(f"Ошибка при загрузке статистики: {e}"),
         )
-        self.update_income_expense_chart(
-            summary["months"], summary["incomes"], summary["expenses"]
+
+    def _fetch_stats(self, client_id, account_id, transaction_type):
+        data_service = self.admin_controller.data_service
+        return (
+            data_service.get_monthly_summary(
+                client_id,
+                account_id,
+                transaction_type,
+                date_from=monthly_summary_start(),
+            ),
+            data_service.get_transaction_type_summary(
+                client_id, account_id, transaction_type
+            ),
         )
 
-        summary_types = self.admin_controller.get_transaction_type_summary(
-            client_id, account_id, transaction_type
+    def _on_stats_loaded(self, result):
+        summary, summary_types = result
+        self.update_income_expense_chart(
+            summary["months"], summary["incomes"], summary["expenses"]
         )
         self.update_distribution_chart(summary_types)
 
@@ -542,7 +747,8 @@ class AdminWindow(QWidget):
             self.client_passport_input.clear()
             self.client_phone_input.clear()
             self.client_email_input.clear()
-            self.load_clients()
+            if not self.live.active:
+                self.load_clients()
 
     def create_account(self):
         account_number = self.account_number_input.text().strip()
@@ -565,7 +771,8 @@ class AdminWindow(QWidget):
                 self.account_number_input.clear()
                 self.account_client_id_input.clear()
                 self.show_success("Счёт успешно создан")
-                self.load_all_accounts()
+                if not self.live.active:
+                    self.load_all_accounts()
         except ValueError as ve:
             self.show_error(str(ve))
         except Exception as e:
@@ -11,6 +11,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
 from app.ui.controllers.auth_controller import AuthController
+from app.ui.utils.async_loader import AsyncLoader
 from app.ui.views.admin_window import AdminWindow
 from app.ui.views.main_window import MainWindow
 from app.ui.views.user_window import UserWindow
@@ -23,6 +24,9 @@ class AuthWindow(QWidget):
         self.setWindowTitle("Авторизация")
         self.resize(400, 400)
         self.controller = AuthController()
+        # Проверка пароля (bcrypt) идёт в фоне, окно не замирает
+        self.loader = AsyncLoader(self)
+        self.loader.loading_changed.connect(self._on_loading_changed)
         self.init_ui()
 
     def init_ui(self):
@@ -44,8 +48,8 @@ class AuthWindow(QWidget):
         self.password_input.setPlaceholderText("Пароль")
         self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
 
-        login_button = QPushButton("Войти")
-        login_button.clicked.connect(self.handle_login)
+        self.login_button = QPushButton("Войти")
+        self.login_button.clicked.connect(self.handle_login)
 
         register_btn = QPushButton("Зарегистрироваться")
         register_btn.clicked.connect(self.open_registration)
@@ -54,17 +58,34 @@ class AuthWindow(QWidget):
         layout.addWidget(self.login_input)
         layout.addWidget(QLabel("Пароль:"))
         layout.addWidget(self.password_input)
-        layout.addWidget(login_button)
+        layout.addWidget(self.login_button)
         layout.addWidget(register_btn)
 
         self.setLayout(layout)
 
     def handle_login(self):
+        if self.loader.is_loading("login"):
+            return
         login = self.login_input.text()
         password = self.password_input.text()
 
-        role = self.controller.authenticate(login, password)
+        self.loader.submit(
+            "login",
+            self.controller.authenticate,
+            login,
+            password,
+            on_result=self._on_authenticated,
+            on_error=lambda message: QMessageBox.critical(
+                self, "Ошибка", f"Ошибка входа: {message}"
+            ),
+        )
+
+    def _on_loading_changed(self, key: str, loading: bool):
+        if key == "login":
+            self.login_button.setEnabled(not loading)
+            self.login_button.setText("Вход..." if loading else "Войти")
 
+    def _on_authenticated(self, role):
         if role == "admin":
             new_version = self.show_admin_panel_choice_dialog()
 
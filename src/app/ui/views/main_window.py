@@ -9,6 +9,8 @@ from app.ui.dialogs.client_dialog import ClientDialog
 from app.ui.dialogs.account_dialog import AccountDialog
 from app.ui.dialogs.transaction_dialog import TransactionDialog
 from app.ui.utils.app_storage import AppStorage
+from app.ui.utils.live_updates import LiveUpdates
+from app.ui.utils.paged_table_model import PagedTableModel
 
 
 class MainWindow(QMainWindow):
@@ -28,6 +30,7 @@ class MainWindow(QMainWindow):
         self.client_controller = ClientController()
         self.account_controller = AccountController()
         self.transaction_controller = TransactionController()
+        self.live = LiveUpdates.instance()
 
         self._setup_ui()
         self._connect_signals()
@@ -102,20 +105,76 @@ class MainWindow(QMainWindow):
         self.ui.actionAbout.triggered.connect(self._show_about)
 
         self.client_controller.data_updated.connect(
-            lambda: self._refresh_clients(False)
+            lambda: self._on_data_updated(self._refresh_clients)
         )
         self.account_controller.data_updated.connect(
-            lambda: self._refresh_accounts(False)
+            lambda: self._on_data_updated(self._refresh_accounts)
         )
         self.transaction_controller.data_updated.connect(
-            lambda: self._refresh_transactions(False)
+            lambda: self._on_data_updated(self._refresh_transactions)
         )
+        self.live.changed.connect(self._on_live_changes)
+        self.live.resync.connect(self._refresh_clients)
+
+        for controller in [
+            self.client_controller,
+            self.account_controller,
+            self.transaction_controller,
+        ]:
+            controller.loader.loading_changed.connect(self._on_loading_changed)
+
+    def _on_loading_changed(self, key: str, loading: bool):
+        if any(
+            controller.loader.is_loading()
+            for controller in [
+                self.client_controller,
+                self.account_controller,
+                self.transaction_controller,
+            ]
+        ):
+            self.statusBar().showMessage("Загрузка…")
+        else:
+            self.statusBar().clearMessage()
+
+    def _on_data_updated(self, refresh):
+        # С живым обновлением свои изменения приходят через уведомления
+        if not self.live.active:
+            refresh(False)
+
+    def _on_live_changes(self, changes: dict):
+        for table, view, refresh in [
+            ("clients", self.ui.clientsTableView, self._refresh_clients),
+            ("accounts", self.ui.accountsTableView, self._refresh_accounts),
+            (
+                "transactions",
+                self.ui.transactionsTableView,
+                self._refresh_transactions,
+            ),
+        ]:
+            if table not in changes:
+                continue
+            model = view.model()
+            if changes[table] is None or not isinstance(model, PagedTableModel):
+                refresh(False)
+            else:
+                model.refresh_items(changes[table])
 
     def _load_initial_data(self):
         self._refresh_clients(True)
-        if (model := self.ui.clientsTableView.model()) and model.rowCount() > 0:
+        if model := self.ui.clientsTableView.model():
+            # Первая страница клиентов приходит из фонового потока
+            model.loaded.connect(self._select_first_client)
+
+    def _select_first_client(self):
+        model = self.ui.clientsTableView.model()
+        if model is self.sender():
+            model.loaded.disconnect(self._select_first_client)
+        if (
+            model
+            and model.rowCount() > 0
+            and not self.ui.clientsTableView.selectionModel().hasSelection()
+        ):
             self.ui.clientsTableView.selectRow(0)
-            self._on_client_selected()
 
     def _on_client_selected(self):
         selected = self.ui.clientsTableView.selectionModel().selectedRows()
@@ -185,17 +244,11 @@ class MainWindow(QMainWindow):
         current_client = self.storage.current_client
         current_account = self.storage.current_account
 
-        accounts = None
-        if current_client:
-            accounts = self.account_controller.data_service.get_client_accounts(
-                current_client.id
-            )
-
         if current_account:
             description = self.transaction_controller.load_transactions(
                 self.ui.transactionsTableView,
                 account_id=current_account.id,
-                accounts=accounts,
+                accounts=[current_account],
             )
             if current_client:
                 description = f"{current_client.last_name} - {description}"
@@ -203,7 +256,6 @@ class MainWindow(QMainWindow):
             description = self.transaction_controller.load_transactions(
                 self.ui.transactionsTableView,
                 client_id=current_client.id,
-                accounts=accounts,
             )
             description = f"{current_client.last_name} - {description}"
         else:
@@ -230,15 +282,13 @@ class MainWindow(QMainWindow):
             self.client_controller.show_error("Выберите клиента для удаления")
             return
         client_id = selected[0].data()
-        if self.client_controller.delete_client(client_id):
-            self._refresh_clients(True)
+        self.client_controller.delete_client(client_id)
 
     def _delete_account(self):
         if not self.storage.current_account:
             self.account_controller.show_error("Выберите счет для удаления")
             return
-        if self.account_controller.delete_account(self.storage.current_account.id):
-            self._refresh_accounts(True)
+        self.account_controller.delete_account(self.storage.current_account.id)
 
     def _show_about(self):
         from app.core.config import AppConfig
@@ -254,8 +304,7 @@ class MainWindow(QMainWindow):
         if dialog.exec():
             data = dialog.get_data()
             try:
-                if self.client_controller.add_client(**data):
-                    self._refresh_clients(True)
+                self.client_controller.add_client(**data)
             except Exception as e:
                 self.client_controller.show_error(
                     f"Ошибка при добавлении клиента: {str(e)}"
@@ -275,8 +324,7 @@ class MainWindow(QMainWindow):
         dialog = ClientDialog(self, client)
         if dialog.exec():
             data = dialog.get_data()
-            if self.client_controller.update_client(client_id, **data):
-                self._refresh_clients(True)
+            self.client_controller.update_client(client_id, **data)
 
     def _add_account_dialog(self):
         if not self.storage.current_client:
@@ -287,10 +335,9 @@ class MainWindow(QMainWindow):
         if dialog.exec():
             data = dialog.get_data()
             try:
-                if self.account_controller.add_account(
+                self.account_controller.add_account(
                     self.storage.current_client.id, **data
-                ):
-                    self._refresh_accounts(True)
+                )
             except Exception as e:
                 self.account_controller.show_error(
                     f"Ошибка при добавлении счета: {str(e)}"
@@ -304,10 +351,9 @@ class MainWindow(QMainWindow):
         dialog = AccountDialog(self, self.storage.current_account)
         if dialog.exec():
             data = dialog.get_data()
-            if self.account_controller.update_account(
+            self.account_controller.update_account(
                 self.storage.current_account.id, **data
-            ):
-                self._refresh_accounts(True)
+            )
 
     def _add_transaction_dialog(self):
         if not self.storage.current_client:
@@ -323,8 +369,7 @@ class MainWindow(QMainWindow):
         if dialog.exec():
             data = dialog.get_data()
             try:
-                if self.transaction_controller.add_transaction(**data):
-                    self._refresh_transactions(True)
+                self.transaction_controller.add_transaction(**data)
             except Exception as e:
                 self.transaction_controller.show_error(
                     f"Ошибка при добавлении транзакции: {str(e)}"
@@ -349,8 +394,7 @@ class MainWindow(QMainWindow):
         dialog = TransactionDialog(self, transaction, accounts)
         if dialog.exec():
             data = dialog.get_data()
-            if self.transaction_controller.update_transaction(transaction_id, **data):
-                self._refresh_transactions(True)
+            self.transaction_controller.update_transaction(transaction_id, **data)
 
     def _delete_transaction(self):
         selected = self.ui.transactionsTableView.selectionModel().selectedRows()
@@ -359,5 +403,4 @@ class MainWindow(QMainWindow):
             return
 
         transaction_id = selected[0].data()
-        if self.transaction_controller.delete_transaction(transaction_id):
-            self._refresh_transactions(True)
+        self.transaction_controller.delete_transaction(transaction_id)
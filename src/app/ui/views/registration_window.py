@@ -85,11 +85,6 @@ class RegistrationWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", "Пароли не совпадают")
             return
 
-        auth_id = self.controller.register(email, password)
-        if not auth_id:
-            QMessageBox.warning(self, "Ошибка", "Этот email уже занят")
-            return
-
         client_data = {
             "first_name": fname,
             "last_name": lname,
@@ -98,11 +93,15 @@ class RegistrationWindow(QWidget):
             "email": email,
         }
 
-        if self.controller.create_client_for_user(auth_id, **client_data):
+        if self.controller.register_client(email, password, **client_data):
             QMessageBox.information(self, "Успех", "Вы зарегистрированы!")
             self.back_to_login()
         else:
-            QMessageBox.critical(self, "Ошибка", "Не удалось создать профиль клиента")
+            QMessageBox.warning(
+                self,
+                "Ошибка",
+                "Не удалось зарегистрироваться: email или паспорт уже используются",
+            )
 
     def back_to_login(self):
         self.close()
@@ -12,6 +12,7 @@ from PyQt6.QtWidgets import (
     QGroupBox,
     QMessageBox,
 )
+from datetime import datetime, time
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 from PyQt6.QtCharts import (
@@ -21,10 +22,14 @@ from PyQt6.QtCharts import (
     QBarCategoryAxis,
     QValueAxis,
     QPieSeries,
+    QLineSeries,
+    QDateTimeAxis,
 )
 from app.ui.controllers.user_controller import UserController
 from app.ui.controllers.stats_controller import StatsController
 from app.ui.utils.base_table_model import BaseTableModel
+from app.ui.utils.paged_table_model import PagedTableModel
+from app.ui.utils.live_updates import LiveUpdates
 from app.ui.utils.app_storage import AppStorage
 
 
@@ -35,8 +40,12 @@ class UserWindow(QWidget):
         self.resize(1200, 850)
         self.user_controller = UserController()
         self.stats_controller = StatsController(self.user_controller.data_service)
+        self.live = LiveUpdates.instance()
         self.accounts = []
+        self._live_pending_accounts = set()
         self.init_ui()
+        self.live.changed.connect(self._on_live_changes)
+        self.live.resync.connect(self._reload_all)
 
     def init_ui(self):
         main_layout = QVBoxLayout()
@@ -55,6 +64,10 @@ class UserWindow(QWidget):
         main_layout.addWidget(self.client_label)
 
         top_right_layout = QHBoxLayout()
+        self.loading_label = QLabel("Загрузка…")
+        self.loading_label.setStyleSheet("color: #7F8C8D; font-style: italic;")
+        self.loading_label.setVisible(False)
+        self.user_controller.loader.loading_changed.connect(self._on_loading_changed)
         logout_btn = QPushButton("Выйти")
         logout_btn.setFixedWidth(100)
         logout_btn.setStyleSheet(
@@ -72,6 +85,7 @@ class UserWindow(QWidget):
         """
         )
         logout_btn.clicked.connect(self.close)
+        top_right_layout.addWidget(self.loading_label)
         top_right_layout.addStretch()
         top_right_layout.addWidget(logout_btn)
         main_layout.addLayout(top_right_layout)
@@ -209,6 +223,16 @@ class UserWindow(QWidget):
         distribution_tab.setLayout(distribution_layout)
         stats_inner_tabs.addTab(distribution_tab, "Распределение по типам")
 
+        balance_tab = QWidget()
+        balance_layout = QVBoxLayout(balance_tab)
+        self.balance_chart_view = QChartView()
+        self.balance_chart_view.setRenderHint(
+            self.balance_chart_view.renderHints().Antialiasing
+        )
+        balance_layout.addWidget(self.balance_chart_view)
+        balance_tab.setLayout(balance_layout)
+        stats_inner_tabs.addTab(balance_tab, "Баланс")
+
         history_stats_layout.addWidget(stats_inner_tabs)
         tab_widget.addTab(history_stats_tab, "История и Статистика")
 
@@ -225,22 +249,28 @@ class UserWindow(QWidget):
 
         self.load_user_data()
         self._on_filter_changed()
-        self.update_income_expense_chart()
-        self.update_distribution_chart()
 
     def show_success(self, message: str):
         QMessageBox.information(None, "Успех", message)
 
+    def _on_loading_changed(self, key: str, loading: bool):
+        self.loading_label.setVisible(self.user_controller.loader.is_loading())
+
+    def _account_balance(self, account_id) -> float:
+        # Балансы уже загружены вместе со списком счетов — без запроса к БД
+        account = next((acc for acc in self.accounts if acc.id == account_id), None)
+        return account.balance if account else 0.0
+
     def _on_account_selected(self):
         current_index = self.transfer_from_combo.currentIndex()
         account_id = self.transfer_from_combo.itemData(current_index)
-        balance = self.user_controller.get_selected_account_balance(account_id)
+        balance = self._account_balance(account_id)
         self.balance_label.setText(f"Баланс: {balance:.2f} RUB")
 
     def _on_deposit_account_selected(self):
         account_index = self.deposit_account_combo.currentIndex()
         account_id = self.deposit_account_combo.itemData(account_index)
-        balance = self.user_controller.get_selected_account_balance(account_id)
+        balance = self._account_balance(account_id)
         self.deposit_balance_label.setText(f"Баланс: {balance:.2f} RUB")
 
     def _on_filter_changed(self):
@@ -248,8 +278,52 @@ class UserWindow(QWidget):
         if not client:
             return
         self._load_transactions(client.id)
-        self.update_income_expense_chart()
-        self.update_distribution_chart()
+        self._load_stats(client.id)
+
+    def _reload_all(self):
+        self.load_user_data()
+        self._on_filter_changed()
+
+    def _on_live_changes(self, changes: dict):
+        client = AppStorage.current_client
+        if not client:
+            return
+
+        if "accounts" in changes:
+            if changes["accounts"] is None:
+                self.load_user_data()
+            else:
+                self._refresh_accounts(changes["accounts"])
+
+        if "transactions" in changes:
+            model = self.transaction_table.model()
+            if changes["transactions"] is None or not isinstance(
+                model, PagedTableModel
+            ):
+                self._load_transactions(client.id)
+            else:
+                model.refresh_items(changes["transactions"])
+            self._load_stats(client.id)
+
+    def _refresh_accounts(self, ids):
+        # Новый запрос отменяет предыдущий, поэтому берём все неприменённые id
+        self._live_pending_accounts.update(ids)
+        ids = set(self._live_pending_accounts)
+
+        def on_result(found):
+            self._live_pending_accounts.difference_update(ids)
+            client = AppStorage.current_client
+            accounts = [a for a in self.accounts if a.id not in ids]
+            accounts.extend(a for a in found.values() if a.client_id == client.id)
+            accounts.sort(key=lambda a: a.id)
+            self._on_accounts_loaded(accounts)
+
+        self.user_controller.loader.submit(
+            "live_accounts",
+            self.user_controller.data_service.get_accounts_by_ids,
+            ids,
+            on_result=on_result,
+        )
 
     def load_user_data(self):
         client = AppStorage.current_client
@@ -257,7 +331,18 @@ class UserWindow(QWidget):
             return
 
         self.client_label.setText(f"Клиент: {client.first_name} {client.last_name}")
-        self.accounts = self.user_controller.get_client_accounts(client.id)
+        self.user_controller.loader.submit(
+            "accounts",
+            self.user_controller.data_service.get_client_accounts,
+            client.id,
+            on_result=self._on_accounts_loaded,
+            on_error=lambda e: self.user_controller.show_error(
+                f"Ошибка загрузки счетов: {e}"
+            ),
+        )
+
+    def _on_accounts_loaded(self, accounts):
+        self.accounts = accounts
 
         account_data = []
         for acc in self.accounts:
@@ -273,24 +358,26 @@ class UserWindow(QWidget):
         headers = ["Номер", "Тип", "Баланс", "Дата открытия", "Статус"]
         self.account_table.setModel(BaseTableModel(account_data, headers))
 
-        self.transfer_from_combo.blockSignals(True)
-        self.deposit_account_combo.blockSignals(True)
-        self.filter_account_combo.blockSignals(True)
-
-        self.transfer_from_combo.clear()
-        self.deposit_account_combo.clear()
-        self.filter_account_combo.clear()
+        combos = [
+            self.transfer_from_combo,
+            self.deposit_account_combo,
+            self.filter_account_combo,
+        ]
+        selected = [combo.currentData() for combo in combos]
+        for combo in combos:
+            combo.blockSignals(True)
+            combo.clear()
         self.filter_account_combo.addItem("Все", None)
 
         for acc in self.accounts:
             item_text = f"{acc.account_number} ({acc.account_type})"
-            self.transfer_from_combo.addItem(item_text, acc.id)
-            self.deposit_account_combo.addItem(item_text, acc.id)
-            self.filter_account_combo.addItem(item_text, acc.id)
+            for combo in combos:
+                combo.addItem(item_text, acc.id)
 
-        self.transfer_from_combo.blockSignals(False)
-        self.deposit_account_combo.blockSignals(False)
-        self.filter_account_combo.blockSignals(False)
+        # Выбор сохраняется при обновлении списка счетов
+        for combo, account_id in zip(combos, selected):
+            combo.setCurrentIndex(max(combo.findData(account_id), 0))
+            combo.blockSignals(False)
 
         self._on_account_selected()
         self._on_deposit_account_selected()
@@ -300,71 +387,73 @@ class UserWindow(QWidget):
         transaction_type = self.filter_type_combo.currentText()
         transaction_type = None if transaction_type == "Все" else transaction_type
 
-        transactions = self.user_controller.data_service.get_client_transactions(
-            client_id
+        data_service = self.user_controller.data_service
+        columns = [
+            ("ID", lambda t: t.id),
+            ("Отправитель", lambda t: t.from_account_number or "—"),
+            ("Получатель", lambda t: t.to_account_number or "—"),
+            ("Сумма", lambda t: f"{t.amount:.2f}"),
+            ("Тип", lambda t: t.transaction_type),
+            ("Описание", lambda t: t.description or ""),
+            ("Дата", lambda t: t.transaction_date.strftime("%Y-%m-%d %H:%M")),
+        ]
+        self.transaction_table.setModel(
+            PagedTableModel(
+                lambda after, limit: data_service.get_transactions_page(
+                    client_id, account_id, transaction_type, after, limit
+                ),
+                columns,
+                loader=self.user_controller.loader,
+                key="transactions",
+                fetch_items=lambda ids: data_service.get_transactions_by_ids(
+                    ids, client_id, account_id, transaction_type
+                ),
+                sort_key=lambda t: (t.transaction_date, t.id),
+                descending=True,
+            )
         )
-        seen_ids = set()
-        data = []
-
-        for t in transactions:
-            if t.id in seen_ids:
-                continue
-            seen_ids.add(t.id)
+        self.transaction_table.setColumnHidden(0, True)
 
-            from_acc = self.user_controller.data_service.get_account_by_id(
-                t.from_account_id
-            )
-            to_acc = self.user_controller.data_service.get_account_by_id(
-                t.to_account_id
-            )
+    def _load_stats(self, client_id: int):
+        account_id = self.filter_account_combo.currentData()
+        transaction_type = self.filter_type_combo.currentText()
+        transaction_type = None if transaction_type == "Все" else transaction_type
 
-            if account_id:
-                if t.from_account_id != account_id and t.to_account_id != account_id:
-                    continue
-            if transaction_type and t.transaction_type != transaction_type:
-                continue
+        self.user_controller.loader.submit(
+            "stats",
+            self._fetch_stats,
+            client_id,
+            account_id,
+            transaction_type,
+            on_result=self._on_stats_loaded,
+            on_error=lambda e: self.user_controller.show_error(
+                f"Ошибка при загрузке статистики: {e}"
+            ),
+        )
 
-            data.append(
-                [
-                    t.id,
-                    from_acc.account_number if from_acc else "—",
-                    to_acc.account_number if to_acc else "—",
-                    f"{t.amount:.2f}",
-                    t.transaction_type,
-                    t.description or "",
-                    t.transaction_date.strftime("%Y-%m-%d %H:%M"),
-                ]
-            )
+    def _fetch_stats(self, client_id, account_id, transaction_type):
+        return (
+            self.stats_controller.get_monthly_summary(
+                client_id, account_id, transaction_type
+            ),
+            self.stats_controller.get_transaction_type_summary(
+                client_id, account_id, transaction_type
+            ),
+            self.stats_controller.get_balance_series(client_id, account_id),
+        )
 
-        headers = [
-            "ID",
-            "Отправитель",
-            "Получатель",
-            "Сумма",
-            "Тип",
-            "Описание",
-            "Дата",
-        ]
-        self.transaction_table.setModel(BaseTableModel(data, headers))
-        self.transaction_table.setColumnHidden(0, True)
+    def _on_stats_loaded(self, result):
+        summary, summary_types, balance_series = result
+        self.update_income_expense_chart(summary)
+        self.update_distribution_chart(summary_types)
+        self.update_balance_chart(balance_series)
 
-    def update_income_expense_chart(self):
+    def update_income_expense_chart(self, summary):
         chart = self.income_expense_chart_view.chart()
         if chart:
             chart.removeAllSeries()
             chart.axes().clear()
 
-        client = AppStorage.current_client
-        if not client:
-            return
-
-        account_id = self.filter_account_combo.currentData()
-        transaction_type = self.filter_type_combo.currentText()
-        transaction_type = None if transaction_type == "Все" else transaction_type
-
-        summary = self.stats_controller.get_monthly_summary(
-            client.id, account_id, transaction_type
-        )
         months = summary["months"]
         incomes = summary["incomes"]
         expenses = summary["expenses"]
@@ -398,22 +487,34 @@ class UserWindow(QWidget):
         bar_series.attachAxis(axis_y)
         chart.setTitle("Доходы и расходы по месяцам")
 
-    def update_distribution_chart(self):
-        chart = self.distribution_pie_chart_view.chart()
-        if chart:
-            chart.removeAllSeries()
+    def update_balance_chart(self, series):
+        line_series = QLineSeries()
+        line_series.setName("Остаток")
+        for day, balance in zip(series["dates"], series["balances"]):
+            timestamp = datetime.combine(day, time()).timestamp() * 1000
+            line_series.append(timestamp, balance)
 
-        client = AppStorage.current_client
-        if not client:
-            return
+        axis_x = QDateTimeAxis()
+        axis_x.setFormat("dd.MM.yyyy")
+        axis_x.setTitleText("Дата")
+        axis_y = QValueAxis()
+        axis_y.setTitleText("Сумма (RUB)")
 
-        account_id = self.filter_account_combo.currentData()
-        transaction_type = self.filter_type_combo.currentText()
-        transaction_type = None if transaction_type == "Все" else transaction_type
+        chart = self.balance_chart_view.chart()
+        chart.removeAllSeries()
+        for axis in chart.axes():
+            chart.removeAxis(axis)
+        chart.addSeries(line_series)
+        chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
+        chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
+        line_series.attachAxis(axis_x)
+        line_series.attachAxis(axis_y)
+        chart.setTitle("Остаток на конец дня")
 
-        summary = self.stats_controller.get_transaction_type_summary(
-            client.id, account_id, transaction_type
-        )
+    def update_distribution_chart(self, summary):
+        chart = self.distribution_pie_chart_view.chart()
+        if chart:
+            chart.removeAllSeries()
 
         pie_series = QPieSeries()
         pie_series.append("Пополнения", summary["deposit"])
@@ -459,7 +560,8 @@ class UserWindow(QWidget):
         if success:
             self.account_number_input.clear()
             self.show_success("Счёт успешно создан!")
-            self.load_user_data()
+            if not self.live.active:
+                self.load_user_data()
 
     def deposit_balance(self):
         account_index = self.deposit_account_combo.currentIndex()
@@ -482,7 +584,8 @@ class UserWindow(QWidget):
         if success:
             self.deposit_amount_input.clear()
             self.show_success("Счёт успешно пополнен!")
-            self.load_user_data()
+            if not self.live.active:
+                self.load_user_data()
 
     def make_transfer(self):
         from_index = self.transfer_from_combo.currentIndex()
@@ -516,4 +619,5 @@ class UserWindow(QWidget):
             self.to_account_input.clear()
             self.transfer_amount_input.clear()
             self.show_success("Перевод выполнен успешно!")
-            self.load_user_data()
+            if not self.live.active:
+                self.load_user_data()
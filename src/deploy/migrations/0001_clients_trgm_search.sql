@@ -0,0 +1,14 @@
+-- migrate: no-transaction
+-- Поиск клиентов по подстроке и с опечатками (ФИО, паспорт, email).
+-- Индексы создаются CONCURRENTLY, поэтому файл выполняется вне транзакции:
+--   python -m app.core.database.migrations migrate
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clients_full_name_trgm
+    ON clients USING gin ((first_name || ' ' || last_name) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clients_passport_trgm
+    ON clients USING gin (passport_number gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clients_email_trgm
+    ON clients USING gin (email gin_trgm_ops);
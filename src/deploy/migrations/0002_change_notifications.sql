@@ -0,0 +1,29 @@
+-- Построчные уведомления об изменениях для живого обновления интерфейса.
+-- Клиент слушает канал bank_changes (app/core/database/listener.py),
+-- полезная нагрузка: {"table": ..., "op": INSERT|UPDATE|DELETE, "id": ...}.
+-- Уведомления доставляются только после COMMIT.
+CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'bank_changes',
+        json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER clients_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON clients
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change();
+
+CREATE OR REPLACE TRIGGER accounts_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON accounts
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change();
+
+CREATE OR REPLACE TRIGGER transactions_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change();
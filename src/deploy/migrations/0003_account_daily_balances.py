@@ -0,0 +1,121 @@
+"""Остатки счетов на конец каждого дня, в который баланс менялся.
+
+Баланс на дату — последняя запись не позже неё, поэтому история и графики
+читаются за O(дней), а не пересчётом всех транзакций.
+
+Выполняется вне транзакции: сначала таблица и триггеры (короткая транзакция),
+затем история по журналу восстанавливается пачками счетов, каждая пачка
+фиксируется отдельно. Так запись в accounts и transactions не ждёт пересчёта
+всей истории, а изменения, сделанные во время заполнения, уже попадают в
+таблицу через триггеры.
+"""
+
+from app.core.config import AppConfig
+
+TRANSACTIONAL = False
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS account_daily_balances (
+    account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    balance_date DATE NOT NULL,
+    closing_balance DECIMAL(15, 2) NOT NULL,
+    PRIMARY KEY (account_id, balance_date)
+);
+
+-- Поддерживается триггером при каждом изменении accounts.balance
+-- (проводки, пополнения, ручные корректировки)
+CREATE OR REPLACE FUNCTION snapshot_account_balance() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO account_daily_balances (account_id, balance_date, closing_balance)
+    VALUES (NEW.id, CURRENT_DATE, NEW.balance)
+    ON CONFLICT (account_id, balance_date)
+    DO UPDATE SET closing_balance = EXCLUDED.closing_balance;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER accounts_balance_snapshot_insert
+    AFTER INSERT ON accounts
+    FOR EACH ROW EXECUTE FUNCTION snapshot_account_balance();
+
+CREATE OR REPLACE TRIGGER accounts_balance_snapshot_update
+    AFTER UPDATE OF balance ON accounts
+    FOR EACH ROW
+    WHEN (OLD.balance IS DISTINCT FROM NEW.balance)
+    EXECUTE FUNCTION snapshot_account_balance();
+
+-- Восстановление истории по журналу транзакций: остаток на конец дня D —
+-- текущий баланс минус движения после D. Нужен для уже накопленных данных
+-- и после загрузки транзакций задним числом.
+CREATE OR REPLACE FUNCTION rebuild_account_daily_balances(
+    p_account_ids INTEGER[] DEFAULT NULL
+) RETURNS void AS $$
+BEGIN
+    DELETE FROM account_daily_balances
+    WHERE p_account_ids IS NULL OR account_id = ANY(p_account_ids);
+
+    WITH movements AS (
+        SELECT account_id, day, SUM(net) AS net
+        FROM (
+            SELECT to_account_id AS account_id,
+                   transaction_date::date AS day,
+                   amount AS net
+            FROM transactions
+            WHERE status = 'completed'
+            UNION ALL
+            SELECT from_account_id, transaction_date::date, -amount
+            FROM transactions
+            WHERE status = 'completed' AND from_account_id IS NOT NULL
+        ) m
+        WHERE p_account_ids IS NULL OR account_id = ANY(p_account_ids)
+        GROUP BY account_id, day
+    ),
+    totals AS (
+        SELECT account_id, SUM(net) AS net, MIN(day) AS first_day, MAX(day) AS last_day
+        FROM movements
+        GROUP BY account_id
+    )
+    INSERT INTO account_daily_balances (account_id, balance_date, closing_balance)
+    SELECT mv.account_id,
+           mv.day,
+           a.balance - COALESCE(SUM(mv.net) OVER (
+               PARTITION BY mv.account_id
+               ORDER BY mv.day DESC
+               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+           ), 0)
+    FROM movements mv
+    JOIN accounts a ON a.id = mv.account_id
+    UNION ALL
+    -- Начальный остаток на дату открытия
+    SELECT a.id, a.opened_date, a.balance - COALESCE(t.net, 0)
+    FROM accounts a
+    LEFT JOIN totals t ON t.account_id = a.id
+    WHERE (p_account_ids IS NULL OR a.id = ANY(p_account_ids))
+      AND (t.first_day IS NULL OR a.opened_date < t.first_day)
+    UNION ALL
+    -- Текущий остаток, если сегодня движений не было
+    SELECT a.id, CURRENT_DATE, a.balance
+    FROM accounts a
+    LEFT JOIN totals t ON t.account_id = a.id
+    WHERE (p_account_ids IS NULL OR a.id = ANY(p_account_ids))
+      AND (t.last_day IS NULL OR t.last_day < CURRENT_DATE)
+    ON CONFLICT (account_id, balance_date) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade(ctx):
+    ctx.execute(SCHEMA)
+
+    with ctx.conn.cursor() as cursor:
+        cursor.execute("SELECT id FROM accounts ORDER BY id")
+        account_ids = [row[0] for row in cursor.fetchall()]
+
+    batch_size = AppConfig.MIGRATION_BATCH_SIZE
+    for start in range(0, len(account_ids), batch_size):
+        ctx.execute(
+            "SELECT rebuild_account_daily_balances(%s)",
+            (account_ids[start : start + batch_size],),
+        )
+    print(f"[INFO] account_daily_balances: пересчитано счетов: {len(account_ids)}")
@@ -0,0 +1,189 @@
+"""Помесячное секционирование transactions по transaction_date.
+
+Новые секции заранее создаёт python -m app.core.database.partitions ensure
+(раз в месяц по расписанию); строки месяцев без секции попадают в
+transactions_default и переносятся при создании секции.
+
+Существующая несекционированная таблица не копируется: она целиком
+становится секцией transactions_legacy (все даты до границы cutoff), а
+помесячные секции начинаются с cutoff. Долгие шаги — проверка ограничения
+и построение индекса — идут без блокировки записи; под ACCESS EXCLUSIVE
+выполняется только переключение, которое меняет каталог и не читает
+данные. На свежей базе init.sql уже создаёт секционированную таблицу.
+"""
+
+from datetime import datetime
+
+TRANSACTIONAL = False
+
+FUNCTIONS = """
+-- Секция одного месяца: transactions_YYYY_MM. NULL, если месяц уже покрыт
+-- другой секцией (transactions_legacy)
+CREATE OR REPLACE FUNCTION create_transactions_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_from DATE := date_trunc('month', p_month)::date;
+    v_to DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := 'transactions_' || to_char(p_month, 'YYYY_MM');
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE transactions INCLUDING DEFAULTS)', v_name);
+    -- CHECK совпадает с границами секции: ATTACH не сканирует таблицу повторно
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I CHECK (transaction_date >= %L AND transaction_date < %L)',
+        v_name, v_name || '_bounds', v_from, v_to
+    );
+    IF to_regclass('transactions_default') IS NOT NULL THEN
+        EXECUTE format(
+            'WITH moved AS (
+                 DELETE FROM transactions_default
+                 WHERE transaction_date >= %L AND transaction_date < %L
+                 RETURNING *
+             )
+             INSERT INTO %I SELECT * FROM moved',
+            v_from, v_to, v_name
+        );
+    END IF;
+    EXECUTE format(
+        'ALTER TABLE transactions ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        v_name, v_from, v_to
+    );
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', v_name, v_name || '_bounds');
+    RETURN v_name;
+EXCEPTION
+    -- Диапазон пересекается с существующей секцией; созданная таблица и
+    -- перенесённые строки откатываются вместе с блоком
+    WHEN invalid_object_definition THEN
+        RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Секции с месяца p_from по текущий месяц плюс p_months_ahead вперёд
+CREATE OR REPLACE FUNCTION ensure_transactions_partitions(
+    p_months_ahead INTEGER DEFAULT 3,
+    p_from DATE DEFAULT CURRENT_DATE
+) RETURNS SETOF TEXT AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::date;
+    v_last DATE := (date_trunc('month', CURRENT_DATE)
+                    + make_interval(months => p_months_ahead))::date;
+    v_name TEXT;
+BEGIN
+    WHILE v_month <= v_last LOOP
+        v_name := create_transactions_partition(v_month);
+        IF v_name IS NOT NULL THEN
+            RETURN NEXT v_name;
+        END IF;
+        v_month := (v_month + INTERVAL '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Переключение: одна короткая транзакция, только изменения каталога.
+# Первичный ключ (id, transaction_date) — заранее построенный индекс,
+# внешние ключи совпадают с ключами старой таблицы и не перепроверяются,
+# а проверенный CHECK доказывает границы секции без чтения строк
+SWITCH = """
+ALTER TABLE transactions RENAME TO transactions_legacy;
+ALTER TABLE transactions_legacy
+    DROP CONSTRAINT transactions_pkey,
+    ADD CONSTRAINT transactions_legacy_pkey
+        PRIMARY KEY USING INDEX transactions_legacy_pkey;
+ALTER SEQUENCE transactions_id_seq OWNED BY NONE;
+-- Триггер уведомлений (0002) создаётся заново на секционированной таблице
+DROP TRIGGER IF EXISTS transactions_notify_change ON transactions_legacy;
+
+CREATE TABLE transactions (
+    LIKE transactions_legacy INCLUDING DEFAULTS,
+    PRIMARY KEY (id, transaction_date),
+    FOREIGN KEY (from_account_id) REFERENCES accounts(id),
+    FOREIGN KEY (to_account_id) REFERENCES accounts(id)
+) PARTITION BY RANGE (transaction_date);
+ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id;
+
+ALTER TABLE transactions ATTACH PARTITION transactions_legacy
+    FOR VALUES FROM (MINVALUE) TO (%(cutoff)s);
+ALTER TABLE transactions_legacy DROP CONSTRAINT transactions_legacy_bounds;
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
+"""
+
+NOTIFY_TRIGGER = """
+CREATE TRIGGER transactions_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('transactions')
+"""
+
+
+def upgrade(ctx):
+    ctx.execute(FUNCTIONS)
+
+    start = None
+    partitioned = _query(
+        ctx, "SELECT relkind = 'p' FROM pg_class WHERE oid = 'transactions'::regclass"
+    )
+    if not partitioned:
+        start = _convert(ctx)
+
+    # Свежая база: секции для строк из init.sql; после переноса — с границы
+    # transactions_legacy. И на три месяца вперёд
+    ctx.execute(
+        """
+        SELECT ensure_transactions_partitions(3, COALESCE(
+            %s, (SELECT min(transaction_date)::date FROM transactions), CURRENT_DATE
+        ))
+        """,
+        (start,),
+    )
+
+
+def _convert(ctx) -> datetime:
+    # Граница старой секции — начало месяца после текущего и после самой
+    # поздней строки: до переключения в таблицу продолжают писать
+    cutoff = _query(
+        ctx,
+        """
+        SELECT GREATEST(
+            date_trunc('month', NOW()),
+            date_trunc('month', max(transaction_date))
+        ) + INTERVAL '1 month'
+        FROM transactions
+        """,
+    )
+
+    # NOT VALID — короткая блокировка, проверка существующих строк — отдельно
+    ctx.execute(
+        "ALTER TABLE transactions DROP CONSTRAINT IF EXISTS transactions_legacy_bounds"
+    )
+    ctx.execute(
+        """
+        ALTER TABLE transactions ADD CONSTRAINT transactions_legacy_bounds
+            CHECK (transaction_date IS NOT NULL AND transaction_date < %s) NOT VALID
+        """,
+        (cutoff,),
+    )
+    # SHARE UPDATE EXCLUSIVE: запись в таблицу продолжается
+    ctx.execute(
+        "ALTER TABLE transactions VALIDATE CONSTRAINT transactions_legacy_bounds"
+    )
+    ctx.execute(
+        """
+        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS transactions_legacy_pkey
+            ON transactions (id, transaction_date)
+        """
+    )
+
+    switch = SWITCH
+    if _query(ctx, "SELECT to_regproc('notify_row_change') IS NOT NULL"):
+        switch += ";" + NOTIFY_TRIGGER
+    ctx.execute(switch, {"cutoff": cutoff})
+    return cutoff.date()
+
+
+def _query(ctx, query: str, params=None):
+    with ctx.conn.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchone()[0]
@@ -0,0 +1,78 @@
+"""Составные индексы под запросы сервисов вместо одноколоночных.
+
+Выполняется вне транзакции, и запись в таблицы на время построения не
+блокируется: индексы clients/accounts строятся CREATE INDEX CONCURRENTLY,
+индексы секционированной transactions — по секциям
+(MigrationContext.create_partitioned_index).
+
+    python -m app.core.database.migrations migrate
+
+Планы и время до/после: python -m app.core.utils.index_benchmark
+"""
+
+TRANSACTIONAL = False
+
+
+def upgrade(ctx):
+    # Страницы клиентов: ORDER BY last_name, first_name, id
+    ctx.execute(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clients_name_order
+            ON clients (last_name, first_name, id)
+        """
+    )
+
+    # AccountService.get_client_accounts: client_id + account_type
+    ctx.execute(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_client_type
+            ON accounts (client_id, account_type) INCLUDE (id)
+        """
+    )
+
+    # Страницы счетов клиента: ORDER BY opened_date DESC, id DESC
+    ctx.execute(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_client_opened
+            ON accounts (client_id, opened_date DESC, id DESC)
+        """
+    )
+
+    # Префикс обоих индексов выше
+    ctx.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_accounts_client_id")
+    # Дублируют индексы ограничений UNIQUE (accounts_account_number_key,
+    # auth_login_key)
+    ctx.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_account_number")
+    ctx.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_auth_login")
+
+    # Транзакции счёта/клиента от новых к старым: условие на счёт и ключ
+    # страницы (transaction_date, id) в одном индексе; INCLUDE покрывает
+    # помесячную статистику
+    ctx.create_partitioned_index(
+        "idx_transactions_from_account_date",
+        "transactions",
+        "(from_account_id, transaction_date DESC, id DESC) "
+        "INCLUDE (amount, transaction_type)",
+    )
+    ctx.create_partitioned_index(
+        "idx_transactions_to_account_date",
+        "transactions",
+        "(to_account_id, transaction_date DESC, id DESC) "
+        "INCLUDE (amount, transaction_type)",
+    )
+
+    # Общий список: ORDER BY transaction_date DESC, id DESC
+    ctx.create_partitioned_index(
+        "idx_transactions_date_id", "transactions", "(transaction_date DESC, id DESC)"
+    )
+
+    # Удаление секционированного индекса — короткая блокировка без чтения данных
+    for index in (
+        "idx_transactions_from_account",
+        "idx_transactions_to_account",
+        "idx_transactions_date",
+    ):
+        ctx.execute(f"DROP INDEX IF EXISTS {index}")
+
+    for table in ("clients", "accounts", "transactions"):
+        ctx.execute(f"ANALYZE {table}")
@@ -0,0 +1,17 @@
+-- Ключи идемпотентности проводок: повтор запроса с тем же ключом (повторный
+-- клик, переподключение, повтор клиента API) возвращает исходный результат,
+-- а не проводит операцию второй раз.
+-- Отдельная таблица, а не столбец transactions: уникальный индекс
+-- секционированной таблицы обязан включать transaction_date, а повтор может
+-- прийти уже в другую дату (и в другую секцию).
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(64) PRIMARY KEY,
+    -- Хэш операции и её параметров: тот же ключ с другими параметрами — ошибка
+    request_hash CHAR(64) NOT NULL,
+    transaction_id INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Для удаления старых ключей (см. README)
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created
+    ON idempotency_keys (created_at);
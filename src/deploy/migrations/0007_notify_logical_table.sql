@@ -0,0 +1,34 @@
+-- Имя таблицы в уведомлениях (0002) передаётся аргументом триггера.
+-- После секционирования (0004) построчный триггер срабатывает на секции, и
+-- TG_TABLE_NAME — transactions_YYYY_MM или transactions_default, а клиент
+-- (app/core/database/listener.py) ждёт логическое имя transactions.
+CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'bank_changes',
+        json_build_object(
+            'table', COALESCE(TG_ARGV[0], TG_TABLE_NAME),
+            'op', TG_OP,
+            'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- DROP + CREATE, а не CREATE OR REPLACE: на секционированной таблице
+-- заменить триггер нельзя, а DROP снимает и его копии на секциях
+DROP TRIGGER IF EXISTS clients_notify_change ON clients;
+CREATE TRIGGER clients_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON clients
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('clients');
+
+DROP TRIGGER IF EXISTS accounts_notify_change ON accounts;
+CREATE TRIGGER accounts_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON accounts
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('accounts');
+
+DROP TRIGGER IF EXISTS transactions_notify_change ON transactions;
+CREATE TRIGGER transactions_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION notify_row_change('transactions');
@@ -0,0 +1,10 @@
+-- migrate: no-transaction
+-- Порядок клиентов по байтам (COLLATE "C") вместо правил локали базы.
+-- Страницы клиентов (ClientService.get_clients_page) дочитываются по ключу
+-- (last_name, first_name, id), а таблица в интерфейсе сравнивает этот ключ
+-- в Python — по кодовым точкам, как и "C" для UTF-8. С сортировкой локали
+-- границы страниц и место вставленной строки вычислялись бы неверно.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clients_name_order_c
+    ON clients (last_name COLLATE "C", first_name COLLATE "C", id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_clients_name_order;
@@ -19,9 +19,6 @@ CREATE TABLE auth (
     client_id INTEGER REFERENCES clients(id) ON DELETE SET NULL
 );
 
--- Индекс для ускорения поиска по логину
-CREATE INDEX idx_auth_login ON auth(login);
-
 -- Создание таблицы счетов
 CREATE TABLE accounts (
     id SERIAL PRIMARY KEY,
@@ -36,11 +33,11 @@ CREATE TABLE accounts (
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
-CREATE UNIQUE INDEX idx_account_number ON accounts (account_number);
-
 -- Создание таблицы транзакций
+-- Секционирована по месяцам transaction_date: помесячные секции создаются
+-- миграцией 0004 и python -m app.core.database.partitions
 CREATE TABLE transactions (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     from_account_id INTEGER REFERENCES accounts(id),
     to_account_id INTEGER NOT NULL REFERENCES accounts(id),
     amount DECIMAL(15, 2) NOT NULL,
@@ -48,14 +45,34 @@ CREATE TABLE transactions (
     description TEXT,
     transaction_date TIMESTAMP NOT NULL DEFAULT NOW(),
     status VARCHAR(20) NOT NULL DEFAULT 'completed', -- 'pending', 'completed', 'failed'
-    created_at TIMESTAMP DEFAULT NOW()
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (id, transaction_date)
+) PARTITION BY RANGE (transaction_date);
+
+-- Строки, для месяца которых ещё нет секции
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
+
+-- Ключи идемпотентности проводок (см. deploy/migrations/0006)
+CREATE TABLE idempotency_keys (
+    key VARCHAR(64) PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL,
+    transaction_id INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
+CREATE INDEX idx_idempotency_keys_created ON idempotency_keys (created_at);
 
--- Индексы для улучшения производительности
-CREATE INDEX idx_accounts_client_id ON accounts(client_id);
-CREATE INDEX idx_transactions_from_account ON transactions(from_account_id);
-CREATE INDEX idx_transactions_to_account ON transactions(to_account_id);
-CREATE INDEX idx_transactions_date ON transactions(transaction_date);
+-- Индексы под запросы сервисов (см. deploy/migrations/0005 и 0008)
+CREATE INDEX idx_clients_name_order_c
+    ON clients (last_name COLLATE "C", first_name COLLATE "C", id);
+CREATE INDEX idx_accounts_client_type ON accounts (client_id, account_type) INCLUDE (id);
+CREATE INDEX idx_accounts_client_opened ON accounts (client_id, opened_date DESC, id DESC);
+CREATE INDEX idx_transactions_from_account_date
+    ON transactions (from_account_id, transaction_date DESC, id DESC)
+    INCLUDE (amount, transaction_type);
+CREATE INDEX idx_transactions_to_account_date
+    ON transactions (to_account_id, transaction_date DESC, id DESC)
+    INCLUDE (amount, transaction_type);
+CREATE INDEX idx_transactions_date_id ON transactions (transaction_date DESC, id DESC);
 
 -- Начальные данные: клиенты
 INSERT INTO clients (first_name, last_name, passport_number, phone_number, email)